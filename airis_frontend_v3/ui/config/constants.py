@@ -26,6 +26,11 @@ class UIConstants:
         # 'transparant': '#00000000'
     }
     
+    # A question batch stays open while the input window is shown and this many seconds
+    # after it hides, long enough to press the hotkey and ask another question
+    QUESTION_BATCH_WINDOW = 1.5
+    QUESTION_BATCH_MAX_WAIT = 15.0
+    
     # Placeholder text
     PLACEHOLDER_TEXT = "Search..."
     
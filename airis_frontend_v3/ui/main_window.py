@@ -18,6 +18,7 @@ from .managers.hotkey_manager import HotkeyManager
 from .components.blinking_eye import BlinkingEyeWindow
 from .managers.history_manager import HistoryManager
 from .history_window import HistoryWindow
+from app.utils.tracing import span, traced
 # from app.controllers.maincontroller import controller
 
 class GlassEffectTrayApp:
@@ -37,7 +38,9 @@ class GlassEffectTrayApp:
         # State flags
         self.is_window_visible = False
         self.is_placeholder = True
-        self.is_processing = False
+        # Requests in flight; batched questions run several at once
+        self.active_requests = 0
+        self._requests_lock = threading.Lock()
 
         # Managers
         self.style_manager = StyleManager(self.root)
@@ -135,11 +138,14 @@ class GlassEffectTrayApp:
 
         threading.Thread(target=self._process_text_input, args=(input_text,drawing_mode), daemon=True).start()
     
+    @traced("request")
     def _process_text_input(self, text_input, drawing_mode):
         """Internal method to process text input in a separate thread."""
-        self.is_processing = True
+        with self._requests_lock:
+            self.active_requests += 1
         self.command_queue.put("show_processing")
-        time.sleep(0.3)
+        with span("ui.sleep", seconds=0.3):
+            time.sleep(0.3)
         
         start_time = time.time()
         entry_id = None
@@ -181,8 +187,11 @@ class GlassEffectTrayApp:
             
             self.command_queue.put(lambda: self.processing_manager.update_response_text(error_msg, is_error=True))
         finally:
-            self.is_processing = False
-            self.command_queue.put("hide_processing")
+            with self._requests_lock:
+                self.active_requests -= 1
+                idle = self.active_requests == 0
+            if idle:
+                self.command_queue.put("hide_processing")
             self.command_queue.put("show_result")
 
     def update_drawing_button_state(self, event=None):
@@ -228,9 +237,18 @@ class GlassEffectTrayApp:
         if not self.text_input.get().strip():
             self.set_placeholder()
 
+    @property
+    def is_processing(self):
+        """True while at least one request is being processed."""
+        return self.active_requests > 0
+
+    def can_accept_input(self):
+        """True when idle, or while a question batch is still collecting questions."""
+        return not self.is_processing or self.processing_manager.question_batcher.is_collecting()
+
     def toggle_window(self):
         """Toggles window visibility via the command queue."""
-        if self.is_processing:
+        if not self.can_accept_input():
             return
         if self.is_window_visible:
             self.command_queue.put("hide")
@@ -11,6 +11,7 @@ from pathlib import Path
 import shutil
 
 from app.utils.screenshot import screenshot_history
+from app.utils.tracing import traced
 @dataclass
 class HistoryEntry:
     """Represents a single history entry."""
@@ -131,6 +132,7 @@ class HistoryManager:
             print(f"Error loading history: {e}")
             self.history_entries = []
     
+    @traced("history.save")
     def save_history(self, id=None):
         """Saves history to file."""
         try:
@@ -3,6 +3,7 @@ Global hotkey management for the Airis application.
 Handles setting up and managing global keyboard shortcuts.
 """
 from pynput import keyboard
+from app.utils.tracing import span
 
 class HotkeyManager:
     """Manages global hotkeys for the application."""
@@ -14,14 +15,15 @@ class HotkeyManager:
     def setup_hotkey_listener(self):
         """Sets up the global hotkey listener for Ctrl+Alt+Space."""
         def on_hotkey():
-            if not self.app.is_processing:
-                self.app.toggle_window()
-            else:
-                if self.app.tray_manager.tray_icon:
-                    self.app.tray_manager.tray_icon.notify(
-                        "Airis is busy processing. Please wait.", 
-                        "Airis"
-                    )
+            with span("hotkey"):
+                if self.app.can_accept_input():
+                    self.app.toggle_window()
+                else:
+                    if self.app.tray_manager.tray_icon:
+                        self.app.tray_manager.tray_icon.notify(
+                            "Airis is busy processing. Please wait.", 
+                            "Airis"
+                        )
                 
         try:
             self.hotkey_listener = keyboard.GlobalHotKeys({
@@ -6,39 +6,57 @@ import time
 from typing import Union
 from app.controllers.maincontroller import controller
 from app.utils.screenshot import screenshot
+from app.utils.tracing import span, traced
+from .question_batch_manager import QuestionBatchManager
 
 class ProcessingManager:
     """Manages AI processing operations and related UI updates."""
     
     def __init__(self, app_instance):
         self.app = app_instance
+        self.question_batcher = QuestionBatchManager(app_instance, self._answer_questions, self._capture_screen)
         
+    @traced("processing.execute_input")
     def execute_input(self, string: str, drawing_mode: bool):
         """Calls the external controller function to process input."""
         try:
-            time.sleep(0.2)
-            
-            screenshot()
-            
             if drawing_mode:
+                with span("ui.sleep", seconds=0.2):
+                    time.sleep(0.2)
+                
+                screenshot()
+                
                 response_text = controller.glass_board(string)
                 valid_output = {
                     "explanation": "Your overlay still can be seen on the history section.",
                     "short_answer": "Drawing Done!"
                 }
             else: 
-                response_text = controller(string)
+                # Questions submitted close together share one screenshot and one model call
+                response_text = self.question_batcher.submit(string)
                 valid_output = response_text
             
             self.app.command_queue.put(
                 lambda: self.update_response_text(valid_output)
             )
+            return valid_output
         except Exception as e:
             error_message = f"An error occurred during processing: {e}"
             self.app.command_queue.put(
                 lambda: self.update_response_text(error_message, is_error=True)
             )
             
+    def _capture_screen(self):
+        """Captures the screen a question batch is answered about, when its first question arrives."""
+        with span("ui.sleep", seconds=0.2):
+            time.sleep(0.2)
+        
+        screenshot()
+
+    def _answer_questions(self, questions: list) -> list:
+        """Answers a batch of questions about the screen captured for it."""
+        return controller.batch_questions(questions)
+            
     def update_response_text(self, text: Union[dict, str], is_error=False):
         """Updates the main response text area."""
         if self.app.tray_manager.tray_icon:
@@ -0,0 +1,77 @@
+"""
+Question batch manager for the Airis application.
+Coalesces questions submitted within a short window into one multimodal call.
+Submitting hides the input window, so the batch stays open while the window is shown
+again and for a window afterwards long enough to press the hotkey.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+from ..config.constants import UIConstants
+
+class QuestionBatchManager:
+    """Collects questions and answers them together about a single screenshot."""
+
+    def __init__(self, app_instance, process_batch: Callable[[List[str]], list], capture: Callable[[], None]):
+        self.app = app_instance
+        self.process_batch = process_batch
+        self.capture = capture
+        self.window = UIConstants.QUESTION_BATCH_WINDOW
+        self.max_wait = UIConstants.QUESTION_BATCH_MAX_WAIT
+        self._lock = threading.Lock()
+        self._pending = []
+        self._opened_at = None
+
+    def is_collecting(self) -> bool:
+        """True while a batch is open and still accepts questions."""
+        with self._lock:
+            return self._opened_at is not None
+
+    def submit(self, question: str) -> dict:
+        """Queues a question and blocks until its answer from the batch is available."""
+        future = Future()
+        with self._lock:
+            opening = self._opened_at is None
+            if opening:
+                self._opened_at = time.time()
+            self._pending.append((question, future))
+        if opening:
+            # The batch is answered about the screen as it was when the first question came in
+            try:
+                self.capture()
+            finally:
+                threading.Thread(target=self._collect, daemon=True).start()
+        return future.result()
+
+    def _collect(self):
+        """Waits for the window to close, then answers the whole batch."""
+        last_count = 0
+        last_change = time.time()
+        while True:
+            time.sleep(0.1)
+            with self._lock:
+                count = len(self._pending)
+                waited = time.time() - self._opened_at
+            # Keep the batch open while the user is typing another question, and for a
+            # while after each one so the window can be reopened with the hotkey
+            if count != last_count or self.app.is_window_visible:
+                last_count, last_change = count, time.time()
+            quiet = time.time() - last_change >= self.window
+            if quiet or waited >= self.max_wait:
+                break
+
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._opened_at = None
+
+        questions = [question for question, _ in batch]
+        print(f"Answering {len(questions)} question(s) in one batch")
+        try:
+            answers = self.process_batch(questions)
+            for (_, future), answer in zip(batch, answers):
+                future.set_result(answer)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
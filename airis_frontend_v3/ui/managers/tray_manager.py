@@ -5,6 +5,7 @@ Handles tray icon creation, menu, and global hotkeys.
 import threading
 from PIL import Image, ImageDraw
 import pystray
+from app.utils.tracing import traced
 
 class TrayManager:
     """Manages the system tray icon and global hotkeys."""
@@ -78,6 +79,7 @@ class TrayManager:
         """Quits the application via callback."""
         self.app_callback.quit_app()
         
+    @traced("notify.tray")
     def show_notification(self, message, title="Airis"):
         """Shows a system notification."""
         if self.tray_icon:
@@ -252,14 +252,14 @@ class WindowManager:
 
     def start_focus_monitoring(self):
         """Starts the periodic check for focus loss."""
-        if self.app.is_processing:
+        if not self.app.can_accept_input():
             return
         self.root.bind('<Button-1>', lambda e: None, add='+')
         self.check_window_focus()
 
     def check_window_focus(self):
         """Recursively checks if the window has focus."""
-        if not self.app.is_window_visible or self.app.is_processing or self.is_animating:
+        if not self.app.is_window_visible or not self.app.can_accept_input() or self.is_animating:
             return
             
         try:
@@ -274,7 +274,7 @@ class WindowManager:
 
     def confirm_focus_loss(self):
         """Confirms focus loss before hiding the window."""
-        if not self.app.is_window_visible or self.app.is_processing or self.is_animating:
+        if not self.app.is_window_visible or not self.app.can_accept_input() or self.is_animating:
             return
             
         try:
@@ -8,6 +8,9 @@ from app.services.chain.instructionchainV4 import EnhancedInstructionChain
 from app.services.chain.boardchain import BoardChain
 from app.utils.screenshot import screenshot
 from config.setting import env
+from app.utils.tracing import tracer
+
+tracer.configure(env.trace_file)
 
 class maincontroller:
     def __init__(self):
@@ -26,6 +29,9 @@ class maincontroller:
     def __call__(self, input: str):
         return self.question_chain(input)
     
+    def batch_questions(self, inputs: list):
+        return self.question_chain.ask_many(inputs)
+    
     def glass_board(self, input: str):
         print("reach glass call")
         return self.board_chain(input)
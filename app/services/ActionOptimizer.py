@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from langchain_core.messages import BaseMessage, ToolMessage
+
+KEYBOARD_TOOLS = {"KeyboardWriteText", "KeyboardPressKey"}
+WAIT_TOOL = "WaitAndObserve"
+SCREEN_TOOL = "ShowScreen"
+# Tools after which a screenshot taken earlier in the turn is already stale
+PASSIVE_TOOLS = {WAIT_TOOL, SCREEN_TOOL, "RequestTools", "generate_directory_tree"}
+
+SKIPPED_SCREENSHOT = "Skipped: a later action in the same turn changes the screen. Call ShowScreen again to observe."
+
+@dataclass
+class PlannedAction:
+    """
+    One action to execute and the original tool calls it stands for.
+    A None call means the original calls were dropped and are only answered.
+    """
+    call: Optional[dict]
+    covers: List[dict]
+    note: str = ""
+
+    def answer(self, tool_messages: Optional[List[BaseMessage]] = None) -> List[BaseMessage]:
+        """
+        Answers every covered tool call, in order.
+
+        Args:
+            tool_messages (List[BaseMessage], optional): Messages produced by executing the action
+
+        Returns:
+            List[BaseMessage]: One ToolMessage per covered call, followed by any extra
+            messages (e.g. images) the action produced
+        """
+        if self.call is None:
+            return [
+                ToolMessage(content=self.note, tool_call_id=call["id"], name=call.get("name"))
+                for call in self.covers
+            ]
+        if len(self.covers) == 1 and self.covers[0] is self.call:
+            return list(tool_messages)
+        result, extra = tool_messages[0], list(tool_messages[1:])
+        content = f"{result.content} ({self.note})" if self.note else result.content
+        return [
+            ToolMessage(content=content, tool_call_id=call["id"], name=call.get("name"))
+            for call in self.covers
+        ] + extra
+
+class ActionOptimizer:
+    """
+    Rewrites the tool calls of a turn before they run:
+    adjacent KeyboardWriteText / KeyboardPressKey calls become one KeyboardSequence batch,
+    back-to-back waits merge into one wait of their total length, and screenshots taken
+    before a later action in the same turn are dropped since nobody sees them before that
+    action.
+
+    KeyboardSequence is only ever produced here: it is never bound to the model and is
+    declared as an internal tool in ToolRegistry, so the agent can execute it (and the
+    plan cache replay it) without it being part of any toolset.
+    """
+
+    def __init__(self):
+        self.calls_in = 0
+        self.actions_out = 0
+        self.rewrites = 0
+
+    def optimize(self, tool_calls: List[dict]) -> List[PlannedAction]:
+        """
+        Args:
+            tool_calls (List[dict]): Tool calls of the turn, in order
+
+        Returns:
+            List[PlannedAction]: Actions covering every original call, in order
+        """
+        actions = []
+        notes = []
+        for index, call in enumerate(tool_calls):
+            name = call.get("name")
+            previous = actions[-1] if actions else None
+            previous_name = previous.call.get("name") if previous and previous.call else None
+
+            if name == SCREEN_TOOL and any(c.get("name") not in PASSIVE_TOOLS for c in tool_calls[index + 1:]):
+                actions.append(PlannedAction(None, [call], SKIPPED_SCREENSHOT))
+                notes.append(f"dropped ShowScreen #{index + 1}")
+            elif name in KEYBOARD_TOOLS and previous_name in KEYBOARD_TOOLS | {"KeyboardSequence"}:
+                previous.call = self._keyboard_sequence(previous.call, call)
+                previous.covers.append(call)
+                previous.note = f"batched {len(previous.covers)} keyboard events"
+            elif name == WAIT_TOOL and previous_name == WAIT_TOOL:
+                seconds = _seconds(previous.call) + _seconds(call)
+                previous.call = {**previous.call, "args": {"seconds": seconds}}
+                previous.covers.append(call)
+                previous.note = f"{len(previous.covers)} waits merged into one of {seconds}s"
+            else:
+                actions.append(PlannedAction(call, [call]))
+
+        notes += [action.note for action in actions if action.call is not None and action.note]
+        executed = sum(1 for action in actions if action.call is not None)
+        self.calls_in += len(tool_calls)
+        self.actions_out += executed
+        if notes:
+            self.rewrites += len(notes)
+            print(f"Action optimizer: {len(tool_calls)} calls -> {executed} actions ({'; '.join(notes)})")
+        return actions
+
+    def stats(self) -> dict:
+        return {
+            "calls_in": self.calls_in,
+            "actions_out": self.actions_out,
+            "rewrites": self.rewrites,
+        }
+
+    @staticmethod
+    def _keyboard_sequence(current: dict, call: dict) -> dict:
+        events = list(current["args"]["events"]) if current.get("name") == "KeyboardSequence" else [_keyboard_event(current)]
+        events.append(_keyboard_event(call))
+        return {"name": "KeyboardSequence", "args": {"events": events}, "id": current["id"], "type": "tool_call"}
+
+def _keyboard_event(call: dict) -> dict:
+    args = call.get("args", {})
+    if call.get("name") == "KeyboardWriteText":
+        return {"text": args.get("text", ""), "strategy": args.get("strategy", "auto")}
+    return {"key": args.get("key", ""), "presses": args.get("presses", 1)}
+
+def _seconds(call: dict) -> float:
+    return call.get("args", {}).get("seconds", 2)
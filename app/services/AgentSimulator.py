@@ -0,0 +1,251 @@
+"""
+Offline end-to-end runs of the agent loop against the virtual desktop.
+
+A scripted chat model plays the LLM, so the whole loop (tool selection, optimizer,
+scheduler, tools, readiness polling, screenshots) runs without a display or network
+and on a virtual clock. Used to benchmark the loop and catch regressions in the tools.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+import random
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.services.GuiBackend import gui
+from app.services.VirtualDesktop import VirtualDesktop
+
+@dataclass
+class SimulatedTask:
+    """
+    An instruction, the tool calls of each turn that solve it, and a check of the final
+    desktop state. A policy, when given, replaces the fixed turns: it gets the turn number
+    and returns that turn's calls, or None for the final answer.
+    """
+    instruction: str
+    turns: List[List[dict]]
+    check: Callable[[VirtualDesktop], bool]
+    setup: Optional[Callable[[VirtualDesktop], None]] = None
+    policy: Optional[Callable[[int], Optional[List[dict]]]] = None
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers from a task script instead of an API: the n-th response of a
+    task makes the tool calls of its n-th scripted turn, then a final text answer.
+    """
+    script: Any = None  # Callable[[str], Optional[SimulatedTask]], looked up by instruction
+    model: str = "scripted"
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        self.calls += 1
+        instruction = next((str(m.content) for m in messages if isinstance(m, HumanMessage)), "")
+        task = self.script(instruction)
+        turns = task.turns if task is not None else []
+        # Compaction may drop early turns, so the turn number travels in the tool call ids
+        turn = max((int(call["id"].split("_")[1]) + 1 for m in messages if isinstance(m, AIMessage)
+                    for call in m.tool_calls if call["id"].startswith("call_")), default=0)
+        planned = task.policy(turn) if task is not None and task.policy else (turns[turn] if turn < len(turns) else None)
+        if not planned:
+            message = AIMessage(content="Task complete.")
+        else:
+            calls = [
+                {"name": call["name"], "args": call.get("args", {}), "id": f"call_{turn}_{i}", "type": "tool_call"}
+                for i, call in enumerate(planned)
+            ]
+            message = AIMessage(content="", tool_calls=calls)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+def generate_tasks(count: int, seed: int = 0) -> List[SimulatedTask]:
+    """Random calculator, notepad and browser tasks with their scripted solutions."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        kind = rng.choice(("calc", "notepad", "browser"))
+        if kind == "calc":
+            a, b = rng.randint(1, 999), rng.randint(1, 999)
+            tasks.append(SimulatedTask(
+                f"open calculator and compute {a}+{b} (task {i})",
+                [[
+                    {"name": "OpenApplication", "args": {"app_name": "calc"}},
+                    {"name": "KeyboardWriteText", "args": {"text": f"{a}+{b}"}},
+                    {"name": "KeyboardPressKey", "args": {"key": "enter"}},
+                ], [{"name": "ShowScreen"}]],
+                lambda desktop, total=str(a + b): bool(desktop.find("calc")) and desktop.find("calc").text == total,
+            ))
+        elif kind == "notepad":
+            note = " ".join(rng.choice(("alpha", "beta", "gamma", "delta", "epsilon")) for _ in range(rng.randint(2, 12)))
+            filename = f"note_{i}.txt"
+            tasks.append(SimulatedTask(
+                f"open notepad, write '{note}' and save it as {filename}",
+                [[
+                    {"name": "OpenApplication", "args": {"app_name": "notepad"}},
+                    {"name": "KeyboardWriteText", "args": {"text": note}},
+                    {"name": "SaveFile", "args": {"filename": filename}},
+                ], [{"name": "ShowScreen"}]],
+                lambda desktop, note=note, filename=filename: bool(desktop.find("notepad"))
+                    and desktop.find("notepad").text == note and desktop.find("notepad").title.startswith(filename),
+            ))
+        else:
+            url = f"example.com/page/{rng.randint(1, 10_000)}"
+            tasks.append(SimulatedTask(
+                f"open the browser and go to {url}",
+                [[{"name": "OpenBrowserAndNavigate", "args": {"url": url}}], [{"name": "ShowScreen"}]],
+                lambda desktop, url=url: bool(desktop.find("chrome")) and url in desktop.find("chrome").title,
+            ))
+    return tasks
+
+def generate_click_tasks(count: int, desktop: VirtualDesktop, use_marks: bool, noise: float = 20.0,
+                         mark_error: float = 0.05, seed: int = 0) -> List[SimulatedTask]:
+    """
+    Tasks clicking one button of a dialog. The scripted model looks at the screen, then
+    either clicks the button's mark, misreading it as an adjacent mark with probability
+    `mark_error`, or estimates its center with Gaussian error of `noise` screenshot pixels
+    (a model reading coordinates off a compressed screenshot), and retries after every
+    miss it sees.
+    """
+    from app.utils.screentransform import agent_transform
+    from app.utils.setofmarks import marks
+
+    rng = random.Random(seed)
+    labels = ("OK", "Cancel", "Apply", "Help", "Save", "Open", "Next", "Back", "Retry", "Close")
+    tasks = []
+    for i in range(count):
+        chosen = rng.sample(labels, rng.randint(3, 6))
+        buttons = [(label, 30 + 95 * j, 150, 80, 26) for j, label in enumerate(chosen)]
+        x, y = rng.randint(0, 1300), rng.randint(0, 700)
+        target = rng.choice(chosen)
+        tx, ty = next((x + bx + w // 2, y + by + h // 2) for label, bx, by, w, h in buttons if label == target)
+
+        def setup(desktop, x=x, y=y, buttons=buttons, i=i):
+            desktop.open_window("notepad", text="draft notes\nmore text")
+            desktop.open_window("dialog", f"Dialog {i}", x=x, y=y, width=max(420, 40 + 95 * len(buttons)), height=220,
+                                text="Choose an action", buttons=buttons)
+
+        def policy(turn, target=target, tx=tx, ty=ty):
+            if turn == 0:
+                return [{"name": "ShowScreen"}]
+            if desktop.clicked == ("dialog", target):
+                return None
+            mark = marks.at(tx, ty)
+            if use_marks and mark is not None:
+                mark_id = mark.mark_id
+                if rng.random() < mark_error:
+                    # Marks are numbered in reading order: a misread label is usually a neighbour
+                    neighbours = [m for m in (mark_id - 1, mark_id + 1) if marks.get(m) is not None]
+                    mark_id = rng.choice(neighbours) if neighbours else mark_id
+                click = {"name": "ClickMark", "args": {"mark_id": mark_id}}
+            else:
+                # The estimate is read off the downscaled screenshot, in its pixels
+                ix, iy = agent_transform().to_image(tx, ty)
+                click = {"name": "CursorMoveAndClick", "args": {
+                    "coordinate_x_cursor_target": int(round(rng.gauss(ix, noise))),
+                    "coordinate_y_cursor_target": int(round(rng.gauss(iy, noise))),
+                }}
+            return [click, {"name": "ShowScreen"}]
+
+        tasks.append(SimulatedTask(
+            f"click the {target} button in Dialog {i}", [],
+            lambda desktop, target=target: desktop.clicked == ("dialog", target),
+            setup=setup, policy=policy,
+        ))
+    return tasks
+
+def compare_click_strategies(count: int = 100, noise: float = 20.0, mark_error: float = 0.05, seed: int = 0) -> dict:
+    """Turns per click task with estimated coordinates versus set-of-marks ids (misread with probability mark_error)."""
+    from config.setting import env
+
+    results = {}
+    for use_marks in (False, True):
+        desktop = VirtualDesktop()
+        env.screen_marks = use_marks
+        results["marks" if use_marks else "coordinates"] = run_tasks(
+            generate_click_tasks(count, desktop, use_marks, noise, mark_error, seed), desktop
+        )
+    return results
+
+def run_simulation(count: int = 100, seed: int = 0, desktop: Optional[VirtualDesktop] = None, quiet: bool = True) -> dict:
+    """
+    Runs generated tasks through EnhancedInstructionChain on a virtual desktop.
+
+    Args:
+        count (int): Number of tasks
+        seed (int): Seed of the task generator
+        desktop (VirtualDesktop, optional): Desktop to run on; a new one by default
+        quiet (bool): Silence the agent's per-turn logging
+
+    Returns:
+        dict: Success rate, wall time, virtual (simulated UI) time and action counts
+    """
+    return run_tasks(generate_tasks(count, seed), desktop, quiet)
+
+def run_tasks(tasks: List[SimulatedTask], desktop: Optional[VirtualDesktop] = None, quiet: bool = True, trajectories=None) -> dict:
+    """
+    Runs tasks through EnhancedInstructionChain on a virtual desktop; see run_simulation.
+    Trajectories are only recorded when a TrajectoryRecorder is given.
+    """
+    import contextlib
+    import io
+    from app.services.chain.instructionchainV4 import EnhancedInstructionChain
+
+    desktop = desktop or VirtualDesktop()
+    previous = gui.use(desktop)
+    tasks = {task.instruction: task for task in tasks}
+    llm = ScriptedChatModel(script=tasks.get)
+    agent = EnhancedInstructionChain(llm, plans=None, trajectories=trajectories)
+    passed = 0
+    start, virtual_start = time.perf_counter(), desktop.clock
+    try:
+        for task in tasks.values():
+            desktop.reset()
+            if task.setup:
+                task.setup(desktop)
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                agent(task.instruction)
+            passed += task.check(desktop)
+    finally:
+        gui.use(previous)
+        agent.scheduler.shutdown()
+    wall = time.perf_counter() - start
+    return {
+        "tasks": len(tasks),
+        "passed": passed,
+        "success_rate": round(passed / len(tasks), 3) if tasks else 0.0,
+        "wall_seconds": round(wall, 2),
+        "tasks_per_second": round(len(tasks) / wall, 1) if wall else 0.0,
+        "simulated_ui_seconds": round(desktop.clock - virtual_start, 1),
+        "gui_actions": desktop.actions,
+        "llm_calls": llm.calls,
+        "agent": agent.stats.summary(),
+    }
+
+if __name__ == "__main__":
+    # Headless throughput benchmark of the agent loop:
+    #   python -m app.services.AgentSimulator 2000
+    # Turns per click task, estimated coordinates vs set-of-marks (pixel noise of the
+    # estimates, probability of misreading a mark):
+    #   python -m app.services.AgentSimulator clicks 200 20 0.05
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "clicks":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        noise = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+        mark_error = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+        print(f"coordinate noise {noise:g} px, wrong-mark probability {mark_error:.0%}")
+        for strategy, result in compare_click_strategies(count, noise, mark_error).items():
+            print(f"{strategy:12s} turns/task {result['agent']['turns_per_task']:.2f}  "
+                  f"success {result['success_rate']:.0%}  llm calls {result['llm_calls']}")
+        sys.exit(0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(run_simulation(count))
@@ -1,36 +1,56 @@
 # fixed_autogui_tools.py
-import pyautogui
-import time
 import json
 import subprocess
 import shlex
+import time
 from pathlib import Path
-from typing import Union, Dict, Any, Optional
+from typing import Union, Dict, Any, List, Optional
 from app.utils.prepareimage import prepare_images
-from app.utils.screenshot import screenshot
+from app.utils.screenshot import capture_screen
+from app.utils.screentransform import agent_transform, to_screen
+from app.utils.screensignature import image_signature
+from app.utils.observation import ImageObservation
+from app.utils.textinput import enter_text
+from app.services.GuiBackend import gui
+from app.services.PacingController import pacing
+from app.services.DisplayGeometry import display
+from app.utils.readiness import wait_for_new_window, wait_for_screen_stable, wait_until_ready, window_titles
+from app.utils.deadline import cap
+from config.setting import env
 from langchain.tools import tool
 
-# Configure PyAutoGUI safety settings
-pyautogui.FAILSAFE = True
-
 class ScreenAutomationTools:
     """Enhanced screen automation tools with better error handling and capabilities"""
     
     @staticmethod
     def wait_for_element(timeout: int = 10) -> bool:
         """Wait for screen to stabilize after an action"""
-        time.sleep(1)
+        gui.sleep(1)
         return True
 
+# Upper bound for the Run dialog to appear after Win+R
+RUN_DIALOG_TIMEOUT = 1.0
+
+def _launch_from_run_dialog(command: str) -> set:
+    """Opens the Run dialog, types a command and presses Enter; returns the window titles before the launch."""
+    before = window_titles()
+    gui.hotkey('win', 'r')  # Open Run dialog
+    if wait_for_new_window(before, RUN_DIALOG_TIMEOUT) is None:
+        gui.sleep(0.3)  # No window list, or the dialog was not detected: brief pause for it to open
+    before_launch = window_titles()
+    gui.write(command, interval=pacing.type_interval())
+    gui.press('enter')
+    return before_launch
+
 @tool
-def OpenApplication(app_name: str, wait_time: int = 2) -> str:
+def OpenApplication(app_name: str, wait_time: int = 10) -> str:
     """
     Open an application using the Run dialog (Win+R).
-    This is a macro that combines: Win+R → Type app name → Enter
+    This is a macro that combines: Win+R → Type app name → Enter → Wait until the app is ready
     
     Args:
         app_name (str): Name of the application to open (e.g., "chrome", "notepad", "calc")
-        wait_time (int, optional): Seconds to wait after opening (default: 2)
+        wait_time (int, optional): Maximum seconds to wait for the app to be ready (default: 10)
     
     Returns:
         str: Success message
@@ -39,27 +59,24 @@ def OpenApplication(app_name: str, wait_time: int = 2) -> str:
         if not app_name:
             return "Error: app_name is required"
         
-        # Execute the sequence
-        pyautogui.hotkey('win', 'r')  # Open Run dialog
-        time.sleep(0.3)  # Brief pause for dialog to open
-        pyautogui.write(app_name, interval=0.05)  # Type app name
-        pyautogui.press('enter')  # Press Enter
-        time.sleep(wait_time)  # Wait for app to load
+        # Execute the sequence, then poll for the new window instead of sleeping a fixed time
+        before = _launch_from_run_dialog(app_name)
+        readiness = wait_until_ready(before, wait_time)
         
-        return f"Opened application: {app_name}"
+        return f"Opened application: {app_name} ({readiness})"
     except Exception as e:
         return f"Error opening application: {e}"
 
 @tool
-def OpenBrowserAndNavigate(url: str, browser: str = "chrome", wait_time: int = 3) -> str:
+def OpenBrowserAndNavigate(url: str, browser: str = "chrome", wait_time: int = 15) -> str:
     """
     Open a browser and navigate to a specific URL.
-    This is a macro that combines: Win+R → "chrome" → Enter → Wait → Type URL → Enter
+    This is a macro that combines: Win+R → "chrome" → Enter → Wait until ready → Type URL → Enter
     
     Args:
         url (str): URL to navigate to
         browser (str, optional): Browser to use (default: "chrome")
-        wait_time (int, optional): Seconds to wait for browser to load (default: 3)
+        wait_time (int, optional): Maximum seconds to wait for the browser and page to load (default: 15)
     
     Returns:
         str: Success message
@@ -68,21 +85,21 @@ def OpenBrowserAndNavigate(url: str, browser: str = "chrome", wait_time: int = 3
         if not url:
             return "Error: url is required"
         
-        # Open browser
-        pyautogui.hotkey('win', 'r')
-        time.sleep(0.3)
-        pyautogui.write(browser, interval=0.05)
-        pyautogui.press('enter')
-        time.sleep(wait_time)  # Wait for browser to load
+        # Open browser and wait until its window is ready
+        start = gui.monotonic()
+        before = _launch_from_run_dialog(browser)
+        readiness = wait_until_ready(before, wait_time)
         
         # Navigate to URL
-        pyautogui.hotkey('ctrl', 'l')  # Focus address bar
-        time.sleep(0.2)
-        pyautogui.write(url, interval=0.05)
-        pyautogui.press('enter')
-        time.sleep(1)  # Wait for page to start loading
+        gui.hotkey('ctrl', 'l')  # Focus address bar
+        gui.sleep(0.2)
+        gui.write(url, interval=pacing.type_interval())
+        gui.press('enter')
+        # Wait for the page to start rendering, within what is left of the budget
+        remaining = max(1.0, wait_time - (gui.monotonic() - start))
+        loaded = wait_for_screen_stable(remaining, require_change=True)
         
-        return f"Opened {browser} and navigated to {url}"
+        return f"Opened {browser} ({readiness}) and navigated to {url}{'' if loaded else ' (page still loading)'}"
     except Exception as e:
         return f"Error opening browser and navigating: {e}"
 
@@ -104,11 +121,11 @@ def SaveFile(filename: str, wait_time: float = 0.5) -> str:
             return "Error: filename is required"
         
         # Execute save sequence
-        pyautogui.hotkey('ctrl', 's')  # Open Save dialog
-        time.sleep(wait_time)  # Wait for dialog
-        pyautogui.write(filename, interval=0.05)  # Type filename
-        pyautogui.press('enter')  # Save
-        time.sleep(0.3)  # Brief pause
+        gui.hotkey('ctrl', 's')  # Open Save dialog
+        gui.sleep(cap(wait_time))  # Wait for dialog
+        gui.write(filename, interval=0.05)  # Type filename
+        gui.press('enter')  # Save
+        gui.sleep(0.3)  # Brief pause
         
         return f"Saved file as: {filename}"
     except Exception as e:
@@ -122,23 +139,23 @@ def SwitchWindowAndAct(action: Optional[str] = None, x: Optional[int] = None, y:
     
     Args:
         action (str, optional): Action to perform after switching ("click", "space", "enter", or any key)
-        x (int, optional): X coordinate to click (if action is "click")
-        y (int, optional): Y coordinate to click (if action is "click")
+        x (int, optional): X coordinate in the screenshot to click (if action is "click")
+        y (int, optional): Y coordinate in the screenshot to click (if action is "click")
     
     Returns:
         str: Success message
     """
     try:
         # Switch window
-        pyautogui.hotkey('alt', 'tab')
-        time.sleep(0.5)  # Wait for window switch
+        gui.hotkey('alt', 'tab')
+        gui.sleep(0.5)  # Wait for window switch
         
         # Perform optional action
         if action == 'click' and x is not None and y is not None:
-            pyautogui.click(x, y)
+            gui.click(*to_screen(x, y))
             return f"Switched window and clicked at ({x}, {y})"
         elif action and action != 'click':
-            pyautogui.press(action)
+            gui.press(action)
             return f"Switched window and pressed {action}"
         
         return "Switched to next window"
@@ -152,8 +169,8 @@ def CopyPasteText(destination_x: int, destination_y: int, wait_time: float = 0.3
     This is a macro that combines: Ctrl+C → Click location → Ctrl+V
     
     Args:
-        destination_x (int): X coordinate where to paste
-        destination_y (int): Y coordinate where to paste
+        destination_x (int): X coordinate in the screenshot where to paste
+        destination_y (int): Y coordinate in the screenshot where to paste
         wait_time (float, optional): Time to wait between actions (default: 0.3)
     
     Returns:
@@ -161,13 +178,13 @@ def CopyPasteText(destination_x: int, destination_y: int, wait_time: float = 0.3
     """
     try:
         # Copy
-        pyautogui.hotkey('ctrl', 'c')
-        time.sleep(wait_time)
+        gui.hotkey('ctrl', 'c')
+        gui.sleep(cap(wait_time))
         
         # Click destination and paste
-        pyautogui.click(destination_x, destination_y)
-        time.sleep(wait_time)
-        pyautogui.hotkey('ctrl', 'v')
+        gui.click(*to_screen(destination_x, destination_y))
+        gui.sleep(cap(wait_time))
+        gui.hotkey('ctrl', 'v')
         
         return f"Copied and pasted text to ({destination_x}, {destination_y})"
     except Exception as e:
@@ -187,16 +204,16 @@ def OpenFileExplorer(path: Optional[str] = None) -> str:
     """
     try:
         # Open File Explorer
-        pyautogui.hotkey('win', 'e')
-        time.sleep(1)  # Wait for explorer to open
+        gui.hotkey('win', 'e')
+        gui.sleep(1)  # Wait for explorer to open
         
         # Navigate to specific path if provided
         if path:
-            pyautogui.hotkey('ctrl', 'l')  # Focus address bar
-            time.sleep(0.2)
-            pyautogui.write(path, interval=0.05)
-            pyautogui.press('enter')
-            time.sleep(0.5)
+            gui.hotkey('ctrl', 'l')  # Focus address bar
+            gui.sleep(0.2)
+            gui.write(path, interval=0.05)
+            gui.press('enter')
+            gui.sleep(0.5)
             return f"Opened File Explorer and navigated to: {path}"
         
         return "Opened File Explorer"
@@ -204,17 +221,30 @@ def OpenFileExplorer(path: Optional[str] = None) -> str:
         return f"Error opening File Explorer: {e}"
 
 @tool
-def ShowScreen() -> str:
+def ShowScreen() -> Union[ImageObservation, str]:
     """
     Take a screenshot of the current screen and prepare the image.
+    Clickable regions are outlined and numbered; click them with ClickMark.
+    Coordinates passed to the other tools are pixels of this screenshot.
     No parameters required.
     
     Returns: 
-        str: base64 encoded image of the current screenshot
+        ImageObservation: the current screenshot, attached to the conversation as an image
     """ 
     try:
-        screenshot()
-        result = prepare_images(is_direct=True)
+        image = capture_screen()
+        signature = image_signature(image)
+        transform = agent_transform()
+        text = ImageObservation.text
+        if env.screen_marks:
+            from app.utils.setofmarks import marks  # OpenCV loads on the first annotated screenshot
+            image, found = marks.annotate(image, transform)
+            text = (f"Screenshot of the current screen is attached below. {len(found)} clickable regions are "
+                    "outlined with numbered labels; click one with ClickMark(mark_id) rather than estimating coordinates.")
+        else:
+            image = transform.apply(image)
+        text = f"{text} {transform.describe()}"
+        result = ImageObservation(data_url=prepare_images(is_direct=True, image=image), text=text, transform=transform, signature=signature)
         print("Screenshot taken successfully")
         return result
     except Exception as e:
@@ -251,6 +281,8 @@ def run_terminal(command: str, working_directory: str = ".", timeout: int = 60)
         if not Path(working_directory).is_dir():
             return f"Error: Working directory '{working_directory}' does not exist."
 
+        # Never outlive the task's time budget
+        timeout = cap(timeout)
         process = subprocess.run(
             command_parts,
             capture_output=True,
@@ -276,7 +308,7 @@ def run_terminal(command: str, working_directory: str = ".", timeout: int = 60)
             return error_message
 
     except subprocess.TimeoutExpired:
-        return f"Error: Command '{command}' timed out after {timeout} seconds."
+        return f"Error: Command '{command}' timed out after {timeout:g} seconds."
     except FileNotFoundError:
         return f"Error: Command not found. Make sure '{command_parts[0]}' is installed and in your PATH."
     except Exception as e:
@@ -326,21 +358,21 @@ def CursorMove(coordinate_x_cursor_target: int, coordinate_y_cursor_target: int)
     Move the cursor to specified coordinates on the screen.
     
     Args:
-        coordinate_x_cursor_target (int): The x-coordinate to move the cursor to
-        coordinate_y_cursor_target (int): The y-coordinate to move the cursor to
+        coordinate_x_cursor_target (int): The x-coordinate in the screenshot to move the cursor to
+        coordinate_y_cursor_target (int): The y-coordinate in the screenshot to move the cursor to
         
     Returns:
         str: Success message
     """
     try:
-        duration = 0.2
+        duration = pacing.move_duration()
+        x, y = to_screen(coordinate_x_cursor_target, coordinate_y_cursor_target)
         
-        screen_width, screen_height = pyautogui.size()
-        if not (0 <= coordinate_x_cursor_target <= screen_width and 
-                0 <= coordinate_y_cursor_target <= screen_height):
-            raise ValueError(f"Coordinates ({coordinate_x_cursor_target}, {coordinate_y_cursor_target}) are outside screen boundaries ({screen_width}x{screen_height})")
+        if not display.contains(x, y):
+            raise ValueError(f"Coordinates ({coordinate_x_cursor_target}, {coordinate_y_cursor_target}) are outside the screenshot ({display.describe()})")
         
-        pyautogui.moveTo(coordinate_x_cursor_target, coordinate_y_cursor_target, duration=duration)
+        with pacing.action("move"):
+            gui.move_to(x, y, duration=duration)
         return f"Moved cursor to ({coordinate_x_cursor_target}, {coordinate_y_cursor_target})"
     except Exception as e:
         return f"Error moving cursor: {e}"
@@ -351,8 +383,8 @@ def CursorMoveAndClick(coordinate_x_cursor_target: int, coordinate_y_cursor_targ
     Move the cursor to specified coordinates and perform a click.
     
     Args:
-        coordinate_x_cursor_target (int): The x-coordinate to move the cursor to
-        coordinate_y_cursor_target (int): The y-coordinate to move the cursor to
+        coordinate_x_cursor_target (int): The x-coordinate in the screenshot to move the cursor to
+        coordinate_y_cursor_target (int): The y-coordinate in the screenshot to move the cursor to
         num_of_clicks (int, optional): Number of clicks to perform
         secs_between_clicks (float, optional): Delay between clicks in seconds
         button (str, optional): Mouse button to click ('left', 'right', 'middle')
@@ -361,39 +393,100 @@ def CursorMoveAndClick(coordinate_x_cursor_target: int, coordinate_y_cursor_targ
         str: Success message
     """
     try:
-        duration = 0.2
-        
-        screen_width, screen_height = pyautogui.size()
-        if not (0 <= coordinate_x_cursor_target <= screen_width and 
-                0 <= coordinate_y_cursor_target <= screen_height):
-            raise ValueError(f"Coordinates ({coordinate_x_cursor_target}, {coordinate_y_cursor_target}) are outside screen boundaries")
-        
-        pyautogui.click(
-            coordinate_x_cursor_target, 
-            coordinate_y_cursor_target, 
-            clicks=num_of_clicks, 
-            interval=secs_between_clicks, 
-            button=button,
-            duration=duration
-        )
+        duration = pacing.move_duration()
+        x, y = to_screen(coordinate_x_cursor_target, coordinate_y_cursor_target)
+        
+        if not display.contains(x, y):
+            raise ValueError(f"Coordinates ({coordinate_x_cursor_target}, {coordinate_y_cursor_target}) are outside the screenshot")
+        
+        with pacing.action("click"):
+            gui.click(
+                x, 
+                y, 
+                clicks=num_of_clicks, 
+                interval=secs_between_clicks, 
+                button=button,
+                duration=duration
+            )
         return f"Clicked at ({coordinate_x_cursor_target}, {coordinate_y_cursor_target}) with {button} button, {num_of_clicks} times"
     except Exception as e:
         return f"Error clicking: {e}"
 
+@tool
+def ClickMark(mark_id: int, num_of_clicks: int = 1, button: str = 'left') -> str:
+    """
+    Click the center of a numbered region from the latest ShowScreen screenshot.
+    More precise than estimating coordinates; prefer it whenever the target is marked.
+    
+    Args:
+        mark_id (int): Number shown on the region's label
+        num_of_clicks (int, optional): Number of clicks to perform
+        button (str, optional): Mouse button to click ('left', 'right', 'middle')
+    
+    Returns:
+        str: Success message with the clicked position
+    """
+    try:
+        from app.utils.setofmarks import marks
+        mark = marks.get(mark_id)
+        if mark is None:
+            return f"Error: no mark {mark_id} in the latest screenshot ({len(marks)} marks). Call ShowScreen to refresh the marks."
+        
+        x, y = mark.center
+        with pacing.action("click"):
+            gui.click(x, y, clicks=num_of_clicks, interval=0.1, button=button, duration=pacing.move_duration())
+        return f"Clicked mark {mark_id} at ({x}, {y}) with {button} button, {num_of_clicks} times"
+    except Exception as e:
+        return f"Error clicking mark {mark_id}: {e}"
+
+@tool
+def ClickTemplate(name: str, num_of_clicks: int = 1, button: str = 'left') -> str:
+    """
+    Find a saved UI element (icon, button) on screen by its template name and click its center.
+    Much faster than taking a screenshot to find coordinates; calling it with an unknown
+    name lists the saved templates.
+    
+    Args:
+        name (str): Template name (e.g., "start_button", "send_icon")
+        num_of_clicks (int, optional): Number of clicks to perform
+        button (str, optional): Mouse button to click ('left', 'right', 'middle')
+    
+    Returns:
+        str: Success message with the clicked position and match score
+    """
+    try:
+        from app.services.TemplateLocator import template_locator  # OpenCV loads on the first lookup
+        start = time.perf_counter()
+        match = template_locator.search(name)
+        if match is None:
+            known = ", ".join(template_locator.library.names()) or "none saved"
+            return f"Error: no template named '{name}'. Known templates: {known}"
+        threshold = template_locator.library.get(name).threshold
+        if match.score < threshold:
+            return f"Error: '{name}' is not on screen (best match {match.score:.2f} < {threshold:.2f}). Use ShowScreen to locate it."
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        x, y = match.center
+        with pacing.action("click"):
+            gui.click(x, y, clicks=num_of_clicks, interval=0.1, button=button, duration=pacing.move_duration())
+        return f"Clicked '{name}' at ({x}, {y}) with {button} button, {num_of_clicks} times (match {match.score:.2f}, found in {elapsed:.0f} ms)"
+    except Exception as e:
+        return f"Error clicking template '{name}': {e}"
+
 @tool
 def CursorDoubleClick(coordinate_x_cursor_target: int, coordinate_y_cursor_target: int) -> str:
     """
     Double-click at specified coordinates.
     
     Args:
-        coordinate_x_cursor_target (int): The x-coordinate to double-click
-        coordinate_y_cursor_target (int): The y-coordinate to double-click
+        coordinate_x_cursor_target (int): The x-coordinate in the screenshot to double-click
+        coordinate_y_cursor_target (int): The y-coordinate in the screenshot to double-click
     
     Returns:
         str: Success message
     """
     try:
-        duration = 0.2
+        duration = pacing.move_duration()
         
         return CursorMoveAndClick(
             coordinate_x_cursor_target=coordinate_x_cursor_target,
@@ -410,14 +503,14 @@ def CursorRightClick(coordinate_x_cursor_target: int, coordinate_y_cursor_target
     Right-click at specified coordinates to open context menu.
     
     Args:
-        coordinate_x_cursor_target (int): The x-coordinate to right-click
-        coordinate_y_cursor_target (int): The y-coordinate to right-click
+        coordinate_x_cursor_target (int): The x-coordinate in the screenshot to right-click
+        coordinate_y_cursor_target (int): The y-coordinate in the screenshot to right-click
     
     Returns:
         str: Success message
     """
     try:
-        duration = 0.2
+        duration = pacing.move_duration()
         
         return CursorMoveAndClick(
             coordinate_x_cursor_target=coordinate_x_cursor_target,
@@ -433,8 +526,8 @@ def CursorDrag(coordinate_x_cursor_target: int, coordinate_y_cursor_target: int,
     Drag the cursor from current position to specified coordinates.
     
     Args:
-        coordinate_x_cursor_target (int): The x-coordinate to drag to
-        coordinate_y_cursor_target (int): The y-coordinate to drag to
+        coordinate_x_cursor_target (int): The x-coordinate in the screenshot to drag to
+        coordinate_y_cursor_target (int): The y-coordinate in the screenshot to drag to
         num_seconds (float, optional): Duration of drag movement in seconds
         button (str, optional): Mouse button to drag with
     
@@ -442,14 +535,13 @@ def CursorDrag(coordinate_x_cursor_target: int, coordinate_y_cursor_target: int,
         str: Success message
     """
     try:
-        screen_width, screen_height = pyautogui.size()
-        if not (0 <= coordinate_x_cursor_target <= screen_width and 
-                0 <= coordinate_y_cursor_target <= screen_height):
-            raise ValueError("Coordinates are outside screen boundaries")
-        
-        pyautogui.dragTo(
-            coordinate_x_cursor_target, 
-            coordinate_y_cursor_target, 
+        x, y = to_screen(coordinate_x_cursor_target, coordinate_y_cursor_target)
+        if not display.contains(x, y):
+            raise ValueError("Coordinates are outside the screenshot")
+        
+        gui.drag_to(
+            x, 
+            y, 
             duration=num_seconds,
             button=button
         )
@@ -458,24 +550,29 @@ def CursorDrag(coordinate_x_cursor_target: int, coordinate_y_cursor_target: int,
         return f"Error dragging cursor: {e}"
 
 @tool
-def KeyboardWriteText(text: str) -> str:
+def KeyboardWriteText(text: str, strategy: str = "auto") -> str:
     """
     Type text using the keyboard with configurable speed.
+    Long or non-ASCII text is pasted through the clipboard (the previous clipboard
+    contents are restored); short text is typed key by key.
     
     Args:
         text (str): Text to type
+        strategy (str, optional): "auto" (default), "type" to force key-by-key typing
+            (e.g. for fields that block paste), or "paste" to force pasting
     
     Returns:
         str: Success message
     """
     try:
-        interval = 0.05
+        interval = pacing.type_interval()
         
         if not text:
             raise ValueError("Text string cannot be empty")
         
-        pyautogui.write(text, interval=interval)
-        return f"Typed: '{text[:50]}{'...' if len(text) > 50 else ''}'"
+        with pacing.action("type"):
+            used = enter_text(text, strategy=strategy, interval=interval)
+        return f"{'Pasted' if used == 'paste' else 'Typed'}: '{text[:50]}{'...' if len(text) > 50 else ''}'"
     except Exception as e:
         return f"Error typing text: {e}"
 
@@ -492,12 +589,13 @@ def KeyboardPressKey(key: str, presses: int = 1) -> str:
         str: Success message
     """
     try:
-        interval = 0.05
+        interval = pacing.type_interval()
         
         if not key:
             raise ValueError("Key cannot be empty")
         
-        pyautogui.press(key, presses=presses, interval=interval)
+        with pacing.action("press"):
+            gui.press(key, presses=presses, interval=interval)
         return f"Pressed '{key}' {presses} time(s)"
     except Exception as e:
         return f"Error pressing key '{key}': {e}"
@@ -527,7 +625,8 @@ def KeyboardHotkey(hotkey_keys: str) -> str:
         # Split the hotkey string and execute
         keys = [key.strip() for key in hotkey_keys.split('+')]
         
-        pyautogui.hotkey(*keys)
+        with pacing.action("hotkey"):
+            gui.hotkey(*keys)
         return f"Executed hotkey: {hotkey_keys}"
     except Exception as e:
         return f"Error executing hotkey {hotkey_keys}: {e}"
@@ -540,28 +639,25 @@ def ScrollScreen(direction: str = 'down', clicks: int = 3, x: Optional[int] = No
     Args:
         direction (str, optional): Direction to scroll ('up', 'down')
         clicks (int, optional): Number of scroll clicks
-        x (int, optional): X coordinate to scroll at (default: screen center)
-        y (int, optional): Y coordinate to scroll at (default: screen center)
+        x (int, optional): X coordinate in the screenshot to scroll at (default: screen center)
+        y (int, optional): Y coordinate in the screenshot to scroll at (default: screen center)
     
     Returns:
         str: Success message
     """
     try:
-        scroll_x, scroll_y = x, y
-        if scroll_x is None or scroll_y is None:
-            screen_width, screen_height = pyautogui.size()
-            scroll_x = screen_width // 2
-            scroll_y = screen_height // 2
-        
-        if direction.lower() == "up":
-            pyautogui.scroll(clicks, x=scroll_x, y=scroll_y)
-        elif direction.lower() == "down":
-            pyautogui.scroll(-clicks, x=scroll_x, y=scroll_y)
+        if x is None or y is None:
+            scroll_x, scroll_y = display.center()
         else:
+            scroll_x, scroll_y = to_screen(x, y)
+        
+        if direction.lower() not in ("up", "down"):
             raise ValueError("Direction must be 'up' or 'down'")
+        with pacing.action("scroll"):
+            gui.scroll(clicks if direction.lower() == "up" else -clicks, x=scroll_x, y=scroll_y)
         
-        time.sleep(0.3)
-        return f"Scrolled {direction} {clicks} clicks at ({scroll_x}, {scroll_y})"
+        gui.sleep(0.3)
+        return f"Scrolled {direction} {clicks} clicks at " + (f"({x}, {y})" if x is not None and y is not None else "the screen center")
     except Exception as e:
         return f"Error scrolling: {e}"
 
@@ -578,30 +674,40 @@ def WaitAndObserve(seconds: int = 2) -> str:
         str: Success message
     """
     try:
-        time.sleep(seconds)
+        waited = cap(seconds)
+        gui.sleep(waited)
+        if waited < seconds:
+            return f"Waited for {waited:.1f} of {seconds} seconds (time budget nearly used up)"
         return f"Waited for {seconds} seconds"
     except Exception as e:
         return f"Error during wait: {e}"
 
-# Enhanced tool list with all capabilities
-ToolBox = [
-    ShowScreen,
-    OpenApplication,
-    OpenBrowserAndNavigate,
-    SaveFile,
-    SwitchWindowAndAct,
-    CopyPasteText,
-    OpenFileExplorer,
-    CursorMove,
-    CursorMoveAndClick,
-    CursorDoubleClick,
-    CursorRightClick,
-    CursorDrag,
-    KeyboardWriteText,
-    KeyboardPressKey,
-    KeyboardHotkey,
-    ScrollScreen,
-    WaitAndObserve,
-    generate_directory_tree,
-    run_terminal,
-]
+@tool
+def KeyboardSequence(events: List[Dict[str, Any]]) -> str:
+    """
+    Type text and press keys as one batch, pausing once at the end instead of after every event.
+    Not offered to the model: the action optimizer builds it from adjacent
+    KeyboardWriteText / KeyboardPressKey calls.
+
+    Args:
+        events (List[Dict[str, Any]]): Events in order, either {"text": "...", "strategy": "auto"} or {"key": "enter", "presses": 1}
+
+    Returns:
+        str: Success message
+    """
+    try:
+        interval = pacing.type_interval()
+        done = []
+        with pacing.action("keyboard_sequence"):
+            for event in events:
+                if "text" in event:
+                    used = enter_text(event["text"], strategy=event.get("strategy", "auto"), interval=interval, pause=False)
+                    done.append(f"{'pasted' if used == 'paste' else 'typed'} '{event['text'][:50]}{'...' if len(event['text']) > 50 else ''}'")
+                else:
+                    presses = event.get("presses", 1)
+                    gui.press(event["key"], presses=presses, interval=interval, pause=False)
+                    done.append(f"pressed '{event['key']}' {presses} time(s)")
+            gui.sleep(gui.get_pause())
+        return "Keyboard sequence: " + ", ".join(done)
+    except Exception as e:
+        return f"Error running keyboard sequence: {e}"
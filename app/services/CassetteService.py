@@ -0,0 +1,134 @@
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+import json
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when no recording matches a request."""
+
+def _normalize(value, match_images: bool):
+    # Drop fields that change between otherwise identical runs (message and tool call ids)
+    if isinstance(value, dict):
+        if not match_images and value.get("type") == "image_url":
+            return {"type": "image_url"}
+        return {
+            k: _normalize(v, match_images)
+            for k, v in value.items()
+            if k not in ("id", "tool_call_id", "response_metadata", "usage_metadata")
+        }
+    if isinstance(value, list):
+        return [_normalize(v, match_images) for v in value]
+    return value
+
+def fingerprint(model: str, messages: Sequence[BaseMessage], params: dict, match_images: bool = False) -> str:
+    """
+    Stable fingerprint of a chat request.
+
+    Args:
+        model (str): Model name
+        messages (Sequence[BaseMessage]): Request messages
+        params (dict): Invocation params (tools, tool_choice, ...)
+        match_images (bool): Whether image bytes are part of the fingerprint.
+            Off by default so a replay still matches when screenshots differ.
+
+    Returns:
+        str: sha256 hex digest
+    """
+    payload = {
+        "model": model,
+        "messages": _normalize(messages_to_dict(list(messages)), match_images),
+        "params": _normalize(params, match_images),
+    }
+    return sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Record/replay wrapper around a chat model.
+
+    In record mode every request is forwarded to the wrapped model and the response
+    (including tool calls, which also carry structured outputs) is stored on disk under
+    the request fingerprint. In replay mode responses are served from disk with a
+    configurable synthetic latency, so chains run offline and deterministically.
+    """
+    inner: Any = None
+    model: str
+    mode: str = "replay"
+    cassette_dir: str = "cassettes"
+    latency: float = 0.0
+    match_images: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[str] = None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        # The request timeout depends on the time left, not on the request
+        params = {"stop": stop, **{k: v for k, v in kwargs.items() if k != "timeout"}}
+        key = fingerprint(self.model, messages, params, self.match_images)
+        path = Path(self.cassette_dir) / self.model / f"{key}.json"
+
+        if self.mode == "replay":
+            if not path.exists():
+                raise CassetteMiss(f"No recording for {self.model} request {key[:12]} in {path.parent}")
+            with open(path, "r", encoding="utf-8") as f:
+                recording = json.load(f)
+            if self.latency:
+                time.sleep(self.latency)
+            message = messages_from_dict([recording["response"]])[0]
+        else:
+            start = time.time()
+            message = self.inner.invoke(messages, stop=stop, **kwargs)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "model": self.model,
+                    "fingerprint": key,
+                    "latency": time.time() - start,
+                    "request": _normalize(messages_to_dict(list(messages)), self.match_images),
+                    "response": messages_to_dict([message])[0],
+                }, f, indent=2, ensure_ascii=False, default=str)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+def wrap(llm, model: str, mode: str, cassette_dir: str, latency: float = 0.0):
+    """Wraps a chat model for recording or replay; mode "off" returns it untouched."""
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"Unknown cassette mode '{mode}', expected one of {CASSETTE_MODES}")
+    if mode == "off":
+        return llm
+    return CassetteChatModel(inner=llm, model=model, mode=mode, cassette_dir=cassette_dir, latency=latency)
+
+if __name__ == "__main__":
+    # Offline benchmark of the main chains against recorded responses:
+    #   1. CASSETTE_MODE=record python -m app.services.CassetteService   (needs network, once)
+    #   2. CASSETTE_MODE=replay CASSETTE_LATENCY=0.8 python -m app.services.CassetteService
+    import statistics
+    import sys
+    from app.controllers.maincontroller import controller
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cases = {
+        "QuestionChain": lambda: controller.question_chain("What is shown on the screen?"),
+        "BoardChain": lambda: controller.board_chain("Explain the highlighted area"),
+        "EnhancedInstructionChain": lambda: controller.instruction_chain("open calculator and type 3+3"),
+    }
+    for name, case in cases.items():
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            case()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:26s} mean {statistics.mean(timings):.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s")
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from hashlib import sha256
+from threading import Lock
+from typing import Optional, Sequence
+import json
+import time
+
+from app.utils.tokenbudget import estimate_text_tokens
+from app.utils.toolschemas import tool_schemas, toolset_key
+
+DEFAULT_TTL_SECONDS = 3600
+
+def _model_name(llm) -> str:
+    return getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+
+@dataclass
+class CachedPrefix:
+    """A static prompt prefix (system prompt + tool schemas) registered in the cache."""
+    name: str
+    key: str
+    tokens: int
+    cache_name: str
+    remote: bool
+    expires_at: float
+
+class LocalCacheBackend:
+    """
+    In-memory stand-in for provider-side caches.
+    Used for tests and for models without explicit caching: prefixes are still
+    registered and counted, but the full prompt keeps being sent.
+    """
+    remote = False
+
+    def supports(self, llm) -> bool:
+        return True
+
+    def create(self, llm, key: str, name: str, system: str, tools: Optional[Sequence], ttl: int) -> str:
+        return f"local/{name}/{key[:16]}"
+
+class GeminiCacheBackend:
+    """Explicit Gemini context caching through the model's google-genai client."""
+    remote = True
+
+    def supports(self, llm) -> bool:
+        return type(llm).__name__ == "ChatGoogleGenerativeAI"
+
+    def create(self, llm, key: str, name: str, system: str, tools: Optional[Sequence], ttl: int) -> str:
+        from google.genai.types import CreateCachedContentConfig
+        from langchain_google_genai._function_utils import convert_to_genai_function_declarations
+
+        config = CreateCachedContentConfig(
+            display_name=f"airis-{name}",
+            system_instruction=system,
+            tools=convert_to_genai_function_declarations(list(tools)) if tools else None,
+            ttl=f"{ttl}s",
+        )
+        return llm.client.caches.create(model=llm.model, config=config).name
+
+class ContextCache:
+    """
+    Registers large static prompt prefixes once and hands chains a model bound to the
+    cached prefix, so only the dynamic part of the prompt is sent on every call.
+    """
+
+    def __init__(self, backends: Optional[list] = None, ttl: int = DEFAULT_TTL_SECONDS):
+        self.backends = backends if backends is not None else [GeminiCacheBackend(), LocalCacheBackend()]
+        self.ttl = ttl
+        self._prefixes = {}
+        self._lock = Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.tokens_saved = 0
+        self.provider_cached_tokens = 0
+
+    def prefix(self, name: str, system: str, tools: Optional[Sequence] = None, llm=None) -> CachedPrefix:
+        """
+        Look up (or register) a static prefix.
+
+        Args:
+            name (str): Human readable name of the prefix (e.g. "board", "agent")
+            system (str): Fully formatted system prompt
+            tools (Sequence, optional): Tools whose schemas are part of the prefix
+            llm: Chat model the prefix will be used with
+
+        Returns:
+            CachedPrefix: The registered prefix
+        """
+        key = self._key(system, tools, llm)
+        with self._lock:
+            self.lookups += 1
+            cached = self._fresh(key)
+            if cached:
+                self.hits += 1
+                # Only a provider-side cache keeps the prefix from being sent again
+                if cached.remote:
+                    self.tokens_saved += cached.tokens
+                return cached
+
+        # Creating a provider cache is a network call; other prefixes stay available meanwhile
+        tokens = estimate_text_tokens(system) + estimate_text_tokens(self._tool_text(tools))
+        for backend in self.backends:
+            if not backend.supports(llm):
+                continue
+            try:
+                cache_name = backend.create(llm, key, name, system, tools, self.ttl)
+            except Exception as e:
+                print(f"Context cache: {type(backend).__name__} could not cache '{name}': {e}")
+                continue
+            cached = CachedPrefix(
+                name=name,
+                key=key,
+                tokens=tokens,
+                cache_name=cache_name,
+                remote=backend.remote,
+                # Refresh a minute early so a request never races the provider TTL
+                expires_at=time.time() + self.ttl - 60,
+            )
+            with self._lock:
+                # A concurrent caller may have registered the same prefix meanwhile; keep the first
+                existing = self._fresh(key)
+                if existing:
+                    return existing
+                self._prefixes[key] = cached
+                return cached
+        raise RuntimeError(f"No context cache backend available for '{name}'")
+
+    def _fresh(self, key: str) -> Optional[CachedPrefix]:
+        # Called with self._lock held
+        cached = self._prefixes.get(key)
+        return cached if cached and cached.expires_at > time.time() else None
+
+    @staticmethod
+    def bind(llm, prefix: CachedPrefix):
+        """Returns the model bound to the provider cache when the prefix lives remotely."""
+        if prefix.remote:
+            return llm.bind(cached_content=prefix.cache_name)
+        return llm
+
+    def record_usage(self, message) -> None:
+        """Adds the cache-read tokens reported by the provider for a model response."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        cache_read = (usage.get("input_token_details") or {}).get("cache_read") or 0
+        with self._lock:
+            self.provider_cached_tokens += cache_read
+
+    def stats(self) -> dict:
+        return {
+            "prefixes": len(self._prefixes),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_ratio": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "provider_cached_tokens": self.provider_cached_tokens,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._prefixes.clear()
+
+    def _key(self, system: str, tools: Optional[Sequence], llm) -> str:
+        # Tool names are enough to tell tool sets apart; schemas only change with the code
+        payload = json.dumps([_model_name(llm), system, list(toolset_key(tools or ()))])
+        return sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _tool_text(tools: Optional[Sequence]) -> str:
+        if not tools:
+            return ""
+        return json.dumps(tool_schemas(tools), sort_keys=True)
+
+context_cache = ContextCache()
+
+if __name__ == "__main__":
+    local_cache = ContextCache(backends=[LocalCacheBackend()])
+    for _ in range(5):
+        local_cache.prefix("demo", "You are a helpful assistant. " * 200)
+    print(local_cache.stats())
@@ -0,0 +1,148 @@
+from collections import namedtuple
+from threading import Lock, Thread
+from typing import List, Optional, Tuple
+import sys
+import time
+
+from app.services.GuiBackend import Monitor, gui
+
+# Same shape and repr as pyautogui.size(), which prompts have always embedded
+Size = namedtuple("Size", "width height")
+
+# Layout refresh interval when display changes are reported by the OS, and when they are not
+TTL_WITH_EVENTS = 300.0
+TTL_WITHOUT_EVENTS = 2.0
+
+class DisplayGeometry:
+    """
+    Cached monitor layout (bounds, work areas, DPI scale) shared by the cursor tools.
+
+    The layout is read once from the GUI backend and reused until it is invalidated: on
+    Windows a hidden window listens for display, DPI and work-area changes; elsewhere,
+    and as a safety net, the cache also expires after a TTL.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._monitors = None
+        self._backend = None
+        self._read_at = 0.0
+        self._listener = None
+        self.listening = False
+        self.refreshes = 0
+        self.lookups = 0
+
+    def monitors(self) -> List[Monitor]:
+        """All monitors, the primary one first."""
+        with self._lock:
+            self.lookups += 1
+            ttl = TTL_WITH_EVENTS if self.listening else TTL_WITHOUT_EVENTS
+            backend = gui.backend
+            if self._monitors is None or backend is not self._backend or time.monotonic() - self._read_at > ttl:
+                self._monitors = sorted(backend.monitors(), key=lambda m: not m.primary)
+                self._backend = backend
+                self._read_at = time.monotonic()
+                self.refreshes += 1
+                if self._listener is None and backend.real and sys.platform == "win32":
+                    self._listener = Thread(target=self._listen, daemon=True, name="airis-display")
+                    self._listener.start()
+            return self._monitors
+
+    def primary(self) -> Monitor:
+        return self.monitors()[0]
+
+    def size(self) -> Size:
+        """Size of the primary monitor, like pyautogui.size()."""
+        primary = self.primary()
+        return Size(primary.width, primary.height)
+
+    def center(self) -> Tuple[int, int]:
+        """Center of the primary monitor."""
+        primary = self.primary()
+        return primary.x + primary.width // 2, primary.y + primary.height // 2
+
+    def monitor_at(self, x: int, y: int) -> Optional[Monitor]:
+        return next((m for m in self.monitors() if m.contains(x, y)), None)
+
+    def contains(self, x: int, y: int) -> bool:
+        """True when the point lies on any monitor."""
+        return self.monitor_at(x, y) is not None
+
+    def describe(self) -> str:
+        """Human readable layout, for error messages."""
+        return ", ".join(f"{m.width}x{m.height} at ({m.x}, {m.y})" for m in self.monitors())
+
+    def invalidate(self):
+        with self._lock:
+            self._monitors = None
+
+    def stats(self) -> dict:
+        return {"lookups": self.lookups, "refreshes": self.refreshes, "listening": self.listening}
+
+    def _listen(self):
+        try:
+            _listen_for_display_changes(self)
+        except Exception as e:
+            print(f"Display geometry: change events unavailable, using a {TTL_WITHOUT_EVENTS}s TTL ({e})")
+        self.listening = False
+
+def _listen_for_display_changes(display: DisplayGeometry):
+    """Runs a hidden top-level window whose only job is to invalidate the cache on layout changes."""
+    import ctypes
+    from ctypes import wintypes
+
+    WM_DISPLAYCHANGE = 0x007E
+    WM_SETTINGCHANGE = 0x001A
+    WM_DPICHANGED = 0x02E0
+    LRESULT = ctypes.c_ssize_t
+    WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+    class WNDCLASSW(ctypes.Structure):
+        _fields_ = [
+            ("style", wintypes.UINT),
+            ("lpfnWndProc", WNDPROC),
+            ("cbClsExtra", ctypes.c_int),
+            ("cbWndExtra", ctypes.c_int),
+            ("hInstance", wintypes.HINSTANCE),
+            ("hIcon", wintypes.HICON),
+            ("hCursor", wintypes.HANDLE),
+            ("hbrBackground", wintypes.HBRUSH),
+            ("lpszMenuName", wintypes.LPCWSTR),
+            ("lpszClassName", wintypes.LPCWSTR),
+        ]
+
+    # Private DLL handle, so setting prototypes does not affect other ctypes users (pyautogui)
+    user32 = ctypes.WinDLL("user32")
+    user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+    user32.DefWindowProcW.restype = LRESULT
+    user32.CreateWindowExW.argtypes = [
+        wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+        ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+        wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+    ]
+    user32.CreateWindowExW.restype = wintypes.HWND
+    user32.GetMessageW.argtypes = [ctypes.POINTER(wintypes.MSG), wintypes.HWND, wintypes.UINT, wintypes.UINT]
+
+    def window_proc(hwnd, message, wparam, lparam):
+        if message in (WM_DISPLAYCHANGE, WM_SETTINGCHANGE, WM_DPICHANGED):
+            display.invalidate()
+        return user32.DefWindowProcW(hwnd, message, wparam, lparam)
+
+    proc = WNDPROC(window_proc)
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+    instance = kernel32.GetModuleHandleW(None)
+    window_class = WNDCLASSW(lpfnWndProc=proc, hInstance=instance, lpszClassName="AirisDisplayListener")
+    if not user32.RegisterClassW(ctypes.byref(window_class)):
+        raise OSError("RegisterClassW failed")
+    # A hidden top-level window: message-only windows do not receive broadcasts
+    if not user32.CreateWindowExW(0, "AirisDisplayListener", "", 0, 0, 0, 0, 0, None, None, instance, None):
+        raise OSError("CreateWindowExW failed")
+
+    display.listening = True
+    message = wintypes.MSG()
+    while user32.GetMessageW(ctypes.byref(message), None, 0, 0) > 0:
+        user32.TranslateMessage(ctypes.byref(message))
+        user32.DispatchMessageW(ctypes.byref(message))
+
+display = DisplayGeometry()
@@ -1,11 +1,280 @@
 from config.setting import env
-from langchain_google_genai import ChatGoogleGenerativeAI
+from importlib import import_module
+from threading import Lock
+import time
+
+# provider name -> (module, chat model class). Modules are only imported the first
+# time a provider is requested, so startup does not pay for every SDK in requirements.txt
+PROVIDERS = {
+    "gemini": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "vertexai": ("langchain_google_vertexai", "ChatVertexAI"),
+    "bedrock": ("langchain_aws", "ChatBedrockConverse"),
+    "azure_openai": ("langchain_openai", "AzureChatOpenAI"),
+}
+
+# Keep-alive settings shared by every pooled HTTP client
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_KEEPALIVE = 10
+POOL_KEEPALIVE_EXPIRY = 120.0
+# Default HTTP timeouts (seconds) of pooled clients; agent calls pass a shorter per-request one
+REQUEST_TIMEOUT = 120.0
+CONNECT_TIMEOUT = 10.0
 
 class GenAiService:
+    """
+    Registry of chat model providers.
+
+    Provider SDKs are imported lazily and the underlying HTTP clients are pooled,
+    so every chain asking for the same model reuses one instance and one set of
+    keep-alive connections.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._classes = {}
+        self._instances = {}
+        self._transport = None
+        self._http_client = None
+        self._bedrock_clients = {}
+
+    def provider(self, name: str):
+        """
+        Import (once) and return the chat model class of a provider.
+
+        Args:
+            name (str): Provider name, one of PROVIDERS
+
+        Returns:
+            type: The chat model class
+        """
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown provider '{name}', expected one of {list(PROVIDERS)}")
+        with self._lock:
+            if name not in self._classes:
+                module_name, class_name = PROVIDERS[name]
+                self._classes[name] = getattr(import_module(module_name), class_name)
+            return self._classes[name]
+
+    def get(self, name: str, **kwargs):
+        """
+        Return a shared chat model instance, building it on first use.
+
+        Args:
+            name (str): Provider name, one of PROVIDERS
+            **kwargs: Constructor arguments of the provider chat model
+
+        Returns:
+            BaseChatModel: The cached chat model; the same object for every caller
+                asking with the same arguments (models keep no per-call state)
+        """
+        key = (name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        llm = self._instances.get(key)
+        if llm is None:
+            if env.cassette_mode == "replay":
+                # Replays are served from disk, the provider SDK is never needed
+                from app.services.CassetteService import CassetteChatModel
+                llm = CassetteChatModel(
+                    model=kwargs.get("model", name),
+                    cassette_dir=env.cassette_dir,
+                    latency=env.cassette_latency,
+                )
+                with self._lock:
+                    return self._instances.setdefault(key, llm)
+            model_class = self.provider(name)
+            with self._lock:
+                llm = self._instances.get(key)
+                if llm is None:
+                    llm = getattr(self, f"_build_{name}")(model_class, **kwargs)
+                    if env.cassette_mode != "off":
+                        from app.services.CassetteService import wrap
+                        llm = wrap(llm, kwargs.get("model", name), env.cassette_mode, env.cassette_dir)
+                    self._instances[key] = llm
+        return llm
+
+    def loaded_providers(self) -> list:
+        """Names of the providers whose SDK has been imported so far."""
+        return list(self._classes)
+
+    def close(self):
+        """Closes the pooled connections and drops every cached model."""
+        with self._lock:
+            if self._transport is not None:
+                self._transport.shutdown()
+            self._transport = None
+            self._http_client = None
+            self._bedrock_clients.clear()
+            self._instances.clear()
+
+    def gemini(self, model: str = env.gemini_model, **kwargs):
+        return self.get("gemini", model=model, **kwargs)
+
+    def vertexai(self, model: str = env.gemini_pro_model, **kwargs):
+        return self.get("vertexai", model=model, **kwargs)
+
+    def claude(self, model: str = env.claude_sonnet_model, **kwargs):
+        return self.get("bedrock", model=model, **kwargs)
+
+    def pixtral(self, model: str = env.mistral_pixtral_model, **kwargs):
+        return self.get("bedrock", model=model, **kwargs)
+
+    def mini4o(self, model: str = env.gpt_4o_mini, **kwargs):
+        return self.get("azure_openai", model=model, **kwargs)
+
+    def _shared_transport(self):
+        # Called with self._lock held
+        if self._transport is None:
+            import asyncio
+            import weakref
+            import httpx
+
+            class SharedTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+                """
+                Keep-alive pools shared by several clients, sync and async (the Gemini model
+                hands the same client_args to both); closing one client leaves them open.
+                """
+
+                def __init__(self, limits: httpx.Limits):
+                    self.limits = limits
+                    self.sync = httpx.HTTPTransport(limits=limits)
+                    # Async connections belong to the event loop that opened them: one pool per loop
+                    self.async_pools = weakref.WeakKeyDictionary()
+
+                def async_pool(self) -> httpx.AsyncBaseTransport:
+                    loop = asyncio.get_running_loop()
+                    pool = self.async_pools.get(loop)
+                    if pool is None:
+                        pool = self.async_pools[loop] = httpx.AsyncHTTPTransport(limits=self.limits)
+                    return pool
+
+                def handle_request(self, request):
+                    return self.sync.handle_request(request)
+
+                async def handle_async_request(self, request):
+                    return await self.async_pool().handle_async_request(request)
+
+                def close(self):
+                    pass
+
+                async def aclose(self):
+                    pass
+
+                def shutdown(self):
+                    self.sync.close()
+                    self.async_pools.clear()
+
+            self._transport = SharedTransport(
+                httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._transport
+
+    @staticmethod
+    def _default_timeout():
+        import httpx
+        return httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+    def _shared_http_client(self):
+        # Called with self._lock held
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.Client(transport=self._shared_transport(), timeout=self._default_timeout())
+        return self._http_client
+
+    def _build_gemini(self, model_class, **kwargs):
+        kwargs.setdefault("google_api_key", env.google_api_key)
+        # The model builds its own SDK client (user agent, base_url, api_version and
+        # headers intact) over the shared keep-alive pool; explicit client_args win
+        kwargs.setdefault("client_args", {"transport": self._shared_transport(), "timeout": self._default_timeout()})
+        return model_class(**kwargs)
+
+    def _build_vertexai(self, model_class, **kwargs):
+        from config.credentials import google_credential
+
+        kwargs.setdefault("project", env.project_name)
+        kwargs.setdefault("location", env.location_name)
+        kwargs.setdefault("credentials", google_credential())
+        return model_class(**kwargs)
+
+    def _build_bedrock(self, model_class, **kwargs):
+        region = kwargs.pop("region_name", env.claude_region)
+        if region not in self._bedrock_clients:
+            import boto3
+            from botocore.config import Config
+
+            self._bedrock_clients[region] = boto3.client(
+                "bedrock-runtime",
+                region_name=region,
+                aws_access_key_id=env.aws_access_key_id,
+                aws_secret_access_key=env.aws_secret_access_key,
+                config=Config(max_pool_connections=POOL_MAX_CONNECTIONS, tcp_keepalive=True),
+            )
+        return model_class(client=self._bedrock_clients[region], region_name=region, **kwargs)
+
+    def _build_azure_openai(self, model_class, **kwargs):
+        kwargs.setdefault("api_key", env.azure_api_key_gpt4o_mini)
+        kwargs.setdefault("azure_endpoint", env.azure_endpoint_gpt4o_mini)
+        kwargs.setdefault("api_version", env.azure_api_version)
+        return model_class(
+            azure_deployment=kwargs.pop("model"),
+            http_client=self._shared_http_client(),
+            **kwargs,
+        )
 
-    def gemini(self, model: str = env.gemini_model):
-        import os
-        os.environ["GOOGLE_API_KEY"] = env.google_api_key
-        return ChatGoogleGenerativeAI(model=model)
-    
 gen_ai = GenAiService()
+
+if __name__ == "__main__":
+    # Cold-start comparison: lazy registry vs importing every provider SDK up front,
+    # then the cost of the first and of a repeated model request
+    #   python -m app.services.GenAIService
+    # Check that Gemini models answer sync and async calls over the shared pool (no network):
+    #   python -m app.services.GenAIService check
+    import subprocess
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        import asyncio
+        import httpx
+
+        env.cassette_mode = "off"
+        requests = []
+
+        def answer(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "pong"}]}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 1, "totalTokenCount": 2},
+            })
+
+        llm = gen_ai.gemini(model="gemini-2.5-flash", google_api_key="check", max_retries=0)
+        mock = httpx.MockTransport(answer)
+        gen_ai._transport.sync = mock
+        gen_ai._transport.async_pool = lambda: mock
+
+        assert llm.invoke("ping").content == "pong"
+        assert asyncio.run(llm.ainvoke("ping")).content == "pong"
+        assert asyncio.run(llm.ainvoke("ping")).content == "pong"
+        assert len(requests) == 3
+        assert all(r.headers["user-agent"].startswith("google-genai-sdk") for r in requests)
+        gen_ai.close()
+        print("GenAIService: sync and async Gemini calls share the pool")
+        sys.exit(0)
+
+    def timed_import(statement: str) -> float:
+        code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        return float(out.stdout.strip() or "nan")
+
+    eager = "; ".join(f"import {module}" for module, _ in PROVIDERS.values())
+    print(f"import all provider SDKs : {timed_import(eager):.3f}s")
+    print(f"import lazy registry     : {timed_import('from app.services.GenAIService import gen_ai'):.3f}s")
+
+    start = time.perf_counter()
+    gen_ai.gemini()
+    print(f"first gemini() request   : {time.perf_counter() - start:.3f}s (imports langchain_google_genai)")
+    start = time.perf_counter()
+    gen_ai.gemini()
+    print(f"repeated gemini() request: {time.perf_counter() - start:.6f}s (pooled instance)")
+    print(f"loaded providers         : {gen_ai.loaded_providers()}")
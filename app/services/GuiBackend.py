@@ -0,0 +1,269 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Set
+import sys
+import time
+
+from PIL import Image
+
+from config.setting import env
+
+@dataclass(frozen=True)
+class Monitor:
+    """One display in virtual-screen pixel coordinates."""
+    x: int
+    y: int
+    width: int
+    height: int
+    work_x: int
+    work_y: int
+    work_width: int
+    work_height: int
+    scale: float = 1.0
+    primary: bool = False
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
+
+class GuiBackend(ABC):
+    """
+    Input/output primitives the desktop tools are built on.
+
+    Every method mirrors the pyautogui call it replaces; `pause=False` skips the pause
+    normally applied after a call, for callers that batch several events. Time goes
+    through sleep()/monotonic() too, so a simulated backend can run on a virtual clock.
+    """
+    # True for backends driving the real desktop
+    real = False
+
+    @abstractmethod
+    def set_pause(self, seconds: float):
+        ...
+
+    @abstractmethod
+    def get_pause(self) -> float:
+        ...
+
+    @abstractmethod
+    def monitors(self) -> List[Monitor]:
+        ...
+
+    @abstractmethod
+    def move_to(self, x: int, y: int, duration: float = 0.0):
+        ...
+
+    @abstractmethod
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left", duration: float = 0.0):
+        ...
+
+    @abstractmethod
+    def drag_to(self, x: int, y: int, duration: float = 0.0, button: str = "left"):
+        ...
+
+    @abstractmethod
+    def scroll(self, clicks: int, x: int, y: int):
+        ...
+
+    @abstractmethod
+    def write(self, text: str, interval: float = 0.0, pause: bool = True):
+        ...
+
+    @abstractmethod
+    def press(self, key: str, presses: int = 1, interval: float = 0.0, pause: bool = True):
+        ...
+
+    @abstractmethod
+    def hotkey(self, *keys: str, pause: bool = True):
+        ...
+
+    @abstractmethod
+    def screenshot(self) -> Image.Image:
+        ...
+
+    @abstractmethod
+    def window_titles(self) -> Optional[Set[str]]:
+        ...
+
+    @abstractmethod
+    def active_window_title(self) -> str:
+        ...
+
+    @abstractmethod
+    def clipboard_get(self) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def clipboard_set(self, text: str):
+        ...
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+class PyAutoGuiBackend(GuiBackend):
+    """The real desktop: pyautogui for input, PIL for screenshots, pygetwindow and pyperclip."""
+    real = True
+
+    def __init__(self):
+        import pyautogui
+
+        self.pyautogui = pyautogui
+        # Configure PyAutoGUI safety settings
+        pyautogui.FAILSAFE = True
+
+    def set_pause(self, seconds: float):
+        self.pyautogui.PAUSE = seconds
+
+    def get_pause(self) -> float:
+        return self.pyautogui.PAUSE
+
+    def monitors(self) -> List[Monitor]:
+        if sys.platform == "win32":
+            try:
+                monitors = _read_windows_monitors()
+                if monitors:
+                    return monitors
+            except Exception as e:
+                print(f"GUI backend: could not enumerate monitors: {e}")
+        width, height = self.pyautogui.size()
+        return [Monitor(0, 0, width, height, 0, 0, width, height, 1.0, True)]
+
+    def move_to(self, x: int, y: int, duration: float = 0.0):
+        self.pyautogui.moveTo(x, y, duration=duration)
+
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left", duration: float = 0.0):
+        self.pyautogui.click(x, y, clicks=clicks, interval=interval, button=button, duration=duration)
+
+    def drag_to(self, x: int, y: int, duration: float = 0.0, button: str = "left"):
+        self.pyautogui.dragTo(x, y, duration=duration, button=button)
+
+    def scroll(self, clicks: int, x: int, y: int):
+        self.pyautogui.scroll(clicks, x=x, y=y)
+
+    def write(self, text: str, interval: float = 0.0, pause: bool = True):
+        self.pyautogui.write(text, interval=interval, _pause=pause)
+
+    def press(self, key: str, presses: int = 1, interval: float = 0.0, pause: bool = True):
+        self.pyautogui.press(key, presses=presses, interval=interval, _pause=pause)
+
+    def hotkey(self, *keys: str, pause: bool = True):
+        self.pyautogui.hotkey(*keys, _pause=pause)
+
+    def screenshot(self) -> Image.Image:
+        from PIL import ImageGrab
+        return ImageGrab.grab()
+
+    def window_titles(self) -> Optional[Set[str]]:
+        try:
+            import pygetwindow
+            return {title for title in pygetwindow.getAllTitles() if title}
+        except Exception:
+            return None
+
+    def active_window_title(self) -> str:
+        try:
+            import pygetwindow
+            return pygetwindow.getActiveWindowTitle() or ""
+        except Exception:
+            return ""
+
+    def clipboard_get(self) -> Optional[str]:
+        import pyperclip
+        try:
+            return pyperclip.paste()
+        except Exception:
+            return None
+
+    def clipboard_set(self, text: str):
+        import pyperclip
+        pyperclip.copy(text)
+
+def _read_windows_monitors() -> List[Monitor]:
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL("user32")
+
+    class MONITORINFO(ctypes.Structure):
+        _fields_ = [
+            ("cbSize", wintypes.DWORD),
+            ("rcMonitor", wintypes.RECT),
+            ("rcWork", wintypes.RECT),
+            ("dwFlags", wintypes.DWORD),
+        ]
+
+    MONITORENUMPROC = ctypes.WINFUNCTYPE(
+        wintypes.BOOL, wintypes.HANDLE, wintypes.HDC, ctypes.POINTER(wintypes.RECT), wintypes.LPARAM
+    )
+    user32.EnumDisplayMonitors.argtypes = [wintypes.HDC, ctypes.c_void_p, MONITORENUMPROC, wintypes.LPARAM]
+    user32.GetMonitorInfoW.argtypes = [wintypes.HANDLE, ctypes.POINTER(MONITORINFO)]
+    try:
+        get_dpi = ctypes.WinDLL("shcore").GetDpiForMonitor
+    except (OSError, AttributeError):
+        get_dpi = None
+
+    monitors = []
+
+    def callback(hmonitor, hdc, rect, data):
+        info = MONITORINFO()
+        info.cbSize = ctypes.sizeof(MONITORINFO)
+        if not user32.GetMonitorInfoW(hmonitor, ctypes.byref(info)):
+            return True
+        scale = 1.0
+        if get_dpi is not None:
+            dpi_x, dpi_y = wintypes.UINT(), wintypes.UINT()
+            if get_dpi(hmonitor, 0, ctypes.byref(dpi_x), ctypes.byref(dpi_y)) == 0:
+                scale = dpi_x.value / 96
+        m, w = info.rcMonitor, info.rcWork
+        monitors.append(Monitor(
+            m.left, m.top, m.right - m.left, m.bottom - m.top,
+            w.left, w.top, w.right - w.left, w.bottom - w.top,
+            scale, bool(info.dwFlags & 1),  # MONITORINFOF_PRIMARY
+        ))
+        return True
+
+    user32.EnumDisplayMonitors(None, None, MONITORENUMPROC(callback), 0)
+    return monitors
+
+class Gui:
+    """
+    The backend the tools talk to. Attribute access is forwarded to the active backend,
+    which is built on first use from settings.gui_backend ("pyautogui" or "virtual")
+    unless one was installed with use().
+    """
+
+    def __init__(self, name: str = "pyautogui"):
+        self.name = name
+        self._backend = None
+        self._lock = Lock()
+
+    @property
+    def backend(self) -> GuiBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._build(self.name)
+        return self._backend
+
+    def use(self, backend: GuiBackend) -> GuiBackend:
+        """Installs a backend (e.g. a VirtualDesktop) and returns the previous one."""
+        with self._lock:
+            previous, self._backend = self._backend, backend
+        return previous
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    @staticmethod
+    def _build(name: str) -> GuiBackend:
+        if name == "virtual":
+            from app.services.VirtualDesktop import VirtualDesktop
+            return VirtualDesktop()
+        if name == "pyautogui":
+            return PyAutoGuiBackend()
+        raise ValueError(f"Unknown GUI backend '{name}', expected 'pyautogui' or 'virtual'")
+
+gui = Gui(env.gui_backend)
@@ -0,0 +1,178 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Lock, Thread
+from typing import Optional
+import time
+
+from config.setting import env
+from app.services.GuiBackend import gui
+from app.utils.screensignature import dhash, hamming
+
+@dataclass(frozen=True)
+class PacingProfile:
+    """Timing used for GUI actions: cursor move duration, keystroke interval and pause after each call."""
+    move_duration: float
+    type_interval: float
+    pause: float
+
+# Fixed profiles; "adaptive" interpolates between FAST and SAFE from the measured UI latency
+SAFE = PacingProfile(move_duration=0.2, type_interval=0.05, pause=0.1)
+FAST = PacingProfile(move_duration=0.05, type_interval=0.01, pause=0.03)
+TURBO = PacingProfile(move_duration=0.0, type_interval=0.005, pause=0.01)
+PROFILES = {"safe": SAFE, "turbo": TURBO}
+
+# Active-window titles of apps known to react instantly; they get the turbo profile
+TURBO_APPS = ("notepad", "calculator", "command prompt", "powershell", "terminal", "visual studio code")
+
+# UI reaction latency (seconds) mapped to the FAST and SAFE ends of the adaptive range
+FAST_LATENCY = 0.05
+SLOW_LATENCY = 0.5
+# Weight of the newest latency sample in the moving average
+EWMA_ALPHA = 0.3
+# A screen change after this long is not attributed to the action; a sample with no change
+# by then is recorded as this latency (censored), so an unresponsive UI slows pacing down
+MAX_LATENCY = 1.0
+# Measure one action out of this many; every sample costs a few screen grabs
+SAMPLE_EVERY = 3
+# Actions expected to change the screen; only these are sampled or cut a running sample short.
+# A pointer move changes nothing a screenshot shows and would only ever record MAX_LATENCY
+SCREEN_ACTIONS = ("click", "type", "press", "hotkey", "scroll", "keyboard_sequence")
+# dHash bits that must differ for the screen to count as changed
+CHANGE_DISTANCE = 3
+
+class PacingController:
+    """
+    Adapts pyautogui timing to how quickly the UI reacts.
+
+    Every few screen-changing actions the controller captures the screen before the action
+    and polls it in the background afterwards; the delay until the screen changes (MAX_LATENCY
+    when it does not change in time) feeds an EWMA of the UI latency. Move durations, keystroke intervals and pyautogui.PAUSE are then
+    interpolated between a fast and a safe profile. The "turbo" profile is used as is
+    for known-fast apps, and "safe" restores the original fixed timings.
+    """
+
+    def __init__(self, profile: str = "adaptive"):
+        self._check(profile)
+        self.profile = profile
+        self.latency = None
+        self.samples = 0
+        self.timeouts = 0
+        self.preempted = 0
+        self._actions = 0
+        self._lock = Lock()
+        self.apply()
+
+    def set_profile(self, profile: str):
+        self._check(profile)
+        self.profile = profile
+        self.apply()
+
+    def current(self) -> PacingProfile:
+        """The timing to use for the next action."""
+        if self.profile in PROFILES:
+            return PROFILES[self.profile]
+        title = gui.active_window_title().lower()
+        if any(app in title for app in TURBO_APPS):
+            return TURBO
+        if self.latency is None:
+            return SAFE
+        # 0 at FAST_LATENCY or below, 1 at SLOW_LATENCY or above
+        t = min(1.0, max(0.0, (self.latency - FAST_LATENCY) / (SLOW_LATENCY - FAST_LATENCY)))
+        return PacingProfile(
+            move_duration=round(FAST.move_duration + t * (SAFE.move_duration - FAST.move_duration), 3),
+            type_interval=round(FAST.type_interval + t * (SAFE.type_interval - FAST.type_interval), 3),
+            pause=round(FAST.pause + t * (SAFE.pause - FAST.pause), 3),
+        )
+
+    def move_duration(self) -> float:
+        return self.current().move_duration
+
+    def type_interval(self) -> float:
+        return self.current().type_interval
+
+    def apply(self) -> PacingProfile:
+        """Sets the backend's pause (pyautogui.PAUSE) from the current timing and returns it."""
+        timing = self.current()
+        gui.set_pause(timing.pause)
+        return timing
+
+    @contextmanager
+    def action(self, name: str = "action"):
+        """
+        Wraps one GUI action: applies the current pause and, for sampled actions,
+        measures how long the screen takes to react.
+        """
+        changes_screen = name in SCREEN_ACTIONS
+        with self._lock:
+            if changes_screen:
+                self._actions += 1
+            action_id = self._actions
+        timing = self.apply()
+        # A simulated desktop reacts instantly; only the real one is worth measuring
+        sample = (self.profile == "adaptive" and gui.backend.real and changes_screen
+                  and action_id % SAMPLE_EVERY == 0)
+        before = self._grab() if sample else None
+        started = time.monotonic()
+        yield
+        if before is not None:
+            # pyautogui's own PAUSE is part of the elapsed time but not of the UI's reaction
+            Thread(target=self._measure, args=(action_id, before, started + timing.pause), daemon=True).start()
+
+    def record(self, latency: float):
+        """Adds a UI latency sample (seconds) to the moving average."""
+        with self._lock:
+            self.latency = latency if self.latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency
+            self.samples += 1
+
+    def stats(self) -> dict:
+        timing = self.current()
+        return {
+            "profile": self.profile,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "samples": self.samples,
+            "timeouts": self.timeouts,
+            "preempted": self.preempted,
+            "move_duration": timing.move_duration,
+            "type_interval": timing.type_interval,
+            "pause": timing.pause,
+        }
+
+    def _measure(self, action_id: int, before: int, started: float):
+        while time.monotonic() - started < MAX_LATENCY:
+            # A newer action would change the screen too, so the sample ends here, censored: the
+            # UI took at least the elapsed time. That bound only moves the average when it is
+            # above it; below it the sample is skipped (and counted) instead of biasing it down
+            if self._actions != action_id:
+                elapsed = max(0.0, time.monotonic() - started)
+                if self.latency is not None and elapsed > self.latency:
+                    self.record(elapsed)
+                else:
+                    with self._lock:
+                        self.preempted += 1
+                return
+            current = self._grab()
+            if current is None:
+                return
+            if hamming(before, current) >= CHANGE_DISTANCE:
+                self.record(max(0.0, time.monotonic() - started))
+                return
+            time.sleep(0.02)
+        # No reaction within MAX_LATENCY: the UI took at least that long (or the action
+        # changed nothing); count it rather than leave the average to the quick samples
+        with self._lock:
+            self.timeouts += 1
+        self.record(MAX_LATENCY)
+
+    @staticmethod
+    def _check(profile: str):
+        if profile != "adaptive" and profile not in PROFILES:
+            raise ValueError(f"Unknown pacing profile '{profile}', expected 'adaptive' or one of {list(PROFILES)}")
+
+    @staticmethod
+    def _grab() -> Optional[int]:
+        try:
+            return dhash(gui.screenshot())
+        except Exception:
+            return None
+
+pacing = PacingController(env.pacing_profile)
@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional
+import json
+import os
+import re
+import time
+
+from app.utils.screensignature import signature_distance
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200
+# A plan is dropped after this many failed replays
+DEFAULT_MAX_FAILURES = 2
+# Largest dHash distance (out of 64 bits) for two screens to count as the same state
+DEFAULT_MAX_DISTANCE = 10
+
+# Calls that only observe or change the toolset; they are not worth replaying
+SKIPPED_TOOLS = {"ShowScreen", "RequestTools"}
+# Calls whose arguments refer to one screenshot (mark ids); plans using them are not cached
+SCREENSHOT_TOOLS = {"ClickMark"}
+
+def normalize_instruction(instruction: str) -> str:
+    """Lowercases an instruction and strips punctuation and repeated whitespace."""
+    return " ".join(re.sub(r"[^\w\s+.:/-]", " ", instruction.lower()).split())
+
+@dataclass
+class CachedPlan:
+    """A tool sequence that accomplished an instruction from a given starting screen."""
+    instruction: str
+    start_signature: str
+    end_signature: str
+    tool_calls: List[dict]
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    hits: int = 0
+    failures: int = 0
+
+class PlanCache:
+    """
+    Stores successful agent tool sequences keyed by normalized instruction and
+    starting-screen signature, so repeated commands can be replayed without the model.
+
+    Entries expire after a TTL, are dropped after repeated failed replays and the least
+    recently used ones are evicted beyond max_entries. The cache is kept in ~/.airis.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_failures: int = DEFAULT_MAX_FAILURES,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+    ):
+        self.path = path or Path.home() / ".airis" / "plan_cache.json"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_failures = max_failures
+        self.max_distance = max_distance
+        self._lock = Lock()
+        self._plans = None
+        self.lookups = 0
+        self.hits = 0
+        self.verified = 0
+        self.mismatches = 0
+
+    def lookup(self, instruction: str, signature: str) -> Optional[CachedPlan]:
+        """
+        Finds a plan for an instruction whose starting screen matches the current one.
+
+        Args:
+            instruction (str): The user's task
+            signature (str): Signature of the current screen
+
+        Returns:
+            CachedPlan: The closest matching plan, or None
+        """
+        key = normalize_instruction(instruction)
+        with self._lock:
+            plans = self._load()
+            self.lookups += 1
+            now = time.time()
+            candidates = [
+                plan for plan in plans.get(key, [])
+                if now - plan.created_at < self.ttl
+                and signature_distance(plan.start_signature, signature) <= self.max_distance
+            ]
+            if not candidates:
+                return None
+            plan = min(candidates, key=lambda p: signature_distance(p.start_signature, signature))
+            plan.last_used = now
+            plan.hits += 1
+            self.hits += 1
+            return plan
+
+    def store(self, instruction: str, start_signature: str, end_signature: str, tool_calls: List[dict]) -> None:
+        """Saves the replayable calls of a successful run, replacing a plan for the same screen."""
+        if any(call.get("name") in SCREENSHOT_TOOLS for call in tool_calls):
+            return
+        calls = [
+            {"name": call["name"], "args": call.get("args", {})}
+            for call in tool_calls if call.get("name") not in SKIPPED_TOOLS
+        ]
+        if not calls:
+            return
+        key = normalize_instruction(instruction)
+        with self._lock:
+            plans = self._load()
+            entries = [
+                plan for plan in plans.get(key, [])
+                if signature_distance(plan.start_signature, start_signature) > self.max_distance
+            ]
+            entries.append(CachedPlan(key, start_signature, end_signature, calls))
+            plans[key] = entries
+            self._evict(plans)
+            self._save(plans)
+
+    def verify(self, plan: CachedPlan, signature: Optional[str]) -> bool:
+        """
+        Checks a replay by comparing the screen it left with the one the original run ended on.
+        A failed check (or a replay without a signature) counts against the plan, which is
+        dropped after max_failures.
+        """
+        matched = signature is not None and signature_distance(plan.end_signature, signature) <= self.max_distance
+        with self._lock:
+            plans = self._load()
+            if matched:
+                self.verified += 1
+                plan.failures = 0
+            else:
+                self.mismatches += 1
+                plan.failures += 1
+                if plan.failures >= self.max_failures:
+                    entries = plans.get(plan.instruction, [])
+                    plans[plan.instruction] = [p for p in entries if p is not plan]
+                    if not plans[plan.instruction]:
+                        del plans[plan.instruction]
+            self._save(plans)
+        return matched
+
+    def stats(self) -> dict:
+        with self._lock:
+            plans = self._load()
+            return {
+                "plans": sum(len(entries) for entries in plans.values()),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "verified": self.verified,
+                "mismatches": self.mismatches,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans = {}
+            self._save(self._plans)
+
+    def _evict(self, plans: dict) -> None:
+        now = time.time()
+        for key in list(plans):
+            plans[key] = [plan for plan in plans[key] if now - plan.created_at < self.ttl]
+            if not plans[key]:
+                del plans[key]
+        everything = sorted((plan for entries in plans.values() for plan in entries), key=lambda p: p.last_used)
+        for plan in everything[:max(0, len(everything) - self.max_entries)]:
+            plans[plan.instruction].remove(plan)
+            if not plans[plan.instruction]:
+                del plans[plan.instruction]
+
+    def _load(self) -> dict:
+        # Called with self._lock held
+        if self._plans is None:
+            self._plans = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for key, entries in json.load(f).items():
+                        self._plans[key] = [CachedPlan(**entry) for entry in entries]
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Plan cache: could not read {self.path}: {e}")
+        return self._plans
+
+    def _save(self, plans: dict) -> None:
+        # Called with self._lock held
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({key: [asdict(plan) for plan in entries] for key, entries in plans.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Plan cache: could not write {self.path}: {e}")
+
+plan_cache = PlanCache()
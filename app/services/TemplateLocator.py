@@ -0,0 +1,305 @@
+"""
+Finds known UI elements (icons, buttons) on screen by OpenCV template matching.
+
+Templates are PNG crops kept in ~/.airis/templates, each with an optional JSON sidecar
+holding the region it is usually found in and its match threshold. A lookup searches
+the place of the previous hit first, then the template's region, and only then the
+whole frame (coarse-to-fine), at a few scales around the DPI ratio between capture and
+now. A hit costs tens of milliseconds instead of a screenshot-and-reasoning turn.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+import json
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.services.DisplayGeometry import display
+from app.services.GuiBackend import gui
+
+# Normalized cross-correlation a match must reach
+DEFAULT_THRESHOLD = 0.85
+# Template scales tried, relative to the DPI ratio between capture time and now
+DEFAULT_SCALES = (1.0, 0.9, 1.1, 0.8, 1.25)
+# Pixels added around the previous hit, and around a saved template for its default region
+HIT_MARGIN = 48
+REGION_MARGIN = 160
+# Full-frame searches first run on frame and template downscaled by this factor
+COARSE_FACTOR = 0.5
+# Templates smaller than this (in pixels, either side) are not searched coarsely
+MIN_COARSE_SIDE = 24
+
+Region = Tuple[int, int, int, int]  # x, y, width, height in screen pixels
+
+@dataclass
+class Template:
+    """A saved UI element: grayscale pixels plus where and how strictly to look for it."""
+    name: str
+    pixels: np.ndarray
+    region: Optional[Region] = None
+    threshold: float = DEFAULT_THRESHOLD
+    dpi_scale: float = 1.0
+    mtime: float = 0.0
+
+@dataclass(frozen=True)
+class Match:
+    """Best location of a template in a frame."""
+    name: str
+    x: int
+    y: int
+    width: int
+    height: int
+    score: float
+    scale: float
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+def to_gray(image: Image.Image) -> np.ndarray:
+    """PIL image to a grayscale uint8 array, the format templates are matched in."""
+    return np.asarray(image.convert("L"))
+
+def _clip(region: Region, shape: tuple) -> Region:
+    x, y, width, height = region
+    left, top = max(0, x), max(0, y)
+    right, bottom = min(shape[1], x + width), min(shape[0], y + height)
+    return left, top, max(0, right - left), max(0, bottom - top)
+
+def _pad(region: Region, margin: int) -> Region:
+    x, y, width, height = region
+    return x - margin, y - margin, width + 2 * margin, height + 2 * margin
+
+class TemplateLibrary:
+    """Templates on disk, loaded lazily and reloaded when their file changes."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Path.home() / ".airis" / "templates"
+        self._templates: Dict[str, Template] = {}
+        self._lock = Lock()
+
+    def names(self) -> List[str]:
+        if not self.path.is_dir():
+            return []
+        return sorted(p.stem for p in self.path.glob("*.png"))
+
+    def get(self, name: str) -> Optional[Template]:
+        file = self.path / f"{name}.png"
+        if not file.is_file():
+            return None
+        mtime = file.stat().st_mtime
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None or template.mtime != mtime:
+                template = self._load(name, file, mtime)
+                self._templates[name] = template
+            return template
+
+    def add(self, name: str, image: Image.Image, region: Optional[Region] = None, threshold: float = DEFAULT_THRESHOLD) -> Template:
+        """
+        Saves a template.
+
+        Args:
+            name (str): Template name, used by ClickTemplate
+            image (Image.Image): Crop of the element
+            region (Region, optional): Screen area the element is usually found in
+            threshold (float): Score a match must reach
+
+        Returns:
+            Template: The saved template
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        image.save(self.path / f"{name}.png")
+        meta = {"region": list(region) if region else None, "threshold": threshold, "dpi_scale": display.primary().scale}
+        with open(self.path / f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        return self.get(name)
+
+    def capture(self, name: str, x: int, y: int, width: int, height: int, threshold: float = DEFAULT_THRESHOLD) -> Template:
+        """Saves the given screen area as a template; later searches start around that area."""
+        crop = gui.screenshot().crop((x, y, x + width, y + height))
+        return self.add(name, crop, region=_pad((x, y, width, height), REGION_MARGIN), threshold=threshold)
+
+    @staticmethod
+    def _load(name: str, file: Path, mtime: float) -> Template:
+        meta = {}
+        sidecar = file.with_suffix(".json")
+        if sidecar.is_file():
+            try:
+                with open(sidecar, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Template locator: ignoring unreadable {sidecar.name} ({e})")
+        with Image.open(file) as image:
+            pixels = to_gray(image)
+        return Template(
+            name=name,
+            pixels=pixels,
+            region=tuple(meta["region"]) if meta.get("region") else None,
+            threshold=meta.get("threshold", DEFAULT_THRESHOLD),
+            dpi_scale=meta.get("dpi_scale", 1.0),
+            mtime=mtime,
+        )
+
+class TemplateLocator:
+    """
+    Multi-scale template matching restricted to regions of interest.
+
+    Each lookup tries, in order, the previous hit of the template (padded), its saved
+    region and the whole frame, and stops at the first region with a match above the
+    threshold. The scale of the previous hit is tried first.
+    """
+
+    def __init__(self, library: Optional[TemplateLibrary] = None, scales: Tuple[float, ...] = DEFAULT_SCALES):
+        self.library = library or TemplateLibrary()
+        self.scales = scales
+        self._hits: Dict[str, Match] = {}
+        self._lock = Lock()
+        self.lookups = 0
+        self.found = 0
+        self.roi_hits = 0
+        self.full_searches = 0
+
+    def locate(self, name: str, frame: Optional[np.ndarray] = None) -> Optional[Match]:
+        """The template's location on screen, or None when it is missing or matches too weakly."""
+        match = self.search(name, frame)
+        template = self.library.get(name)
+        return match if match and template and match.score >= template.threshold else None
+
+    def search(self, name: str, frame: Optional[np.ndarray] = None) -> Optional[Match]:
+        """
+        Best candidate for a template, even below its threshold.
+
+        Args:
+            name (str): Template name
+            frame (np.ndarray, optional): Grayscale screen capture; captured when omitted
+
+        Returns:
+            Match: Best match, or None when no template has that name
+        """
+        template = self.library.get(name)
+        if template is None:
+            return None
+        if frame is None:
+            frame = to_gray(gui.screenshot())
+        self.lookups += 1
+        dpi_ratio = display.primary().scale / template.dpi_scale if template.dpi_scale else 1.0
+        previous = self._hits.get(name)
+        scales = [s * dpi_ratio for s in self.scales]
+        if previous is not None:
+            scales.sort(key=lambda s: abs(s - previous.scale))
+
+        regions = []
+        if previous is not None:
+            regions.append(_pad((previous.x, previous.y, previous.width, previous.height), HIT_MARGIN))
+        if template.region:
+            regions.append(template.region)
+
+        best = None
+        for region in regions:
+            match = self._match(frame, template, _clip(region, frame.shape), scales)
+            if match and (best is None or match.score > best.score):
+                best = match
+            if best and best.score >= template.threshold:
+                self.roi_hits += 1
+                return self._record(best)
+        self.full_searches += 1
+        match = self._match_full(frame, template, scales)
+        if match and (best is None or match.score > best.score):
+            best = match
+        if best and best.score >= template.threshold:
+            return self._record(best)
+        return best
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "found": self.found,
+            "roi_hits": self.roi_hits,
+            "full_searches": self.full_searches,
+            "templates": len(self.library.names()),
+        }
+
+    def _record(self, match: Match) -> Match:
+        with self._lock:
+            self._hits[match.name] = match
+            self.found += 1
+        return match
+
+    def _match_full(self, frame: np.ndarray, template: Template, scales: List[float]) -> Optional[Match]:
+        height, width = template.pixels.shape
+        if min(height, width) * min(scales) < MIN_COARSE_SIDE:
+            return self._match(frame, template, (0, 0, frame.shape[1], frame.shape[0]), scales)
+        # Coarse pass on a downscaled frame, then a full-resolution pass around its peak
+        small = cv2.resize(frame, None, fx=COARSE_FACTOR, fy=COARSE_FACTOR, interpolation=cv2.INTER_AREA)
+        coarse = self._match(small, template, (0, 0, small.shape[1], small.shape[0]), [s * COARSE_FACTOR for s in scales])
+        if coarse is None:
+            return None
+        x, y = int(coarse.x / COARSE_FACTOR), int(coarse.y / COARSE_FACTOR)
+        scale = coarse.scale / COARSE_FACTOR
+        region = _pad((x, y, int(width * scale), int(height * scale)), HIT_MARGIN // 2)
+        refined = [s for s in scales if abs(s - scale) < 0.2] or scales
+        return self._match(frame, template, _clip(region, frame.shape), refined)
+
+    @staticmethod
+    def _match(frame: np.ndarray, template: Template, region: Region, scales: List[float]) -> Optional[Match]:
+        x, y, width, height = region
+        area = frame[y:y + height, x:x + width]
+        best = None
+        for scale in scales:
+            pixels = template.pixels if abs(scale - 1.0) < 1e-3 else cv2.resize(
+                template.pixels, None, fx=scale, fy=scale,
+                interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR,
+            )
+            t_height, t_width = pixels.shape
+            if t_height < 4 or t_width < 4 or t_height > area.shape[0] or t_width > area.shape[1]:
+                continue
+            scores = cv2.matchTemplate(area, pixels, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (left, top) = cv2.minMaxLoc(scores)
+            if np.isfinite(score) and (best is None or score > best.score):
+                best = Match(template.name, x + left, y + top, t_width, t_height, float(score), scale)
+        return best
+
+template_locator = TemplateLocator()
+
+if __name__ == "__main__":
+    # Save a template from the screen:   python -m app.services.TemplateLocator save NAME X Y WIDTH HEIGHT
+    # Benchmark lookups (virtual desktop): python -m app.services.TemplateLocator
+    import sys
+    import tempfile
+
+    if len(sys.argv) == 7 and sys.argv[1] == "save":
+        name, x, y, width, height = sys.argv[2], *map(int, sys.argv[3:])
+        template = template_locator.library.capture(name, x, y, width, height)
+        print(f"Saved template '{name}' ({template.pixels.shape[1]}x{template.pixels.shape[0]}) to {template_locator.library.path}")
+        sys.exit(0)
+
+    from app.services.VirtualDesktop import VirtualDesktop
+
+    desktop = VirtualDesktop()
+    gui.use(desktop)
+    desktop.open_window("calc")
+    desktop.open_window("notepad", x=700, y=300)
+    frame = to_gray(desktop.screenshot())
+    library = TemplateLibrary(Path(tempfile.mkdtemp()))
+    library.add("notepad_title", desktop.screenshot().crop((700, 300, 900, 332)))
+    runs = 50
+
+    def bench(locator, label):
+        start = time.perf_counter()
+        for _ in range(runs):
+            match = locator.locate("notepad_title", frame)
+        print(f"{label:34s} {(time.perf_counter() - start) / runs * 1000:7.2f} ms  -> {match}")
+
+    exhaustive = TemplateLocator(library)
+    exhaustive._match_full = lambda f, t, s: TemplateLocator._match(f, t, (0, 0, f.shape[1], f.shape[0]), s)
+    exhaustive._record = lambda match: match  # never remembers a hit
+    bench(exhaustive, "full frame, full resolution")
+    cold = TemplateLocator(library)
+    cold._record = lambda match: match
+    bench(cold, "full frame, coarse-to-fine")
+    bench(TemplateLocator(library), "previous hit region")
@@ -0,0 +1,153 @@
+"""
+Single declaration of the agent tools and their metadata.
+
+Each tool is declared once, with the module that implements it and what the agent loop
+needs to know about it without importing it: whether it drives the GUI (and so must run
+alone), roughly how many tokens its result adds, how long it usually takes, and the
+hints the tool selector matches against instructions. Modules are imported on the first
+lookup of one of their tools, so importing a chain no longer loads the GUI stack, OpenCV
+or the screenshot pipeline; that happens on the first instruction.
+"""
+from dataclasses import dataclass
+from importlib import import_module
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+GUI_TOOLS = "app.services.AutoGuiV4"
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Where a tool lives and how the agent loop should treat it."""
+    name: str
+    module: str = GUI_TOOLS
+    # Touches mouse, keyboard or screen: runs alone, in call order
+    gui_exclusive: bool = True
+    # Read-only and free of GUI use: may overlap other concurrent calls of the same turn
+    concurrent: bool = False
+    # Approximate tokens the result adds to the conversation
+    cost: int = 30
+    # Typical seconds per call on a real desktop
+    latency: float = 0.2
+    # Always bound by the tool selector
+    core: bool = False
+    # Words (or phrases) in an instruction that make the tool relevant
+    hints: Tuple[str, ...] = ()
+    # Called by the agent loop itself (never part of a toolset handed to the model)
+    internal: bool = False
+    # Arguments that may hold secrets (typed text, commands): trajectories record only
+    # their length, and the tool's result likewise
+    redact: Tuple[str, ...] = ()
+
+TOOLS = (
+    ToolSpec("ShowScreen", cost=1100, latency=0.15, core=True),
+    ToolSpec("OpenApplication", latency=1.0, hints=("open", "launch", "start", "app", "application", "calc", "calculator", "notepad", "paint", "word", "excel")),
+    ToolSpec("OpenBrowserAndNavigate", latency=4.0, hints=("browser", "chrome", "firefox", "edge", "website", "web", "url", "http", "www", ".com", "google", "youtube", "search", "navigate", "go to")),
+    ToolSpec("SaveFile", latency=1.4, hints=("save", "filename")),
+    ToolSpec("SwitchWindowAndAct", latency=0.6, hints=("switch", "window", "alt+tab", "other app")),
+    ToolSpec("CopyPasteText", latency=0.8, hints=("copy", "paste", "clipboard")),
+    ToolSpec("OpenFileExplorer", latency=1.5, hints=("explorer", "folder", "downloads", "documents", "desktop")),
+    ToolSpec("CursorMove", latency=0.2, hints=("hover", "mouse", "cursor", "move")),
+    ToolSpec("CursorMoveAndClick", latency=0.3, core=True),
+    ToolSpec("ClickMark", latency=0.3, core=True),
+    ToolSpec("ClickTemplate", latency=0.35, hints=("icon", "button", "template", "toolbar")),
+    ToolSpec("CursorDoubleClick", latency=0.4, hints=("double", "icon")),
+    ToolSpec("CursorRightClick", latency=0.3, hints=("right click", "right-click", "context menu")),
+    ToolSpec("CursorDrag", latency=1.2, hints=("drag", "drop", "draw", "resize", "select", "slider")),
+    ToolSpec("KeyboardWriteText", latency=0.3, core=True, redact=("text",)),
+    ToolSpec("KeyboardPressKey", latency=0.1, core=True),
+    ToolSpec("KeyboardHotkey", latency=0.2, core=True),
+    ToolSpec("ScrollScreen", latency=0.4, hints=("scroll", "page", "bottom", "top", "read")),
+    ToolSpec("WaitAndObserve", latency=2.0, core=True),
+    ToolSpec("generate_directory_tree", gui_exclusive=False, concurrent=True, cost=400, latency=0.1, hints=("tree", "directory", "structure", "project", "folder")),
+    # Commands often depend on the previous one (mkdir, then cd into it), so they keep call order
+    ToolSpec("run_terminal", gui_exclusive=False, cost=300, latency=2.0, redact=("command",), hints=("terminal", "command", "shell", "cmd", "powershell", "script", "install", "pip", "git", "python", "npm")),
+    ToolSpec("KeyboardSequence", latency=0.3, internal=True, redact=("events",)),
+    ToolSpec("RequestTools", module="app.services.ToolSelector", gui_exclusive=False, concurrent=True, latency=0.0, internal=True),
+)
+
+# Tools handed to each chain, in the order their schemas are bound
+TOOLSETS = {
+    "agent": tuple(spec.name for spec in TOOLS if not spec.internal),
+}
+
+class ToolRegistry:
+    """Tool specs by name; the tool objects are imported from their modules on first lookup."""
+
+    def __init__(self, specs: Iterable[ToolSpec] = TOOLS, toolsets: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.specs: Dict[str, ToolSpec] = {spec.name: spec for spec in specs}
+        self.toolsets = dict(TOOLSETS if toolsets is None else toolsets)
+        self._tools = {}
+        self._lock = Lock()
+
+    def spec(self, name: str) -> Optional[ToolSpec]:
+        return self.specs.get(name)
+
+    def get(self, name: str):
+        """The tool object, importing its module on first use; KeyError for unknown names."""
+        tool = self._tools.get(name)
+        if tool is None:
+            spec = self.specs[name]
+            with self._lock:
+                tool = getattr(import_module(spec.module), name)
+                self._tools[name] = tool
+        return tool
+
+    def names(self, toolset: str) -> Tuple[str, ...]:
+        return self.toolsets[toolset]
+
+    def toolset(self, toolset: str) -> list:
+        """
+        Assembles a chain's toolset.
+
+        Args:
+            toolset (str): Toolset name, a key of TOOLSETS
+
+        Returns:
+            list: The tool objects, in binding order
+        """
+        return [self.get(name) for name in self.toolsets[toolset]]
+
+    def tool_map(self, toolset: str) -> dict:
+        """Every tool a chain may execute by name: its toolset plus the internal tools."""
+        names = list(self.toolsets[toolset]) + [spec.name for spec in self.specs.values() if spec.internal]
+        return {name: self.get(name) for name in names}
+
+    def core(self) -> Tuple[str, ...]:
+        return tuple(spec.name for spec in self.specs.values() if spec.core)
+
+    def hints(self) -> Dict[str, Tuple[str, ...]]:
+        return {spec.name: spec.hints for spec in self.specs.values() if spec.hints}
+
+    def concurrent(self) -> frozenset:
+        """Tools that may overlap each other: read-only and not touching the GUI."""
+        return frozenset(spec.name for spec in self.specs.values() if spec.concurrent)
+
+    def redacted(self, name: str) -> Tuple[str, ...]:
+        """Arguments of a tool kept out of trajectory records."""
+        spec = self.specs.get(name)
+        return spec.redact if spec else ()
+
+    def latency(self, name: str) -> Optional[float]:
+        spec = self.specs.get(name)
+        return spec.latency if spec else None
+
+registry = ToolRegistry()
+
+if __name__ == "__main__":
+    # Import cost of the agent chain, whose tools load lazily, and of assembling its toolset:
+    #   python -m app.services.ToolRegistry
+    import subprocess
+    import sys
+
+    # Fresh interpreter, so neither step finds its modules already imported
+    code = (
+        "import time; start = time.perf_counter(); import app.services.chain.instructionchainV4; "
+        "middle = time.perf_counter(); from app.services.ToolRegistry import registry; registry.toolset('agent'); "
+        "print(middle - start, time.perf_counter() - middle)"
+    )
+    chain, toolset = map(float, subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()[-2:])
+    print(f"import instructionchainV4        {chain * 1000:7.0f} ms")
+    print(f"assemble the 'agent' toolset     {toolset * 1000:7.0f} ms (paid on the first instruction)")
+    for spec in TOOLS:
+        print(f"  {spec.name:24s} {'gui' if spec.gui_exclusive else 'par' if spec.concurrent else '   '}  cost {spec.cost:5d}  latency {spec.latency:5.2f}s"
+              + ("  core" if spec.core else "") + ("  internal" if spec.internal else ""))
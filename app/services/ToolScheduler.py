@@ -0,0 +1,92 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Iterable, List, Sequence
+
+from app.services.ToolRegistry import registry
+
+# Read-only tools that neither touch the mouse, keyboard nor screen; they can overlap each
+# other. Every other tool (GUI actions, terminal commands) runs alone, in call order.
+CONCURRENT_TOOLS = registry.concurrent()
+
+class ToolScheduler:
+    """
+    Runs the tool calls of one agent turn.
+
+    Consecutive calls to concurrent (read-only) tools run together in a thread pool; any
+    other call waits for them to finish and runs on the calling thread, so GUI actions and
+    terminal commands keep their order and never overlap anything else. Results come
+    back in call order.
+    """
+
+    def __init__(self, concurrent: Iterable[str] = CONCURRENT_TOOLS, max_workers: int = 4):
+        self.concurrent = frozenset(concurrent)
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = Lock()
+        self.calls = 0
+        self.concurrent_calls = 0
+        self.concurrent_batches = 0
+
+    def is_concurrent(self, tool_name: str) -> bool:
+        return tool_name in self.concurrent
+
+    def run(self, tool_calls: Sequence[dict], execute: Callable[[dict], list]) -> List[list]:
+        """
+        Executes tool calls and returns their results in the original order.
+
+        Args:
+            tool_calls (Sequence[dict]): Tool calls of the turn, in the order the model made them
+            execute (Callable[[dict], list]): Runs one tool call and returns its result
+
+        Returns:
+            List[list]: One result per tool call, in call order
+        """
+        results = [None] * len(tool_calls)
+        batch = []
+        for index, tool_call in enumerate(tool_calls):
+            if self.is_concurrent(tool_call.get("name")):
+                batch.append(index)
+                continue
+            self._run_batch(batch, tool_calls, execute, results)
+            batch = []
+            results[index] = execute(tool_call)
+        self._run_batch(batch, tool_calls, execute, results)
+        self.calls += len(tool_calls)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "concurrent_calls": self.concurrent_calls,
+            "concurrent_batches": self.concurrent_batches,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _run_batch(self, batch: list, tool_calls: Sequence[dict], execute: Callable[[dict], list], results: list):
+        if not batch:
+            return
+        if len(batch) == 1:
+            results[batch[0]] = execute(tool_calls[batch[0]])
+            return
+        executor = self._get_executor()
+        # Each worker runs in a copy of the caller's context, so tool spans keep their parent
+        futures = {
+            index: executor.submit(contextvars.copy_context().run, execute, tool_calls[index])
+            for index in batch
+        }
+        for index, future in futures.items():
+            results[index] = future.result()
+        self.concurrent_calls += len(batch)
+        self.concurrent_batches += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="airis-tool")
+            return self._executor
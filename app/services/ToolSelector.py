@@ -0,0 +1,133 @@
+import re
+from threading import Lock
+from typing import Iterable, List, Sequence
+
+from langchain_core.tools import tool
+
+from app.services.ToolRegistry import registry
+from app.utils.tokenbudget import estimate_text_tokens
+from app.utils.toolschemas import tool_schemas
+
+# Primitives almost every GUI task needs (always bound) and the words in an instruction
+# that make a tool relevant; both are declared with the tools in the registry
+CORE_TOOLS = registry.core()
+TOOL_HINTS = registry.hints()
+
+# Description words shared with an instruction needed to select a tool without a hint
+MIN_DESCRIPTION_OVERLAP = 2
+
+STOPWORDS = {
+    "a", "an", "and", "the", "to", "of", "in", "on", "at", "for", "with", "by", "is", "it", "or",
+    "this", "that", "from", "be", "as", "into", "then", "my", "me", "please", "str", "int", "optional",
+    "returns", "args", "default", "message", "success", "specified", "e", "g",
+}
+
+def _words(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS and len(word) > 1}
+
+def _summary(tool) -> str:
+    # First sentence of the description, for the catalogue of tools that are not bound
+    description = " ".join((tool.description or "").split())
+    return description.split(". ")[0].rstrip(".")
+
+@tool
+def RequestTools(tool_names: List[str]) -> str:
+    """
+    Make additional tools available. Use it when the task needs a tool listed as
+    available on request; the tools can be called from the next turn on.
+
+    Args:
+        tool_names (List[str]): Names of the tools to enable
+
+    Returns:
+        str: The tools that were enabled
+    """
+    return f"Enabled tools: {', '.join(tool_names)}"
+
+class ToolSelector:
+    """
+    Picks the subset of tools relevant to an instruction, so every agent turn only ships
+    the schemas it is likely to need. The remaining tools are listed by name in the
+    prompt and are bound once the model asks for them through RequestTools.
+    """
+
+    def __init__(self, tools: Sequence, core: Iterable[str] = CORE_TOOLS, hints: dict = TOOL_HINTS):
+        self.tools = list(tools)
+        self.core = set(core)
+        self.hints = hints
+        self._description_words = {t.name: _words(t.description or "") for t in self.tools}
+        self._lock = Lock()
+        self.selections = 0
+        self.selected_tools = 0
+        self.expansions = 0
+        self.schema_tokens_saved = 0
+
+    def select(self, instruction: str) -> list:
+        """
+        Returns the tools relevant to an instruction, in toolbox order.
+
+        Args:
+            instruction (str): The user's task
+
+        Returns:
+            list: Core tools, tools matched by hint or description, and RequestTools when
+            anything was left out
+        """
+        text = instruction.lower()
+        words = _words(instruction)
+        names = set()
+        for t in self.tools:
+            hints = self.hints.get(t.name, ())
+            if t.name in self.core \
+                    or any((hint in text) if " " in hint or not hint.isalnum() else (hint in words) for hint in hints) \
+                    or len(words & self._description_words[t.name]) >= MIN_DESCRIPTION_OVERLAP:
+                names.add(t.name)
+        selected = self._ordered(names)
+        with self._lock:
+            self.selections += 1
+            self.selected_tools += len(selected)
+            self.schema_tokens_saved += self._schema_tokens(self.tools) - self._schema_tokens(selected)
+        return selected
+
+    def expand(self, selected: Sequence, names: Iterable[str]) -> list:
+        """Adds the named tools to a selection; unknown names are ignored."""
+        known = {t.name for t in self.tools}
+        added = {name for name in names if name in known} - {t.name for t in selected}
+        if not added:
+            return list(selected)
+        with self._lock:
+            self.expansions += 1
+        print(f"Tool selector: enabling {sorted(added)}")
+        return self._ordered({t.name for t in selected} | added)
+
+    def missing(self, selected: Sequence) -> list:
+        """Tools of the toolbox that are not part of a selection."""
+        names = {t.name for t in selected}
+        return [t for t in self.tools if t.name not in names]
+
+    def catalogue(self, selected: Sequence) -> str:
+        """Prompt section naming the tools that can be enabled with RequestTools."""
+        missing = self.missing(selected)
+        if not missing:
+            return ""
+        lines = [f"- {t.name}: {_summary(t)}" for t in missing]
+        return "\n\nOther tools available on request (call RequestTools with their names first):\n" + "\n".join(lines)
+
+    def stats(self) -> dict:
+        return {
+            "toolbox": len(self.tools),
+            "selections": self.selections,
+            "avg_selected": round(self.selected_tools / self.selections, 1) if self.selections else 0.0,
+            "expansions": self.expansions,
+            "schema_tokens_saved": self.schema_tokens_saved,
+        }
+
+    def _ordered(self, names: set) -> list:
+        selected = [t for t in self.tools if t.name in names]
+        if len(selected) < len(self.tools):
+            selected.append(RequestTools)
+        return selected
+
+    @staticmethod
+    def _schema_tokens(tools: Sequence) -> int:
+        return sum(estimate_text_tokens(str(schema)) for schema in tool_schemas(tools))
@@ -0,0 +1,374 @@
+"""
+Structured trajectories of agent runs, for regression and performance analysis.
+
+Every instruction handled by the V4 loop becomes a trajectory: a start event, one
+event per model turn (input size, response, tool calls, tool latencies, screen hashes)
+and an end event with the outcome and total time. Events are appended to a JSONL file
+per day in ~/.airis/trajectories as they happen, so a run that crashes halfway is still
+on record. Times are read from the GUI backend's clock, like the time budget.
+
+Recording is opt-in (settings.record_trajectories). Typed text and terminal commands,
+and the results of those tools, are recorded as their length unless
+settings.trajectory_full_text is on, and files past the age or size limit are deleted.
+
+Offline, score() and report() re-score recorded trajectories (where the time went,
+screenshots that showed nothing new, failing tools) and replay() re-executes one on the
+current GUI backend and compares the screens it reaches with the recorded ones.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+from uuid import uuid4
+import json
+import time
+
+from app.services.GuiBackend import gui
+from app.services.ToolRegistry import registry
+from app.utils.screensignature import signature_distance
+from config.setting import env
+
+# Responses and tool results are cut to this many characters in the record
+MAX_TEXT = 2000
+# Screens whose signatures differ by at most this many bits count as the same screen
+SAME_SCREEN_DISTANCE = 2
+# A replayed screen matches the recorded one within this distance (as in the plan cache)
+REPLAY_DISTANCE = 10
+
+def _clip(text: str, limit: int = MAX_TEXT) -> str:
+    return text if len(text) <= limit else text[:limit] + f"... [{len(text) - limit} more characters]"
+
+def _redacted(value) -> str:
+    if isinstance(value, str):
+        return f"<redacted: {len(value)} characters>"
+    return f"<redacted: {len(value) if hasattr(value, '__len__') else 1} items>"
+
+def _redact_args(name: str, args: dict) -> dict:
+    hidden = registry.redacted(name)
+    return {key: _redacted(value) if key in hidden else value for key, value in args.items()}
+
+@dataclass
+class ToolRecord:
+    """One executed tool call of a turn."""
+    name: str
+    args: dict
+    seconds: float
+    ok: bool
+    result: str
+    screen: Optional[str] = None
+
+@dataclass
+class TurnRecord:
+    """One model turn: what was sent, what came back and what the tools did."""
+    index: int
+    messages: int
+    payload_bytes: int
+    history_bytes: int
+    model_seconds: float
+    response: str
+    tool_calls: List[dict] = field(default_factory=list)
+    tools: List[ToolRecord] = field(default_factory=list)
+    tool_seconds: float = 0.0
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    bound_tools: List[str] = field(default_factory=list)
+    replayed: bool = False
+
+class Trajectory:
+    """The record of one instruction being run; each event is written as soon as it is known."""
+
+    def __init__(self, recorder: Optional["TrajectoryRecorder"], instruction: str, model: str):
+        self.recorder = recorder
+        self.trajectory_id = uuid4().hex[:12]
+        self.started = gui.monotonic()
+        self.turns = 0
+        self.model_seconds = 0.0
+        self.tool_seconds = 0.0
+        self._write({
+            "event": "start",
+            "time": time.time(),
+            "instruction": instruction,
+            "model": model,
+            "backend": "real" if gui.backend.real else "virtual",
+        })
+
+    def turn(self, record: TurnRecord) -> None:
+        self.turns += 1
+        self.model_seconds += record.model_seconds
+        self.tool_seconds += record.tool_seconds
+        event = asdict(record)
+        event["response"] = _clip(record.response)
+        redact = self.recorder is not None and self.recorder.redact
+        for tool in event["tools"]:
+            tool["result"] = _clip(tool["result"])
+            if redact and registry.redacted(tool["name"]):
+                tool["args"] = _redact_args(tool["name"], tool["args"])
+                tool["result"] = _redacted(tool["result"])
+                tool["redacted"] = True
+        if redact:
+            for call in event["tool_calls"]:
+                call["args"] = _redact_args(call.get("name"), call.get("args") or {})
+        self._write({"event": "turn", **event})
+
+    def finish(self, result: dict, success: bool) -> None:
+        self._write({
+            "event": "end",
+            "time": time.time(),
+            "success": success,
+            "short_answer": result.get("short_answer"),
+            "explanation": _clip(str(result.get("explanation", ""))),
+            "turns": self.turns,
+            "seconds": round(gui.monotonic() - self.started, 3),
+            "model_seconds": round(self.model_seconds, 3),
+            "tool_seconds": round(self.tool_seconds, 3),
+        })
+
+    def _write(self, event: dict) -> None:
+        if self.recorder is not None:
+            self.recorder.write({"trajectory": self.trajectory_id, **event})
+
+class TrajectoryRecorder:
+    """
+    Appends trajectory events to one JSONL file per day; disabled recorders write nothing.
+    When a new day's file is started, files older than keep_days are deleted, then the
+    oldest ones until all fit in max_bytes; a day's file that outgrows max_bytes on its
+    own stops being written.
+    """
+
+    def __init__(self, path: Optional[Path] = None, enabled: bool = True, redact: bool = True,
+                 keep_days: int = 14, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path or Path.home() / ".airis" / "trajectories"
+        self.enabled = enabled
+        self.redact = redact
+        self.keep_days = keep_days
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._file = None
+        self._full = False
+        self.events = 0
+
+    def start(self, instruction: str, model: str) -> Trajectory:
+        """Opens the trajectory of an instruction."""
+        return Trajectory(self if self.enabled else None, instruction, model)
+
+    def write(self, event: dict) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        file = self.path / f"{datetime.now():%Y-%m-%d}.jsonl"
+        with self._lock:
+            try:
+                if file != self._file:
+                    self._file, self._full = file, False
+                    self.prune(keep=file)
+                if self._full or (file.exists() and file.stat().st_size >= self.max_bytes):
+                    if not self._full:
+                        print(f"Trajectory recorder: {file} reached {self.max_bytes // (1024 * 1024)} MB, not recording more today")
+                    self._full = True
+                    return
+                self.path.mkdir(parents=True, exist_ok=True)
+                with open(file, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self.events += 1
+            except OSError as e:
+                print(f"Trajectory recorder: could not write {file}: {e}")
+
+    def prune(self, keep: Optional[Path] = None) -> int:
+        """
+        Deletes trajectory files past the age and size limits, oldest first.
+
+        Args:
+            keep (Path, optional): File that is never deleted (the one being written)
+
+        Returns:
+            int: Number of files deleted
+        """
+        cutoff = (datetime.now() - timedelta(days=self.keep_days)).timestamp()
+        sizes = {file: file.stat().st_size for file in self.files()}
+        total = sum(sizes.values())
+        deleted = 0
+        for file, size in sizes.items():
+            if file == keep:
+                continue
+            if file.stat().st_mtime < cutoff or total > self.max_bytes:
+                file.unlink()
+                total -= size
+                deleted += 1
+        if deleted:
+            print(f"Trajectory recorder: deleted {deleted} old trajectory file(s)")
+        return deleted
+
+    def files(self) -> List[Path]:
+        return sorted(self.path.glob("*.jsonl")) if self.path.is_dir() else []
+
+trajectory_recorder = TrajectoryRecorder(
+    Path(env.trajectory_dir).expanduser() if env.trajectory_dir else None,
+    enabled=env.record_trajectories,
+    redact=not env.trajectory_full_text,
+    keep_days=env.trajectory_keep_days,
+    max_bytes=env.trajectory_max_mb * 1024 * 1024,
+)
+
+def load_trajectories(files: Iterable[Path]) -> List[dict]:
+    """
+    Reads trajectory events back into one dict per trajectory.
+
+    Args:
+        files (Iterable[Path]): JSONL files written by a TrajectoryRecorder
+
+    Returns:
+        List[dict]: Trajectories in start order, each the start event plus "turns"
+            (list of turn events) and "end" (the end event, None for an unfinished run)
+    """
+    trajectories: Dict[str, dict] = {}
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    print(f"Trajectory recorder: skipping unreadable line {number} of {file.name}")
+                    continue
+                trajectory = trajectories.setdefault(event["trajectory"], {"turns": [], "end": None})
+                kind = event.pop("event")
+                if kind == "start":
+                    trajectory.update(event)
+                elif kind == "turn":
+                    trajectory["turns"].append(event)
+                elif kind == "end":
+                    trajectory["end"] = event
+    return [t for t in trajectories.values() if "instruction" in t]
+
+def score(trajectory: dict) -> dict:
+    """
+    Re-scores a recorded trajectory.
+
+    Args:
+        trajectory (dict): A trajectory from load_trajectories()
+
+    Returns:
+        dict: Outcome, time split between model and tools, largest payload, failed tool
+            calls and screenshots that showed the same screen as the previous one
+    """
+    end = trajectory["end"] or {}
+    tools = [tool for turn in trajectory["turns"] for tool in turn["tools"]]
+    screens = [tool["screen"] for tool in tools if tool.get("screen")]
+    repeated = sum(1 for a, b in zip(screens, screens[1:]) if signature_distance(a, b) <= SAME_SCREEN_DISTANCE)
+    model_seconds = sum(turn["model_seconds"] for turn in trajectory["turns"])
+    tool_seconds = sum(turn["tool_seconds"] for turn in trajectory["turns"])
+    return {
+        "instruction": trajectory["instruction"],
+        "finished": bool(end),
+        "success": bool(end.get("success")),
+        "turns": len(trajectory["turns"]),
+        "seconds": end.get("seconds", round(model_seconds + tool_seconds, 3)),
+        "model_seconds": round(model_seconds, 3),
+        "tool_seconds": round(tool_seconds, 3),
+        "max_payload_kb": round(max((turn["payload_bytes"] for turn in trajectory["turns"]), default=0) / 1024, 1),
+        "tool_calls": len(tools),
+        "tool_errors": sum(1 for tool in tools if not tool["ok"]),
+        "screenshots": len(screens),
+        "repeated_screens": repeated,
+    }
+
+def report(trajectories: List[dict], slowest: int = 5) -> dict:
+    """Aggregates the scores of many trajectories and the per-tool latencies, printing a summary."""
+    if not trajectories:
+        print("No trajectories recorded.")
+        return {}
+    scores = [score(t) for t in trajectories]
+    per_tool = defaultdict(list)
+    failures = defaultdict(int)
+    for trajectory in trajectories:
+        for turn in trajectory["turns"]:
+            for tool in turn["tools"]:
+                per_tool[tool["name"]].append(tool["seconds"])
+                failures[tool["name"]] += not tool["ok"]
+    total = sum(s["seconds"] for s in scores)
+    summary = {
+        "trajectories": len(scores),
+        "success_rate": round(sum(s["success"] for s in scores) / len(scores), 3),
+        "unfinished": sum(not s["finished"] for s in scores),
+        "turns_per_task": round(sum(s["turns"] for s in scores) / len(scores), 2),
+        "seconds_per_task": round(total / len(scores), 2),
+        "model_share": round(sum(s["model_seconds"] for s in scores) / total, 3) if total else 0.0,
+        "repeated_screens": sum(s["repeated_screens"] for s in scores),
+        "tool_errors": sum(s["tool_errors"] for s in scores),
+    }
+    print(f"Trajectories: {summary}")
+    print("Tools by total time:")
+    for name, seconds in sorted(per_tool.items(), key=lambda item: -sum(item[1])):
+        typical = registry.latency(name)
+        print(f"  {name:24s} calls {len(seconds):5d}  total {sum(seconds):8.2f}s  "
+              f"mean {sum(seconds) / len(seconds):6.3f}s" + (f" (typical {typical:.2f}s)" if typical is not None else "")
+              + f"  errors {failures[name]}")
+    print("Slowest tasks:")
+    for s in sorted(scores, key=lambda s: -s["seconds"])[:slowest]:
+        print(f"  {s['seconds']:7.2f}s  {s['turns']:2d} turns  {s['repeated_screens']} repeated screens  {s['instruction'][:60]}")
+    return summary
+
+def replay(trajectory: dict, tool_map: Optional[dict] = None) -> dict:
+    """
+    Re-executes the tool calls of a trajectory on the current GUI backend, without the
+    model, and compares every screenshot with the recorded one. Calls recorded with
+    redacted arguments cannot be re-run and are skipped.
+
+    Args:
+        trajectory (dict): A trajectory from load_trajectories()
+        tool_map (dict, optional): Tools by name; defaults to the agent's tools
+
+    Returns:
+        dict: Calls run and skipped, errors now and when recorded, screens compared and matched, and seconds taken
+    """
+    if tool_map is None:
+        tool_map = registry.tool_map("agent")
+    start = gui.monotonic()
+    calls = skipped = errors = recorded_errors = compared = matched = 0
+    for turn in trajectory["turns"]:
+        for record in turn["tools"]:
+            if record.get("redacted"):
+                skipped += 1
+                continue
+            tool = tool_map.get(record["name"])
+            calls += 1
+            recorded_errors += not record["ok"]
+            if tool is None:
+                errors += 1
+                continue
+            try:
+                observation = tool.invoke(record["args"])
+            except Exception as e:
+                observation = f"Error: {e}"
+            errors += str(observation).startswith("Error")
+            screen = getattr(observation, "signature", None)
+            if screen and record.get("screen"):
+                compared += 1
+                matched += signature_distance(screen, record["screen"]) <= REPLAY_DISTANCE
+    return {
+        "instruction": trajectory["instruction"],
+        "calls": calls,
+        "skipped": skipped,
+        "errors": errors,
+        "recorded_errors": recorded_errors,
+        "screens_compared": compared,
+        "screens_matched": matched,
+        "seconds": round(gui.monotonic() - start, 3),
+    }
+
+if __name__ == "__main__":
+    # Re-score recorded trajectories:   python -m app.services.TrajectoryRecorder [report] [FILE ...]
+    # Re-execute one (drives the GUI!):  GUI_BACKEND=virtual python -m app.services.TrajectoryRecorder replay ID [FILE ...]
+    import sys
+
+    args = sys.argv[1:]
+    command = args.pop(0) if args and args[0] in ("report", "replay") else "report"
+    trajectory_id = args.pop(0) if command == "replay" and args else None
+    recorded = load_trajectories([Path(arg) for arg in args] or trajectory_recorder.files())
+
+    if command == "report":
+        report(recorded)
+    else:
+        found = [t for t in recorded if t["trajectory"] == trajectory_id]
+        if not found:
+            sys.exit(f"No trajectory '{trajectory_id}' in {trajectory_recorder.path}")
+        print(replay(found[0]))
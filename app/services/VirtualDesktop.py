@@ -0,0 +1,442 @@
+"""
+In-memory desktop simulator implementing the GUI backend interface.
+
+Windows, focus, typing, the Run dialog and a handful of apps (calculator, notepad,
+browser, file explorer, terminal) are modelled well enough for the agent tools to
+drive them; screenshots are rendered with PIL. Time runs on a virtual clock, so
+launch delays and waits cost nothing in wall time and thousands of simulated tasks
+can run in seconds.
+"""
+from dataclasses import dataclass, field
+from threading import RLock
+from typing import Callable, Dict, List, Optional, Set
+import ast
+import operator
+import zlib
+
+from PIL import Image, ImageDraw
+
+from app.services.GuiBackend import GuiBackend, Monitor
+
+SCREEN_SIZE = (1920, 1080)
+TITLE_BAR_HEIGHT = 32
+LINE_HEIGHT = 18
+# Virtual seconds between pressing Enter in the address bar and the page rendering
+PAGE_LOAD_DELAY = 0.6
+
+@dataclass
+class VirtualWindow:
+    """A window of the simulated desktop."""
+    app: str
+    title: str
+    x: int = 200
+    y: int = 120
+    width: int = 900
+    height: int = 600
+    text: str = ""
+    focus: str = ""  # what the keyboard is typing into: "" for the content, "address" for the address bar
+    address: str = ""
+    scroll: int = 0
+    # Background of the content area, e.g. a loaded web page; None keeps the app colour
+    fill: Optional[tuple] = None
+    # Clickable buttons as (label, x, y, width, height) relative to the window
+    buttons: List[tuple] = field(default_factory=list)
+    window_id: int = 0
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def button_at(self, x: int, y: int) -> Optional[str]:
+        for label, bx, by, width, height in self.buttons:
+            if self.x + bx <= x < self.x + bx + width and self.y + by <= y < self.y + by + height:
+                return label
+        return None
+
+@dataclass
+class AppSpec:
+    """How a launchable app behaves: window title, launch delay and Enter handling."""
+    title: str
+    launch_delay: float
+    on_enter: Optional[Callable[["VirtualDesktop", VirtualWindow], None]] = None
+    size: tuple = (900, 600)
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+
+def _evaluate(expression: str) -> str:
+    """Arithmetic of the calculator app, without eval()."""
+    def visit(node):
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](visit(node.operand))
+        raise ValueError("unsupported expression")
+    try:
+        value = visit(ast.parse(expression.replace("x", "*").replace("=", ""), mode="eval"))
+        return str(int(value)) if float(value).is_integer() else f"{value:g}"
+    except Exception:
+        return "Error"
+
+def _calculator_enter(desktop: "VirtualDesktop", window: VirtualWindow):
+    window.text = _evaluate(window.text)
+
+def _notepad_enter(desktop: "VirtualDesktop", window: VirtualWindow):
+    window.text += "\n"
+
+def _browser_enter(desktop: "VirtualDesktop", window: VirtualWindow):
+    if window.focus == "address":
+        url = window.address.strip()
+        window.focus = ""
+
+        def load():
+            tint = zlib.crc32(url.encode())
+            window.text = f"Page: {url}"
+            window.title = f"{url} - Browser"
+            window.fill = (128 + (tint & 0x7F), 128 + ((tint >> 8) & 0x7F), 128 + ((tint >> 16) & 0x7F))
+        desktop.schedule(PAGE_LOAD_DELAY, load)
+
+def _explorer_enter(desktop: "VirtualDesktop", window: VirtualWindow):
+    if window.focus == "address":
+        window.focus = ""
+        window.title = f"{window.address.strip()} - File Explorer"
+
+def _terminal_enter(desktop: "VirtualDesktop", window: VirtualWindow):
+    window.text += "\n> "
+
+BROWSER = AppSpec("New Tab - Browser", 1.2, _browser_enter, (1400, 900))
+APPS: Dict[str, AppSpec] = {
+    "calc": AppSpec("Calculator", 0.4, _calculator_enter, (320, 480)),
+    "notepad": AppSpec("Untitled - Notepad", 0.3, _notepad_enter),
+    "chrome": BROWSER,
+    "msedge": BROWSER,
+    "firefox": BROWSER,
+    "vivaldi": BROWSER,
+    "explorer": AppSpec("File Explorer", 0.5, _explorer_enter),
+    "cmd": AppSpec("Command Prompt", 0.3, _terminal_enter),
+}
+
+class VirtualDesktop(GuiBackend):
+    """
+    Simulated desktop. Input calls mutate the window list; screenshot() renders it.
+    sleep() only advances the virtual clock, and launched apps appear once the clock
+    passes their launch delay.
+    """
+    real = False
+
+    def __init__(self, size: tuple = SCREEN_SIZE, apps: Optional[Dict[str, AppSpec]] = None):
+        self.width, self.height = size
+        self.apps = apps if apps is not None else APPS
+        self.clock = 0.0
+        self.pause = 0.1
+        self.cursor = (self.width // 2, self.height // 2)
+        self.windows: List[VirtualWindow] = []  # z-order, last one has focus
+        self.clipboard = ""
+        self.actions = 0
+        self.clicked = None  # (app, button label) of the last button clicked
+        self._pending = []  # (ready_at, callback) run once the clock passes ready_at
+        self._next_id = 1
+        self._frame = None  # (state key, image) of the last rendered screenshot
+        self._lock = RLock()
+
+    # --- state -------------------------------------------------------------------------
+
+    @property
+    def focused(self) -> Optional[VirtualWindow]:
+        with self._lock:
+            self._tick()
+            return self.windows[-1] if self.windows else None
+
+    def find(self, app: str) -> Optional[VirtualWindow]:
+        """Topmost window of an app."""
+        with self._lock:
+            self._tick()
+            return next((w for w in reversed(self.windows) if w.app == app), None)
+
+    def reset(self):
+        """Closes every window and clears the clipboard; the clock keeps running."""
+        with self._lock:
+            self.windows.clear()
+            self._pending.clear()
+            self.clipboard = ""
+            self.clicked = None
+            self.cursor = (self.width // 2, self.height // 2)
+
+    def open_window(self, app: str, title: Optional[str] = None, **kwargs) -> VirtualWindow:
+        """Opens an app window immediately, e.g. to set up the starting screen of a task."""
+        spec = self.apps.get(app)
+        width, height = spec.size if spec else (900, 600)
+        with self._lock:
+            offset = 40 * (len(self.windows) % 8)
+            window = VirtualWindow(
+                app=app,
+                title=title or (spec.title if spec else app),
+                x=kwargs.pop("x", 200 + offset),
+                y=kwargs.pop("y", 120 + offset),
+                width=kwargs.pop("width", width),
+                height=kwargs.pop("height", height),
+                window_id=self._next_id,
+                **kwargs,
+            )
+            self._next_id += 1
+            self.windows.append(window)
+        return window
+
+    def close(self, window: VirtualWindow):
+        with self._lock:
+            if window in self.windows:
+                self.windows.remove(window)
+
+    def _raise(self, window: VirtualWindow):
+        self.windows.remove(window)
+        self.windows.append(window)
+
+    def schedule(self, delay: float, callback: Callable[[], None]):
+        """Runs a callback once the virtual clock has advanced by delay, e.g. an app finishing its launch."""
+        with self._lock:
+            self._pending.append((self.clock + delay, callback))
+
+    def launch(self, app: str):
+        """Starts an app; its window opens after the app's launch delay."""
+        self.schedule(self.apps[app].launch_delay, lambda: self.open_window(app))
+
+    def _tick(self):
+        # The lock is reentrant: callbacks may open windows or schedule more work
+        with self._lock:
+            ready = [item for item in self._pending if item[0] <= self.clock]
+            for item in ready:
+                self._pending.remove(item)
+                item[1]()
+
+    def _advance(self, seconds: float):
+        self.clock += max(0.0, seconds)
+        self._tick()
+
+    def _after_action(self, pause: bool):
+        self.actions += 1
+        if pause:
+            self._advance(self.pause)
+
+    # --- GuiBackend ----------------------------------------------------------------------
+
+    def set_pause(self, seconds: float):
+        self.pause = seconds
+
+    def get_pause(self) -> float:
+        return self.pause
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self._advance(seconds)
+
+    def monotonic(self) -> float:
+        return self.clock
+
+    def monitors(self) -> List[Monitor]:
+        return [Monitor(0, 0, self.width, self.height, 0, 0, self.width, self.height - 40, 1.0, True)]
+
+    def move_to(self, x: int, y: int, duration: float = 0.0):
+        with self._lock:
+            self._advance(duration)
+            self.cursor = (x, y)
+            self._after_action(True)
+
+    def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.0, button: str = "left", duration: float = 0.0):
+        with self._lock:
+            self._advance(duration + interval * max(0, clicks - 1))
+            self.cursor = (x, y)
+            target = next((w for w in reversed(self.windows) if w.contains(x, y)), None)
+            if target is not None and button == "left":
+                self._raise(target)
+                label = target.button_at(x, y)
+                if label is not None:
+                    self.clicked = (target.app, label)
+                # Clicking the top of a browser or explorer window focuses its address bar
+                if target.app in ("chrome", "msedge", "firefox", "vivaldi", "explorer") and y < target.y + TITLE_BAR_HEIGHT * 2:
+                    target.focus, target.address = "address", ""
+                else:
+                    target.focus = ""
+            self._after_action(True)
+
+    def drag_to(self, x: int, y: int, duration: float = 0.0, button: str = "left"):
+        with self._lock:
+            self._advance(duration)
+            start_x, start_y = self.cursor
+            target = next((w for w in reversed(self.windows) if w.contains(start_x, start_y)), None)
+            # Dragging a title bar moves the window
+            if target is not None and start_y < target.y + TITLE_BAR_HEIGHT:
+                target.x += x - start_x
+                target.y += y - start_y
+            self.cursor = (x, y)
+            self._after_action(True)
+
+    def scroll(self, clicks: int, x: int, y: int):
+        with self._lock:
+            target = next((w for w in reversed(self.windows) if w.contains(x, y)), None)
+            if target is not None:
+                target.scroll = max(0, target.scroll - clicks)
+            self._after_action(True)
+
+    def write(self, text: str, interval: float = 0.0, pause: bool = True):
+        with self._lock:
+            self._advance(interval * len(text))
+            self._type(text)
+            self._after_action(pause)
+
+    def press(self, key: str, presses: int = 1, interval: float = 0.0, pause: bool = True):
+        with self._lock:
+            for _ in range(presses):
+                self._press(key.lower())
+            self._advance(interval * max(0, presses - 1))
+            self._after_action(pause)
+
+    def hotkey(self, *keys: str, pause: bool = True):
+        with self._lock:
+            self._hotkey(tuple(key.lower() for key in keys))
+            self._after_action(pause)
+
+    def screenshot(self) -> Image.Image:
+        with self._lock:
+            self._tick()
+            # Rendering text dominates the cost; polling loops mostly see an unchanged screen
+            key = (self.cursor, tuple(
+                (w.window_id, w.title, w.x, w.y, w.width, w.height, w.text, w.focus, w.address, w.scroll, w.fill, tuple(w.buttons))
+                for w in self.windows
+            ))
+            if self._frame is None or self._frame[0] != key:
+                self._frame = (key, self._render())
+            return self._frame[1].copy()
+
+    def _render(self) -> Image.Image:
+        image = Image.new("RGB", (self.width, self.height), (32, 64, 96))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([0, self.height - 40, self.width, self.height], fill=(20, 20, 20))
+        for window in self.windows:
+            # Each app gets its own colour so window changes are visible in image hashes
+            tint = zlib.crc32(window.app.encode()) & 0xFFFFFF
+            body = (200 + (tint & 0x1F), 200 + ((tint >> 8) & 0x1F), 200 + ((tint >> 16) & 0x1F))
+            bar = (tint & 0x7F, (tint >> 8) & 0x7F, (tint >> 16) & 0x7F)
+            right, bottom = window.x + window.width, window.y + window.height
+            draw.rectangle([window.x, window.y, right, bottom], fill=body, outline=(0, 0, 0))
+            draw.rectangle([window.x, window.y, right, window.y + TITLE_BAR_HEIGHT], fill=bar)
+            draw.text((window.x + 8, window.y + 9), window.title, fill=(255, 255, 255))
+            if window.fill:
+                # Shaded from left to right: a flat fill would not change the image's dHash
+                steps = 16
+                for i in range(steps):
+                    left = window.x + 1 + (window.width - 2) * i // steps
+                    shade = tuple(c * (steps - i) // steps for c in window.fill)
+                    draw.rectangle([left, window.y + TITLE_BAR_HEIGHT, left + (window.width - 2) // steps, bottom - 1], fill=shade)
+            top = window.y + TITLE_BAR_HEIGHT + 8
+            if window.focus == "address" or window.address:
+                draw.rectangle([window.x + 8, top, right - 8, top + 24], fill=(255, 255, 255), outline=(0, 0, 0))
+                draw.text((window.x + 14, top + 6), window.address, fill=(0, 0, 0))
+                top += 32
+            lines = window.text.split("\n")[window.scroll:]
+            for i, line in enumerate(lines[: max(0, (bottom - top) // LINE_HEIGHT)]):
+                draw.text((window.x + 12, top + i * LINE_HEIGHT), line, fill=(0, 0, 0))
+                # A solid bar per line keeps text changes visible at thumbnail size
+                draw.rectangle([window.x + 12, top + i * LINE_HEIGHT + 14, window.x + 12 + 9 * len(line), top + i * LINE_HEIGHT + 16], fill=(0, 0, 0))
+            for label, bx, by, width, height in window.buttons:
+                left, top = window.x + bx, window.y + by
+                draw.rectangle([left, top, left + width, top + height], fill=(235, 235, 235), outline=(90, 90, 90))
+                draw.text((left + 8, top + (height - 10) // 2), label, fill=(0, 0, 0))
+        x, y = self.cursor
+        draw.polygon([(x, y), (x + 12, y + 12), (x, y + 17)], fill=(255, 255, 255), outline=(0, 0, 0))
+        return image
+
+    def window_titles(self) -> Optional[Set[str]]:
+        with self._lock:
+            self._tick()
+            return {window.title for window in self.windows}
+
+    def active_window_title(self) -> str:
+        focused = self.focused
+        return focused.title if focused else ""
+
+    def clipboard_get(self) -> Optional[str]:
+        return self.clipboard
+
+    def clipboard_set(self, text: str):
+        self.clipboard = text
+
+    # --- keyboard ------------------------------------------------------------------------
+
+    def _type(self, text: str):
+        window = self.focused
+        if window is None:
+            return
+        if window.focus == "address":
+            window.address += text
+        else:
+            window.text += text
+
+    def _press(self, key: str):
+        window = self.focused
+        if window is None:
+            return
+        if key == "enter":
+            self._enter(window)
+        elif key == "backspace":
+            if window.focus == "address":
+                window.address = window.address[:-1]
+            else:
+                window.text = window.text[:-1]
+        elif key in ("esc", "escape"):
+            if window.app in ("run", "save"):
+                self.close(window)
+            else:
+                window.focus = ""
+        elif key == "tab":
+            self._type("\t")
+        elif key == "space":
+            self._type(" ")
+        elif len(key) == 1:
+            self._type(key)
+
+    def _enter(self, window: VirtualWindow):
+        if window.app == "run":
+            self.close(window)
+            command = window.text.strip().lower()
+            if command in self.apps:
+                self.launch(command)
+        elif window.app == "save":
+            self.close(window)
+            owner = self.focused
+            if owner is not None and window.text.strip():
+                owner.title = f"{window.text.strip()} - {owner.title.split(' - ')[-1]}"
+        else:
+            spec = self.apps.get(window.app)
+            if spec and spec.on_enter:
+                spec.on_enter(self, window)
+
+    def _hotkey(self, keys: tuple):
+        window = self.focused
+        if keys == ("win", "r"):
+            self.open_window("run", "Run", width=420, height=180)
+        elif keys == ("win", "e"):
+            self.launch("explorer")
+        elif keys == ("alt", "tab"):
+            if len(self.windows) > 1:
+                self._raise(self.windows[-2])
+        elif window is None:
+            return
+        elif keys == ("ctrl", "l") and window.app in ("chrome", "msedge", "firefox", "vivaldi", "explorer"):
+            window.focus, window.address = "address", ""
+        elif keys == ("ctrl", "a"):
+            pass  # selection is implicit: copy and cut act on the whole field
+        elif keys == ("ctrl", "c"):
+            self.clipboard = window.address if window.focus == "address" else window.text
+        elif keys == ("ctrl", "x"):
+            self.clipboard, window.text = window.text, ""
+        elif keys == ("ctrl", "v"):
+            self._type(self.clipboard)
+        elif keys == ("ctrl", "s"):
+            self.open_window("save", "Save As", width=600, height=400)
+        elif keys in (("alt", "f4"), ("ctrl", "w")):
+            self.close(window)
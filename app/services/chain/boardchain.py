@@ -1,8 +1,11 @@
 from app.utils.prepareimage import prepare_images
+from app.services.ContextCacheService import context_cache
+from app.utils.tokenbudget import budget_for
+from app.utils.tracing import traced, tracer
+from app.services.DisplayGeometry import display
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda
 # from pydantic import BaseModel, Field
-import pyautogui
 import subprocess
 import re
 import sys
@@ -277,34 +280,48 @@ class BoardChain:
         self.secondary_llm = secondary_llm
 
     def __call__(self, input: str):
+        canvas_size = str(display.size())
+        module = "Pillow (PIL)"
+        draw_prefix = context_cache.prefix(
+            "board", SYSTEM_PROMPT.format(module=module, canvas_size=canvas_size), llm=self.secondary_llm
+        )
+        optimize_prefix = context_cache.prefix(
+            "board-optimize", SYSTEM_PROMPT_OPTIMIZE_CODE, llm=self.secondary_llm
+        )
+        
+        budget = budget_for("board")
         
         self.chain = (
-            BoardChain.get_base_prompt() 
-            | self.secondary_llm
-            | {"input": RunnableLambda(lambda x: self._parsing_python_and_exec_overlay(x.content, executing=False))}
-            | BoardChain.get_base_prompt(SYSTEM_PROMPT_OPTIMIZE_CODE, with_image=False)
-            | self.secondary_llm
+            BoardChain.get_base_prompt(cached=draw_prefix.remote) 
+            | RunnableLambda(budget.fit_prompt)
+            | context_cache.bind(self.secondary_llm, draw_prefix)
+            | {"input": RunnableLambda(lambda x: budget.require_fit(self._parsing_python_and_exec_overlay(x.content, executing=False)))}
+            | BoardChain.get_base_prompt(SYSTEM_PROMPT_OPTIMIZE_CODE, with_image=False, cached=optimize_prefix.remote)
+            | RunnableLambda(budget.fit_prompt)
+            | context_cache.bind(self.secondary_llm, optimize_prefix)
             | RunnableLambda(lambda x: self._parsing_python_and_exec_overlay(x.content, executing=True))
             )
         res = self.chain.invoke(
             {
             "input": input, 
-            "canvas_size": str(pyautogui.size()),
-            "module": "Pillow (PIL)"
-            }
+            "canvas_size": canvas_size,
+            "module": module
+            },
+            config={"callbacks": tracer.callbacks()}
         )
+        print(f"Context cache: {context_cache.stats()}")
         return res
     
     def custom_call(self, input: str):
         self.chain = BoardChain.get_dev_prompt() | self.llm
         res = self.chain.invoke({
             "input": input, 
-            "canvas_size": str(pyautogui.size()),
+            "canvas_size": str(display.size()),
         })
         self.second_chain = BoardChain.get_base_prompt() | self.secondary_llm
         res_2 = self.chain.invoke({
             "input": input, 
-            "canvas_size": str(pyautogui.size()),
+            "canvas_size": str(display.size()),
             "module": "Pillow (PIL)",
             "info": res.content
         })
@@ -330,10 +347,14 @@ class BoardChain:
         
 
     @staticmethod
-    def get_base_prompt(prompt = SYSTEM_PROMPT, with_image: bool = True):
+    @traced("prompt.board")
+    def get_base_prompt(prompt = SYSTEM_PROMPT, with_image: bool = True, cached: bool = False):
         user_content = [{"type": "text", "text": "{input}"}]
         if with_image:
             user_content.append(prepare_images())
+        # A provider-cached prefix already holds the system prompt
+        if cached:
+            return ChatPromptTemplate.from_messages([("user", user_content)])
         return ChatPromptTemplate.from_messages(
         [
             ("system", prompt),
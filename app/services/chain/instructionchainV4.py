@@ -5,12 +5,30 @@ from langchain_core.messages import AIMessage
 from langchain_core.messages import AnyMessage
 from typing_extensions import TypedDict
 from typing import List, Optional, Annotated, Union, Literal
-from app.services.AutoGuiV4 import ToolBox
+from app.services.ContextCacheService import context_cache, _model_name
+from app.services.ToolRegistry import registry
+from app.services.ToolSelector import ToolSelector, RequestTools
+from app.services.ToolScheduler import ToolScheduler
+from app.services.ActionOptimizer import ActionOptimizer
+from app.services.PlanCache import CachedPlan, PlanCache, plan_cache
+from app.services.TrajectoryRecorder import ToolRecord, Trajectory, TrajectoryRecorder, TurnRecord, trajectory_recorder
+from app.services.GuiBackend import gui
+from app.utils.deadline import BudgetExceeded, call_with_deadline, expired, remaining, time_budget
+from app.utils.screensignature import screen_signature
+from app.utils.tokenbudget import budget_for
+from app.utils.tracing import span, tracer
+from app.utils.messagecompaction import compact_messages, payload_size
+from app.utils.observation import observation_messages
+from app.utils.toolschemas import tool_schemas, toolset_key
+from langchain_core.runnables import RunnableLambda
 from operator import add
 from langchain_core.messages import HumanMessage
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, AnyMessage
+from dataclasses import dataclass, asdict
 import json
+import re
 from uuid import uuid4
+from config.setting import env
 
 SYSTEM_PROMPT = """
 You are an advanced desktop automation assistant. Your goal is to accomplish tasks with maximum efficiency by planning ahead and calling multiple tools at once.
@@ -22,12 +40,15 @@ Your default behavior is to plan a complete, predictable sequence of actions fir
 Follow this sequence rigorously:
 1.  **OBSERVE**: Use `ShowScreen` ONCE at the beginning to understand the initial state of the desktop.
 2.  **PLAN THE ENTIRE SEQUENCE**: Think step-by-step and identify the full list of **raw tool calls** needed to complete the task. For example, to "open calculator and type 3+3", you need `OpenApplication` first, then `WaitAndObserve`, then `KeyboardWriteText`.
-3.  **EXECUTE THE SEQUENCE**: Generate the entire list of tool calls in order in your response. The system will run them for you.
+3.  **EXECUTE THE SEQUENCE**: Call all the tools in order in your response, using function calls rather than writing them as text. The system will run them for you.
 4.  **VERIFY**: AFTER the full sequence has been executed by the system, use `ShowScreen` in the *next* turn to confirm the final result.
+5.  **REPORT**: Finish with an answer that calls no tools. If the task could not be completed, start that answer with `FAILED:`.
+
+**CLICKING**: `ShowScreen` outlines clickable regions with numbered labels. To click one, call `ClickMark` with its number instead of estimating pixel coordinates; use `CursorMoveAndClick` only for targets without a mark, with coordinates read off the screenshot (they are mapped to the screen for you).
 
 **EXAMPLE TASK: "open my calculator and type 3 + 3"**
 
-Your first response should be a multi-tool call like this:
+Your first response should call these tools, in this order:
 ```json
 {{
   "tool_calls": [
@@ -50,110 +71,454 @@ This allows you to open the app and type the numbers all in one step, without ne
 Begin!
 """
 
+# A new model turn is not started with less budget left than this (or than the usual model latency)
+MIN_TURN_SECONDS = 2.0
+# Weight of the newest model latency in its moving average
+LATENCY_ALPHA = 0.3
+# Chat models (by _llm_type) that take a per-request `timeout` in seconds as a call argument
+REQUEST_TIMEOUT_MODELS = {"chat-google-generative-ai", "azure-openai-chat"}
+# A model call failing with less budget left than this was cut off by its request timeout
+REQUEST_TIMEOUT_SLACK = 1.0
+
 class GraphState(TypedDict):
     messages: Annotated[List[AnyMessage], add]
 
+@dataclass
+class AgentStats:
+    """Cumulative counters of the agent loop, used to compare tool-call strategies."""
+    tasks: int = 0
+    turns: int = 0
+    native_calls: int = 0
+    text_calls: int = 0
+    parse_failures: int = 0
+    replays: int = 0
+    budget_stops: int = 0
+
+    def summary(self) -> dict:
+        return {
+            **asdict(self),
+            "turns_per_task": round(self.turns / self.tasks, 2) if self.tasks else 0.0,
+            "parse_failure_rate": round(self.parse_failures / self.turns, 3) if self.turns else 0.0,
+        }
+
+def _content_text(message: AIMessage) -> str:
+    """Text of a message whose content may be a string or a list of content parts."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in message.content
+        if isinstance(part, str) or part.get("type") == "text"
+    )
+
+def _takes_request_timeout(llm) -> bool:
+    # A recording cassette forwards call arguments to the model it wraps
+    model = getattr(llm, "inner", None) or llm
+    return model._llm_type in REQUEST_TIMEOUT_MODELS
+
+def _with_request_timeout(model):
+    """Calls the model with the remaining budget as its request timeout, so a hung HTTP request ends with the budget."""
+    def call(prompt, config):
+        left = remaining()
+        if left is None:
+            return model.invoke(prompt, config)
+        return model.invoke(prompt, config, timeout=max(left, 0.1))
+    return RunnableLambda(call, name="model_with_request_timeout")
+
+def _is_error(message) -> bool:
+    return str(message.content).startswith("Error")
+
+# Short answer of a task the agent completed
+SUCCESS_ANSWER = "Jobs Done!"
+# Final answers starting with this marker (as the prompt asks) report a failed task
+FAILURE_MARKER = "FAILED:"
+# Phrases in a final answer that suggest the task was not accomplished
+FAILURE_PHRASES = re.compile(r"\b(could not|couldn't|unable to|was not able|wasn't able|failed to|did not succeed)\b", re.IGNORECASE)
+
+def _reports_failure(text: str) -> bool:
+    """Whether a final answer says the task failed; such runs are not cached as plans."""
+    return text.lstrip().upper().startswith(FAILURE_MARKER) or bool(FAILURE_PHRASES.search(text))
+
 class EnhancedInstructionChain:
-    def __init__(self, llm, max_iterations: int = 10):
+    def __init__(self, llm, max_iterations: int = 10, keep_observations: int = 2, keep_turns: int = 3, select_tools: bool = True, toolset: str = "agent", plans: Optional[PlanCache] = plan_cache, time_budget: Optional[float] = env.agent_time_budget, trajectories: Optional[TrajectoryRecorder] = trajectory_recorder):
         self.llm = llm
         self.max_iterations = max_iterations
+        # Seconds per instruction, shared by model calls and tools; None or 0 means unlimited
+        self.time_budget = time_budget
+        # Moving average of the model call latency, to tell whether another turn fits the budget
+        self._model_latency = None
+        # Compaction policy applied to the history before every turn
+        self.keep_observations = keep_observations
+        self.keep_turns = keep_turns
+        self.stats = AgentStats()
         self.prompt = ChatPromptTemplate.from_messages(
             [
-                ("system", SYSTEM_PROMPT),
+                ("system", "{system}"),
                 MessagesPlaceholder(variable_name="messages"),
             ]
         )
-        # Create a dictionary to look up tools by name
-        self.tool_map = {tool.name: tool for tool in ToolBox}
+        self.cached_prompt = ChatPromptTemplate.from_messages(
+            [MessagesPlaceholder(variable_name="messages")]
+        )
+        # Registry toolset of this chain; the tools are imported on the first instruction
+        self.toolset = toolset
+        self.select_tools = select_tools
+        self._tool_selector = None
+        self._tool_map = None
+        # Rewrites the tool calls of a turn into fewer, cheaper actions before they run
+        self.optimizer = ActionOptimizer()
+        # Runs the tool calls of a turn, overlapping the ones that do not touch the GUI
+        self.scheduler = ToolScheduler()
+        # Successful tool sequences replayed for repeated instructions; None disables replay
+        self.plans = plans
+        # Compiled chains keyed by (model, toolset, cached prefix)
+        self._chains = {}
+        # Structured record of every run; None records nothing
+        self.trajectories = trajectories or TrajectoryRecorder(enabled=False)
+        # Seconds taken and screen hash of each executed tool call, by call id
+        self._tool_runs = {}
+
+    @property
+    def tool_selector(self) -> Optional[ToolSelector]:
+        """Picks the tools bound for each task; None binds the whole toolset."""
+        if self._tool_selector is None and self.select_tools:
+            self._tool_selector = ToolSelector(registry.toolset(self.toolset))
+        return self._tool_selector
+
+    @property
+    def tool_map(self) -> dict:
+        """Every tool the loop may execute, by name."""
+        if self._tool_map is None:
+            self._tool_map = registry.tool_map(self.toolset)
+        return self._tool_map
 
     def __call__(self, input_str: str):
         """
-        Executes the agent loop.
+        Executes the agent loop within the time budget, recording its trajectory.
         """
-        # 1. Bind tools to the LLM
-        llm_with_tools = self.llm.bind_tools(ToolBox)
-        
-        # 2. Set up the main chain
-        chain = self.prompt | llm_with_tools
+        trajectory = self.trajectories.start(input_str, _model_name(self.llm))
+        try:
+            with time_budget(self.time_budget):
+                result = self._run(input_str, trajectory)
+        except Exception as e:
+            trajectory.finish({"short_answer": "Error", "explanation": repr(e)}, success=False)
+            raise
+        trajectory.finish(result, success=result["short_answer"] == SUCCESS_ANSWER)
+        return result
 
-        # 3. Initialize the state
+    def _run(self, input_str: str, trajectory: Trajectory):
+        # 1. Pick the tools relevant to the task
+        tools = self.tool_selector.select(input_str) if self.tool_selector else registry.toolset(self.toolset)
+        if self.tool_selector:
+            print(f"Tool selector: {[t.name for t in tools]} {self.tool_selector.stats()}")
+
+        # 2. Initialize the state
         messages = [HumanMessage(content=input_str)]
+        executed = []
+
+        # Replay a cached plan when this instruction already succeeded from a similar screen
+        start_signature = self._screen_signature() if self.plans else None
+        plan = self.plans.lookup(input_str, start_signature) if start_signature else None
+        if plan:
+            result = self._replay(plan, trajectory)
+            if result:
+                return result
+            # The replayed steps ran; a plan stored from this run must include them
+            executed = [{**call, "id": str(uuid4())} for call in plan.tool_calls]
+            steps = ", ".join(call["name"] for call in plan.tool_calls)
+            messages = [HumanMessage(content=(
+                f"{input_str}\n\n(A previously successful sequence was replayed but the screen does not look as "
+                f"expected. Replayed steps: {steps}. Check the screen and finish the task.)"
+            ))]
         
-        # 4. Start the agent loop
+        # 3. Start the agent loop
         for i in range(self.max_iterations):
             print(f"--- Turn {i+1} ---")
+            turn_start = gui.monotonic()
+
+            # Stop rather than start a turn the budget cannot pay for
+            left = remaining()
+            if left is not None and left < self._turn_estimate():
+                return self._stop_for_budget(i, executed)
+
+            # 4. Get the compiled chain for the current toolset; its static prefix
+            #    (system prompt + tool schemas) is registered in the context cache
+            system = SYSTEM_PROMPT.format() + (self.tool_selector.catalogue(tools) if self.tool_selector else "")
+            prefix = context_cache.prefix("agent", system, tools=tools, llm=self.llm)
+            chain = self._get_chain(prefix, tools)
             
-            # 5. Call the LLM
-            response = chain.invoke({"messages": messages})
+            # 5. Call the LLM with a compacted view of the history
+            compacted = compact_messages(messages, self.keep_observations, self.keep_turns)
+            payload, history = payload_size(compacted), payload_size(messages)
+            print(f"Turn payload: {payload / 1024:.1f} KB (full history {history / 1024:.1f} KB)")
+            try:
+                response = call_with_deadline(chain.invoke, {"system": system, "messages": compacted}, config={"callbacks": tracer.callbacks()})
+            except BudgetExceeded as e:
+                print(f"--- Model call cancelled: {e} ---")
+                return self._stop_for_budget(i + 1, executed)
+            except Exception as e:
+                left = remaining()
+                if left is None or left > REQUEST_TIMEOUT_SLACK:
+                    raise
+                print(f"--- Model request timed out with the budget: {type(e).__name__}: {e} ---")
+                return self._stop_for_budget(i + 1, executed)
+            model_seconds = gui.monotonic() - turn_start
+            self._model_latency = model_seconds if self._model_latency is None else (
+                LATENCY_ALPHA * model_seconds + (1 - LATENCY_ALPHA) * self._model_latency
+            )
+            context_cache.record_usage(response)
             print(response)
             
-            # 6. Add the AI's response to the message history
-            messages.append(response)
+            # 6. Extract tool calls: native structured calls first, JSON in the text as fallback
+            tool_calls = self._extract_tool_calls(response)
+            usage = response.usage_metadata or {}
+            record = TurnRecord(
+                index=i + 1,
+                messages=len(compacted),
+                payload_bytes=payload,
+                history_bytes=history,
+                model_seconds=round(model_seconds, 3),
+                response=_content_text(response),
+                tool_calls=[{"name": call["name"], "args": call.get("args", {})} for call in tool_calls],
+                input_tokens=usage.get("input_tokens"),
+                output_tokens=usage.get("output_tokens"),
+                bound_tools=[tool.name for tool in tools],
+            )
             
-            tool_calls = []
-            # 7. CORRECTED LOGIC: Try to extract and parse JSON
-            try:
-                json_str = response.content[response.content.find('{') : response.content.rfind('}') + 1]
-                data = json.loads(json_str)
-                tool_calls = data.get("tool_calls", [])
-
-            except (ValueError, json.JSONDecodeError):
-                print("--- Final Answer (No valid tool calls found) ---")
-                return {
-                    "short_answer": "Jobs Done!",
-                    "explanation": response.content # Return the final text content
-                }
+            # 7. Add the AI's response to the message history, carrying the calls it made
+            if tool_calls and not response.tool_calls:
+                response = response.model_copy(update={"tool_calls": tool_calls})
+            messages.append(response)
 
             # 8. Check if the response has tool calls
             if not tool_calls:
                 # If tool_calls is empty, the conversation is over
                 print("--- Final Answer ---")
+                trajectory.turn(record)
+                self._finish_task(turns=i + 1)
+                answer = _content_text(response)
+                if _reports_failure(answer):
+                    print("--- Final answer reports a failure; not caching the plan ---")
+                elif start_signature and executed:
+                    end_signature = self._screen_signature()
+                    if end_signature:
+                        self.plans.store(input_str, start_signature, end_signature, executed)
                 return {
-                    "short_answer": "Jobs Done!",
-                    "explanation": response.content # Return the final text content
+                    "short_answer": "Task failed." if answer.lstrip().upper().startswith(FAILURE_MARKER) else SUCCESS_ANSWER,
+                    "explanation": answer # Return the final text content
                 }
 
             print(f"Tool calls: {tool_calls}")
-            
-            import uuid 
-            for tool_call in tool_calls:
-                if "id" not in tool_call or not tool_call["id"]:
-                    tool_call["id"] = str(uuid.uuid4())
-
-            # 9. Execute the requested tool calls
-            for tool_call in tool_calls:
-                tool_name = tool_call.get("name")
-                tool_call_id = tool_call["id"]
-                    
-                if tool_name in self.tool_map:
-                    try:
-                        tool_to_call = self.tool_map[tool_name]
-                        tool_args = tool_call.get("args", {})
-                        observation = tool_to_call.invoke(tool_args)
-                        
-                        # 10. Add the tool's output to the message history
-                        messages.append(
-                            ToolMessage(
-                                content=str(observation), 
-                                tool_call_id=tool_call_id
-                            )
-                        )
-                    except Exception as e:
-                        print(f"Error executing tool {tool_name}: {e}")
-                        messages.append(
-                            ToolMessage(
-                                content=f"Error: {e}", 
-                                tool_call_id=tool_call.get("id")
-                            )
-                        )
-                else:
-                    print(f"Tool {tool_name} not found.")
-                    messages.append(
-                        ToolMessage(
-                            content=f"Error: Tool '{tool_name}' not found.",
-                            tool_call_id=tool_call.get("id"),
-                        )
-                    )
 
+            # Enable the tools the model asked for, or called without having them bound
+            if self.tool_selector:
+                requested = [name for call in tool_calls if call.get("name") == RequestTools.name
+                             for name in call.get("args", {}).get("tool_names", [])]
+                requested += [call.get("name") for call in tool_calls]
+                tools = self.tool_selector.expand(tools, requested)
+
+            # 9. Optimize the calls (batch keystrokes, merge waits, drop unseen screenshots),
+            #    then execute them; non-GUI tools may run concurrently
+            actions = self.optimizer.optimize(tool_calls)
+            runnable = [action for action in actions if action.call is not None]
+            results = iter(self.scheduler.run([action.call for action in runnable], self._execute_tool_call))
+
+            # 10. Answer every original call in order (images as image parts)
+            for action in actions:
+                if action.call is None:
+                    messages.extend(action.answer())
+                    continue
+                tool_messages = next(results)
+                messages.extend(action.answer(tool_messages))
+                record.tools.append(self._tool_record(action.call, tool_messages))
+                if not _is_error(tool_messages[0]):
+                    executed.append(action.call)
+
+            # 11. Report the turn's share of the budget; verify next turn only if one still fits
+            tool_seconds = gui.monotonic() - turn_start - model_seconds
+            record.tool_seconds = round(tool_seconds, 3)
+            trajectory.turn(record)
+            left = remaining()
+            print(f"Turn budget: model {model_seconds:.1f}s, tools {tool_seconds:.1f}s, "
+                  + (f"{left:.1f}s of {self.time_budget:g}s left" if left is not None else "no time budget"))
+            if left is not None and left < self._turn_estimate():
+                return self._stop_for_budget(i + 1, executed)
+
+        self._finish_task(turns=self.max_iterations)
         return {"short_answer": "Max iterations reached.", "explanation": "The agent could not finish the task in time."}
 
+    def _turn_estimate(self) -> float:
+        """Seconds the next model turn is expected to take."""
+        return max(MIN_TURN_SECONDS, self._model_latency or 0.0)
+
+    def _stop_for_budget(self, turns: int, executed: list) -> dict:
+        """Ends the task once the time budget cannot pay for another turn."""
+        print("--- Time budget used up ---")
+        self.stats.budget_stops += 1
+        self._finish_task(turns=turns)
+        steps = ", ".join(call["name"] for call in executed) or "none"
+        return {
+            "short_answer": "Time budget used up.",
+            "explanation": f"Stopped after {turns} turn(s) to stay within {self.time_budget:g}s. Executed steps: {steps}."
+                           + (" The result was not verified." if executed else ""),
+        }
+
+    def _replay(self, plan: CachedPlan, trajectory: Trajectory) -> Optional[dict]:
+        """
+        Runs a cached plan without the model and verifies the result with a single screen
+        check. Returns the final answer, or None when the replay did not reach the expected screen.
+        """
+        print(f"--- Replaying cached plan ({len(plan.tool_calls)} steps) ---")
+        calls = [{**call, "id": str(uuid4())} for call in plan.tool_calls]
+        start = gui.monotonic()
+        with span("agent.replay", steps=len(calls)):
+            results = self.scheduler.run(calls, self._execute_tool_call)
+        trajectory.turn(TurnRecord(
+            index=0, messages=0, payload_bytes=0, history_bytes=0, model_seconds=0.0, response="",
+            tool_calls=plan.tool_calls,
+            tools=[self._tool_record(call, tool_messages) for call, tool_messages in zip(calls, results)],
+            tool_seconds=round(gui.monotonic() - start, 3),
+            replayed=True,
+        ))
+        signature = self._screen_signature()
+        failed = any(_is_error(tool_messages[0]) for tool_messages in results)
+        verified = self.plans.verify(plan, None if failed else signature)
+        print(f"Plan cache: {self.plans.stats()}")
+        if not verified:
+            print("--- Cached plan did not verify, falling back to the model ---")
+            return None
+        self.stats.replays += 1
+        self._finish_task(turns=0)
+        return {
+            "short_answer": SUCCESS_ANSWER,
+            "explanation": "Replayed a cached plan: " + ", ".join(call["name"] for call in plan.tool_calls),
+        }
+
+    @staticmethod
+    def _screen_signature() -> Optional[str]:
+        try:
+            return screen_signature()
+        except Exception as e:
+            print(f"Could not capture the screen signature: {e}")
+            return None
+
+    def _execute_tool_call(self, tool_call: dict) -> list:
+        """Runs one tool call and returns the messages answering it."""
+        tool_name = tool_call.get("name")
+        tool_call_id = tool_call["id"]
+        if expired():
+            return [ToolMessage(content=f"Error: Skipped {tool_name}, the time budget is used up.", tool_call_id=tool_call_id, name=tool_name)]
+        if tool_name not in self.tool_map:
+            print(f"Tool {tool_name} not found.")
+            return [ToolMessage(content=f"Error: Tool '{tool_name}' not found.", tool_call_id=tool_call_id, name=tool_name)]
+        try:
+            start = gui.monotonic()
+            with span(f"tool.{tool_name}"):
+                observation = self.tool_map[tool_name].invoke(tool_call.get("args", {}))
+            self._tool_runs[tool_call_id] = (gui.monotonic() - start, getattr(observation, "signature", None))
+            # Truncated once as it enters the history, rather than on every later turn
+            if isinstance(observation, str):
+                observation = budget_for("agent").fit_text(observation)
+            return observation_messages(observation, tool_call_id, tool_name)
+        except Exception as e:
+            print(f"Error executing tool {tool_name}: {e}")
+            return [ToolMessage(content=f"Error: {e}", tool_call_id=tool_call_id, name=tool_name)]
+
+    def _tool_record(self, tool_call: dict, tool_messages: list) -> ToolRecord:
+        """Trajectory entry of an executed call, from its answer and the timing taken while it ran."""
+        seconds, screen = self._tool_runs.pop(tool_call["id"], (0.0, None))
+        return ToolRecord(
+            name=tool_call["name"],
+            args=tool_call.get("args", {}),
+            seconds=round(seconds, 3),
+            ok=not _is_error(tool_messages[0]),
+            result=str(tool_messages[0].content),
+            screen=screen,
+        )
+
+    def _get_chain(self, prefix, tools):
+        """
+        Returns the compiled chain for a (model, toolset, cached prefix), building it once.
+
+        A provider-cached prefix already carries the system prompt and tools; otherwise the
+        pre-serialized tool schemas are bound to the model. The token budget trims the
+        message list before every call, and models that take one get the remaining time
+        budget as their request timeout.
+        """
+        key = (_model_name(self.llm), toolset_key(tools), prefix.cache_name if prefix.remote else None)
+        chain = self._chains.get(key)
+        if chain is None:
+            budget = RunnableLambda(budget_for("agent").fit_prompt)
+            if prefix.remote:
+                prompt, model = self.cached_prompt, context_cache.bind(self.llm, prefix)
+            else:
+                prompt, model = self.prompt, self.llm.bind_tools(tool_schemas(tools))
+            if _takes_request_timeout(self.llm):
+                model = _with_request_timeout(model)
+            chain = prompt | budget | model
+            self._chains[key] = chain
+        return chain
+
+    def _extract_tool_calls(self, response: AIMessage) -> list:
+        """
+        Returns the tool calls of a model response.
+        Native `tool_calls` are used when present; otherwise a {"tool_calls": [...]}
+        JSON object written in the text is parsed as a fallback.
+        """
+        if response.tool_calls:
+            self.stats.native_calls += len(response.tool_calls)
+            return [{**call, "id": call.get("id") or str(uuid4())} for call in response.tool_calls]
+
+        text = _content_text(response)
+        if "{" not in text:
+            return []
+        fenced = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
+        json_str = fenced.group(1) if fenced else text[text.find('{') : text.rfind('}') + 1]
+        try:
+            data = json.loads(json_str)
+        except ValueError:
+            self.stats.parse_failures += 1
+            print("--- Could not parse tool calls from the response text ---")
+            return []
+
+        tool_calls = data.get("tool_calls", []) if isinstance(data, dict) else []
+        tool_calls = [
+            {"name": call.get("name"), "args": call.get("args") or {}, "id": call.get("id") or str(uuid4()), "type": "tool_call"}
+            for call in tool_calls if isinstance(call, dict) and call.get("name")
+        ]
+        self.stats.text_calls += len(tool_calls)
+        return tool_calls
+
+    def _finish_task(self, turns: int):
+        self.stats.tasks += 1
+        self.stats.turns += turns
+        print(f"Agent stats: {self.stats.summary()}")
+        print(f"Tool scheduler: {self.scheduler.stats()}")
+        print(f"Action optimizer: {self.optimizer.stats()}")
+
+
+if __name__ == "__main__":
+    # Per-call overhead of preparing the agent chain: binding the tools on every call
+    # (previous behaviour) vs the compiled chain reused across calls
+    import time
+    from app.services.CassetteService import CassetteChatModel
+
+    llm = CassetteChatModel(model="benchmark")
+    agent = EnhancedInstructionChain(llm)
+    ToolBox = registry.toolset("agent")
+    prefix = context_cache.prefix("agent", SYSTEM_PROMPT.format(), tools=ToolBox, llm=llm)
+    runs = 200
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        agent.prompt | RunnableLambda(budget_for("agent").fit_prompt) | llm.bind_tools(ToolBox)
+    rebuilt = (time.perf_counter() - start) / runs
+
+    agent._get_chain(prefix, ToolBox)
+    start = time.perf_counter()
+    for _ in range(runs):
+        agent._get_chain(prefix, ToolBox)
+    cached = (time.perf_counter() - start) / runs
+
+    print(f"bind_tools + compose per call: {rebuilt * 1000:.3f} ms")
+    print(f"cached chain per call        : {cached * 1000:.3f} ms ({rebuilt / cached:.0f}x faster)")
@@ -1,10 +1,17 @@
 from app.utils.prepareimage import prepare_images
+from app.utils.tokenbudget import budget_for
+from app.utils.tracing import traced, tracer
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
+from typing import List
 
 class QuestionOutput(BaseModel):
     short_answer: str = Field(..., description="The short answer (max 5 words) to the user's question based on the provided image.")
     explanation: str = Field(..., description="the explanation of the short answer maximumn of 256 characters.")
+
+class BatchQuestionOutput(BaseModel):
+    answers: List[QuestionOutput] = Field(..., description="One answer per question, in the same order as the numbered questions.")
     
 SYSTEM_PROMPT="""
 You are personal assistant, never say the first person perspective from your side
@@ -12,23 +19,63 @@ Never metion there is the image sended.
 Answer directly any question based on the image sended
 """
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+The user sends several numbered questions about the same image.
+Answer every question independently and return the answers in the same order as the questions.
+"""
+
 class QuestionChain:
     def __init__(self, llm):
         self.llm = llm
         
     def __call__(self, input: str):
-        self.chain = QuestionChain.get_prompt() | self.llm.with_structured_output(QuestionOutput)
+        self.chain = (
+            QuestionChain.get_prompt()
+            | RunnableLambda(budget_for("question").fit_prompt)
+            | self.llm.with_structured_output(QuestionOutput)
+        )
         self.chain.with_config(run_name="GenerateAnswer")
-        res = self.chain.invoke({"input": input})
+        res = self.chain.invoke({"input": input}, config={"callbacks": tracer.callbacks()})
         return res.model_dump() 
 
+    def ask_many(self, inputs: List[str]):
+        """
+        Answers several questions about the same screenshot with a single model call.
+
+        Args:
+            inputs (List[str]): Questions, in submission order
+
+        Returns:
+            list: One answer dict per question, in the same order
+        """
+        if len(inputs) == 1:
+            return [self(inputs[0])]
+        
+        self.batch_chain = (
+            QuestionChain.get_prompt(BATCH_SYSTEM_PROMPT)
+            | RunnableLambda(budget_for("question").fit_prompt)
+            | self.llm.with_structured_output(BatchQuestionOutput)
+        )
+        questions = "\n".join(f"{i + 1}. {question}" for i, question in enumerate(inputs))
+        res = self.batch_chain.invoke({"input": questions}, config={"callbacks": tracer.callbacks()})
+        
+        answers = [answer.model_dump() for answer in res.answers[:len(inputs)]]
+        # The model may return fewer answers than questions; never leave a question unanswered silently
+        for question in inputs[len(answers):]:
+            answers.append({
+                "short_answer": "No answer",
+                "explanation": f"No answer was returned for: {question[:200]}"
+            })
+        return answers
+
     @staticmethod
-    def get_prompt():
+    @traced("prompt.question")
+    def get_prompt(prompt = SYSTEM_PROMPT):
         return ChatPromptTemplate.from_messages(
             [
                 (
                     "system",
-                    SYSTEM_PROMPT,
+                    prompt,
                 ),
                 (
                     "user",
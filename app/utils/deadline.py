@@ -0,0 +1,98 @@
+"""
+Time budget of the current task, propagated through a context variable.
+
+The agent loop opens a budget for each instruction; model calls get the remaining time
+as a timeout and tools cap their sleeps and waits with cap(), without any of them
+taking a deadline argument. Time is read from the GUI backend's clock, so on the
+virtual desktop the budget is measured in simulated seconds.
+"""
+import contextvars
+from contextlib import contextmanager
+from threading import Event, Thread
+from typing import Callable, Optional
+
+from app.services.GuiBackend import gui
+
+# Wall seconds the backstop waits past the budget, giving the request timeout time to fire first
+BACKSTOP_GRACE = 5.0
+
+_deadline = contextvars.ContextVar("airis_deadline", default=None)
+
+class BudgetExceeded(TimeoutError):
+    """Raised when a call does not finish within the remaining time budget."""
+
+@contextmanager
+def time_budget(seconds: Optional[float]):
+    """
+    Runs the enclosed block under a time budget. A nested budget never extends the
+    enclosing one; None or 0 leaves the current budget unchanged.
+
+    Args:
+        seconds (float, optional): Budget in seconds
+    """
+    if not seconds:
+        yield
+        return
+    deadline = gui.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(deadline, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (never negative), or None without a budget."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - gui.monotonic())
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+def cap(seconds: float) -> float:
+    """Caps a sleep or wait to the remaining budget."""
+    left = remaining()
+    return seconds if left is None else min(seconds, left)
+
+def call_with_deadline(func: Callable, *args, **kwargs):
+    """
+    Calls func, giving up once the budget runs out.
+
+    Model calls end on their own: they get the remaining budget as their request
+    timeout. This is the backstop for a call that ignores it. Without a budget, or on
+    the virtual desktop (whose clock stands still while the model runs), func runs on
+    the calling thread. On the real desktop it runs on its own daemon thread (in a copy
+    of the caller's context) and BudgetExceeded is raised when it is still running
+    BACKSTOP_GRACE wall seconds after the budget ended; the abandoned call finishes in
+    the background and its result is dropped. A thread per call means a hung request
+    never holds up the next one.
+    """
+    left = remaining()
+    if left is None:
+        return func(*args, **kwargs)
+    if left <= 0:
+        raise BudgetExceeded("time budget exhausted")
+    if not gui.backend.real:
+        return func(*args, **kwargs)
+
+    outcome = {}
+    done = Event()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            outcome["result"] = context.run(func, *args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    Thread(target=run, name="airis-deadline", daemon=True).start()
+    if not done.wait(left + BACKSTOP_GRACE):
+        raise BudgetExceeded(f"no result within the remaining {left:.1f}s budget")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
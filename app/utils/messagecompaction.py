@@ -0,0 +1,124 @@
+import json
+from typing import List
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, messages_to_dict
+
+SCREENSHOT_PLACEHOLDER = "[screenshot omitted: superseded by a newer observation]"
+SUMMARY_LINE_CHARS = 160
+
+def split_turns(messages: List[BaseMessage]) -> tuple:
+    """
+    Splits an agent history into (head, turns).
+
+    The head is everything before the first AI message (system prompt, task); each
+    turn is an AI message followed by the tool results and observations it produced.
+    """
+    first_ai = next((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), len(messages))
+    head, turns = list(messages[:first_ai]), []
+    for message in messages[first_ai:]:
+        if isinstance(message, AIMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return head, turns
+
+def is_screenshot(message: BaseMessage) -> bool:
+    """True for observations carrying a screenshot, as a data URL string or an image part."""
+    content = message.content
+    if isinstance(content, str):
+        return content.startswith("data:image")
+    return any(isinstance(part, dict) and part.get("type") == "image_url" for part in content)
+
+def _replace_screenshot(message: BaseMessage) -> BaseMessage:
+    if isinstance(message.content, str):
+        return message.model_copy(update={"content": SCREENSHOT_PLACEHOLDER})
+    parts = [
+        {"type": "text", "text": SCREENSHOT_PLACEHOLDER} if isinstance(part, dict) and part.get("type") == "image_url" else part
+        for part in message.content
+    ]
+    return message.model_copy(update={"content": parts})
+
+def _short(text: str) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= SUMMARY_LINE_CHARS else text[:SUMMARY_LINE_CHARS] + "..."
+
+def summarize_turns(turns: List[List[BaseMessage]]) -> str:
+    """One line per old tool call with its (shortened) result."""
+    lines = ["Summary of earlier steps (details omitted):"]
+    for turn in turns:
+        calls = {call.get("id"): call for call in getattr(turn[0], "tool_calls", None) or []}
+        for message in turn:
+            if isinstance(message, ToolMessage):
+                call = calls.get(message.tool_call_id)
+                action = f"{call['name']}({_short(json.dumps(call.get('args', {})))})" if call else message.name or "tool"
+                result = "screenshot taken" if is_screenshot(message) else _short(message.content)
+                lines.append(f"- {action}: {result}")
+            elif isinstance(message, AIMessage) and isinstance(message.content, str) and message.content.strip() \
+                    and not message.content.lstrip().startswith(("{", "```")):
+                lines.append(f"- assistant: {_short(message.content)}")
+    return "\n".join(lines)
+
+def compact_messages(messages: List[BaseMessage], keep_observations: int = 2, keep_turns: int = 3) -> List[BaseMessage]:
+    """
+    Compacts an agent history before it is sent to the model; the input is left untouched.
+
+    Args:
+        messages (List[BaseMessage]): Full agent history
+        keep_observations (int): Number of latest screenshot observations kept verbatim;
+            older ones are replaced by a short placeholder
+        keep_turns (int): Number of latest turns kept as messages; older turns are
+            collapsed into a single summary message
+
+    Returns:
+        List[BaseMessage]: The compacted history
+    """
+    head, turns = split_turns(messages)
+    # Fewer turns than keep_turns: nothing is summarized
+    split_at = max(0, len(turns) - keep_turns) if keep_turns else len(turns)
+    old_turns, recent_turns = turns[:split_at], turns[split_at:]
+
+    compacted = head
+    if old_turns:
+        compacted.append(HumanMessage(content=summarize_turns(old_turns)))
+
+    recent = [message for turn in recent_turns for message in turn]
+    screenshots = [i for i, message in enumerate(recent) if is_screenshot(message)]
+    stale = set(screenshots[:-keep_observations] if keep_observations else screenshots)
+    for i, message in enumerate(recent):
+        if i in stale:
+            message = _replace_screenshot(message)
+        compacted.append(message)
+    return compacted
+
+def payload_size(messages: List[BaseMessage]) -> int:
+    """Size in bytes of the serialized messages, as they would go over the wire."""
+    return len(json.dumps(messages_to_dict(list(messages)), default=str).encode("utf-8"))
+
+if __name__ == "__main__":
+    # Checks of the compaction rules:   python -m app.utils.messagecompaction
+    def turn(n: int, screenshot: bool = False) -> list:
+        call = {"name": "ShowScreen" if screenshot else "CursorMove", "args": {}, "id": f"call-{n}"}
+        content = "data:image/png;base64,AAAA" if screenshot else f"moved {n}"
+        return [AIMessage(content="", tool_calls=[call]), ToolMessage(content=content, tool_call_id=f"call-{n}")]
+
+    task = HumanMessage(content="task")
+
+    # Fewer turns than keep_turns: every turn stays, including the first observation
+    history = [task] + turn(0, screenshot=True) + turn(1)
+    compacted = compact_messages(history, keep_observations=2, keep_turns=3)
+    assert compacted == history, [type(m).__name__ for m in compacted]
+
+    # Exactly keep_turns turns: still nothing summarized
+    history = [task] + turn(0, screenshot=True) + turn(1) + turn(2)
+    assert compact_messages(history, keep_turns=3) == history
+
+    # More turns: the oldest are summarized, the latest keep_turns kept
+    history = [task] + turn(0, screenshot=True) + turn(1) + turn(2) + turn(3) + turn(4)
+    compacted = compact_messages(history, keep_turns=3)
+    assert compacted[1].content.startswith("Summary of earlier steps"), compacted[1]
+    assert compacted[2:] == history[5:]
+
+    # Old screenshots in recent turns become placeholders
+    history = [task] + turn(0, screenshot=True) + turn(1, screenshot=True) + turn(2, screenshot=True)
+    compacted = compact_messages(history, keep_observations=1, keep_turns=3)
+    assert [m.content for m in compacted if isinstance(m, ToolMessage)][:2] == [SCREENSHOT_PLACEHOLDER] * 2
+    print("messagecompaction: all checks passed")
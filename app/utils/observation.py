@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from app.utils.screentransform import ScreenTransform
+
+@dataclass
+class ImageObservation:
+    """
+    Tool result carrying an image.
+    The agent loop answers the tool call with the short text and forwards the image
+    as a multimodal content part, instead of sending the data URL as text tokens.
+    `transform` maps the image's pixels back to screen coordinates and `signature` is
+    the screen hash of the capture, for trajectory records.
+    """
+    data_url: str
+    text: str = "Screenshot of the current screen is attached below."
+    transform: Optional[ScreenTransform] = None
+    signature: Optional[str] = None
+
+    def __str__(self) -> str:
+        return self.text
+
+def observation_messages(observation, tool_call_id: str, tool_name: str) -> List[BaseMessage]:
+    """
+    Converts a tool result into the messages appended to the agent history.
+
+    Args:
+        observation: Raw tool result (str, ImageObservation, ...)
+        tool_call_id (str): Id of the tool call being answered
+        tool_name (str): Name of the tool
+
+    Returns:
+        List[BaseMessage]: The tool message, followed by an image message for image results
+    """
+    messages = [ToolMessage(content=str(observation), tool_call_id=tool_call_id, name=tool_name)]
+    if isinstance(observation, ImageObservation):
+        messages.append(
+            HumanMessage(
+                content=[
+                    {"type": "text", "text": f"Image returned by {tool_name}:"},
+                    {"type": "image_url", "image_url": {"url": observation.data_url}},
+                ]
+            )
+        )
+    return messages
@@ -1,16 +1,21 @@
 from app.utils.screenshot import gettemp
+from app.utils.tracing import traced
 import base64
+from contextlib import nullcontext
 from io import BytesIO
 from PIL import Image
+from typing import Optional
 import os
 
-def prepare_images(quality: int = 50, delete_after_convert: bool = False, is_direct: bool = False):
+@traced("encode.prepare_images")
+def prepare_images(quality: int = 50, delete_after_convert: bool = False, is_direct: bool = False, image: Optional[Image.Image] = None):
     """
     Prepare and compress images from temp.png file
     
     Args:
         quality (int): JPEG compression quality (1-100)
         delete_after_convert (bool): Whether to delete source file after conversion
+        image (Image.Image, optional): Image to encode instead of temp.png
         
     Returns:
         list: List containing processed image data
@@ -18,10 +23,10 @@ def prepare_images(quality: int = 50, delete_after_convert: bool = False, is_dir
     image_contents = None
     
     try:
-        with Image.open(gettemp()) as image:
+        with (Image.open(gettemp()) if image is None else nullcontext(image)) as source:
             # Convert and compress image
             compressed_io = BytesIO()
-            image.convert("RGB").save(
+            source.convert("RGB").save(
                 compressed_io, 
                 format="JPEG",
                 optimize=True,
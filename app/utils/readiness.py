@@ -0,0 +1,163 @@
+"""
+Readiness detection for launch macros: instead of sleeping a fixed time after starting
+an application, poll the window list for the new window and then wait until the screen
+stops changing, bounded by an upper timeout (itself capped by the task's time budget).
+
+Frames are compared as small grayscale thumbnails, pixel by pixel, so a window covering
+a few percent of the screen registers as a change while a blinking cursor does not.
+"""
+from typing import Optional, Set
+
+from PIL import Image, ImageChops
+
+from app.services.GuiBackend import gui
+from app.utils.deadline import cap
+
+POLL_INTERVAL = 0.1
+# Screen must stay unchanged this long to count as settled
+SETTLE_SECONDS = 0.3
+# Without a new window (warm launch, no window list) the screen must stay unchanged longer
+WARM_SETTLE_SECONDS = 1.0
+# Without a window list, no screen change for this long ends the wait (the fixed wait used before)
+NO_CHANGE_SECONDS = 2.0
+# Width of the thumbnails frames are compared on
+FRAME_WIDTH = 160
+# A thumbnail pixel changed when its gray level moved by more than this
+PIXEL_DELTA = 24
+# Share of thumbnail pixels that may change between two frames of a "still" screen (cursor blink, clock)
+STILL_FRACTION = 0.002
+
+def _frame() -> Image.Image:
+    image = gui.screenshot()
+    width = min(FRAME_WIDTH, image.width)
+    return image.convert("L").resize((width, max(1, image.height * width // image.width)), Image.BILINEAR)
+
+def _changed(previous: Image.Image, current: Image.Image) -> bool:
+    """Whether more than STILL_FRACTION of the thumbnail pixels changed between two frames."""
+    if previous.size != current.size:
+        return True
+    moved = ImageChops.difference(previous, current).point(lambda v: 255 if v > PIXEL_DELTA else 0).histogram()[255]
+    return moved > STILL_FRACTION * current.width * current.height
+
+def window_titles() -> Optional[Set[str]]:
+    """Titles of the open windows, or None when no window-list provider is available."""
+    return gui.window_titles()
+
+def wait_for_new_window(before: Optional[Set[str]], timeout: float, match: Optional[str] = None) -> Optional[str]:
+    """
+    Polls the window list until a window that was not open before appears.
+
+    Args:
+        before (Set[str]): Window titles before the launch, from window_titles()
+        timeout (float): Maximum seconds to wait
+        match (str, optional): Only accept windows whose title contains this text (case-insensitive)
+
+    Returns:
+        str: Title of the new window, or None on timeout or without a window-list provider
+    """
+    if before is None:
+        return None
+    deadline = gui.monotonic() + cap(timeout)
+    while gui.monotonic() < deadline:
+        titles = window_titles() or set()
+        new = [t for t in titles - before if not match or match.lower() in t.lower()]
+        if new:
+            return new[0]
+        gui.sleep(POLL_INTERVAL)
+    return None
+
+def wait_for_screen_stable(timeout: float, settle: float = SETTLE_SECONDS, require_change: bool = False) -> bool:
+    """
+    Waits until consecutive screen captures stop changing.
+
+    Args:
+        timeout (float): Maximum seconds to wait
+        settle (float): Seconds the screen must stay unchanged
+        require_change (bool): Only start settling after the screen changed once, for
+            callers that have no other signal that the launch started
+
+    Returns:
+        bool: True when the screen settled before the timeout
+    """
+    deadline = gui.monotonic() + cap(timeout)
+    previous = _frame()
+    changed = not require_change
+    still_since = gui.monotonic()
+    while gui.monotonic() < deadline:
+        gui.sleep(POLL_INTERVAL)
+        current = _frame()
+        if _changed(previous, current):
+            changed = True
+            still_since = gui.monotonic()
+        elif changed and gui.monotonic() - still_since >= settle:
+            return True
+        previous = current
+    return False
+
+def wait_until_ready(before: Optional[Set[str]], timeout: float, match: Optional[str] = None) -> str:
+    """
+    Waits for a launched application within one timeout. The app is ready once a new
+    window appeared and the screen settled; warm launches that reuse an existing window
+    are detected by the screen changing and then settling for longer. When window titles
+    can be read, a slow launch is waited for until the timeout; without a window list,
+    no change within NO_CHANGE_SECONDS ends the wait.
+
+    Args:
+        before (Set[str]): Window titles before the launch, from window_titles()
+        timeout (float): Upper bound in seconds for the whole wait
+        match (str, optional): Text expected in the new window title
+
+    Returns:
+        str: Short description of how readiness was detected, for tool results
+    """
+    timeout = cap(timeout)
+    start = gui.monotonic()
+    deadline = start + timeout
+    title = None
+    changed = False
+    previous = _frame()
+    still_since = start
+    while gui.monotonic() < deadline:
+        gui.sleep(POLL_INTERVAL)
+        if title is None and before is not None:
+            new = [t for t in (window_titles() or set()) - before if not match or match.lower() in t.lower()]
+            title = new[0] if new else None
+        current = _frame()
+        if _changed(previous, current):
+            changed = True
+            still_since = gui.monotonic()
+        previous = current
+        still = gui.monotonic() - still_since
+        if title and still >= SETTLE_SECONDS:
+            return f"window '{title}' ready in {gui.monotonic() - start:.1f}s"
+        if changed and still >= WARM_SETTLE_SECONDS:
+            return f"screen settled in {gui.monotonic() - start:.1f}s"
+        if before is None and not changed and still >= NO_CHANGE_SECONDS:
+            return f"no visible change after {still:.1f}s"
+    return f"not confirmed ready after {timeout:.1f}s"
+
+if __name__ == "__main__":
+    # Checks on the virtual desktop:   GUI_BACKEND=virtual python -m app.utils.readiness
+    from app.services.VirtualDesktop import APPS, AppSpec, VirtualDesktop
+
+    slow = AppSpec("Document1 - Word", NO_CHANGE_SECONDS + 1.5, size=(300, 200))
+    desktop = VirtualDesktop(apps={**APPS, "word": slow})
+    previous = gui.use(desktop)
+    try:
+        # A launch slower than NO_CHANGE_SECONDS is waited for while window titles can be read
+        before = window_titles()
+        desktop.launch("word")
+        result = wait_until_ready(before, 10)
+        assert result.startswith("window 'Document1 - Word' ready"), result
+        assert desktop.find("word") is not None
+        assert slow.launch_delay <= desktop.clock < 10, desktop.clock
+
+        # Without a window list, an unchanged screen ends the wait after NO_CHANGE_SECONDS
+        desktop.reset()
+        start = desktop.clock
+        result = wait_until_ready(None, 10)
+        assert result.startswith("no visible change"), result
+        assert desktop.clock - start < NO_CHANGE_SECONDS + 0.5
+        print("readiness: all checks passed")
+    finally:
+        gui.use(previous)
@@ -1,11 +1,21 @@
-from PIL import ImageGrab
+from PIL import Image
 
+from app.services.GuiBackend import gui
+from app.utils.tracing import traced
+
+@traced("capture.screen")
+def capture_screen() -> Image.Image:
+    """Captures the screen in memory, for callers that encode it without the temp file."""
+    return gui.screenshot()
+
+@traced("capture.screenshot")
 def screenshot() -> None:
-    screenshot = ImageGrab.grab()
+    screenshot = gui.screenshot()
     screenshot.save("temp\\temp.png")
 
+@traced("capture.screenshot_history")
 def screenshot_history(id: str) -> None:
-    screenshot = ImageGrab.grab()
+    screenshot = gui.screenshot()
     screenshot.save(f"temp\\history_{id}.png")
     
 def gettemp() -> str:
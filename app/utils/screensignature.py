@@ -0,0 +1,42 @@
+from PIL import Image
+
+from app.services.GuiBackend import gui
+
+HASH_SIZE = 8
+
+def dhash(image: Image.Image, size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an image: one bit per horizontally adjacent pixel pair of a
+    (size+1) x size grayscale thumbnail. Similar screens give hashes a few bits apart.
+
+    Args:
+        image (Image.Image): Image to hash
+        size (int): Hash side; the hash has size*size bits
+
+    Returns:
+        int: The hash
+    """
+    pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+def image_signature(image: Image.Image) -> str:
+    """dHash of an image, as a hex string."""
+    return f"{dhash(image):0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+def screen_signature() -> str:
+    """dHash of the current screen, as a hex string."""
+    return image_signature(gui.screenshot())
+
+def signature_distance(a: str, b: str) -> int:
+    """Hamming distance between two hex screen signatures."""
+    return hamming(int(a, 16), int(b, 16))
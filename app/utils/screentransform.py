@@ -0,0 +1,109 @@
+"""
+Mapping between agent screenshots and screen coordinates.
+
+Agent screenshots are downscaled to a fixed width to save tokens, so coordinates the
+model reads off an image must be scaled back before the cursor moves. The transform
+depends only on the monitor and the configured width, so tool calls map the same
+way whether they follow a fresh screenshot or are replayed from the plan cache.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.services.DisplayGeometry import display
+from app.utils.tokenbudget import IMAGE_SMALL_SIZE, budget_for, estimate_image_tokens
+from config.setting import env
+
+@dataclass(frozen=True)
+class ScreenTransform:
+    """Image pixels to screen coordinates: screen = offset + image / scale."""
+    scale: float
+    offset_x: int
+    offset_y: int
+    image_width: int
+    image_height: int
+    monitor: int = 0
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        return self.offset_x + int(round(x / self.scale)), self.offset_y + int(round(y / self.scale))
+
+    def to_image(self, x: float, y: float) -> Tuple[int, int]:
+        return int(round((x - self.offset_x) * self.scale)), int(round((y - self.offset_y) * self.scale))
+
+    def apply(self, image: Image.Image) -> Image.Image:
+        """Resizes a capture of the monitor to the agent image size."""
+        if image.size == (self.image_width, self.image_height):
+            return image
+        return image.resize((self.image_width, self.image_height), Image.BILINEAR, reducing_gap=2.0)
+
+    def describe(self) -> str:
+        """Note for the model about the coordinate space of the image."""
+        if self.scale == 1.0:
+            return f"The image is {self.image_width}x{self.image_height} pixels at screen resolution."
+        return (f"The image is {self.image_width}x{self.image_height} pixels; give coordinates in image pixels, "
+                "they are converted to screen coordinates automatically.")
+
+def agent_transform(max_width: Optional[int] = None) -> ScreenTransform:
+    """
+    Transform of agent screenshots of the primary monitor.
+
+    Args:
+        max_width (int, optional): Image width cap; defaults to settings.agent_image_width,
+            where 0 keeps the screen resolution
+
+    Returns:
+        ScreenTransform: The transform for the current display layout; the image size also
+            fits the agent image token budget, so the budget never rescales a mapped image
+    """
+    monitor = display.primary()
+    width = max_width if max_width is not None else env.agent_image_width
+    width = min(width, monitor.width) if width else monitor.width
+    height = int(round(monitor.height * width / monitor.width))
+    # Same steps as tokenbudget.downscale_image
+    max_tokens = budget_for("agent").max_image_tokens
+    while estimate_image_tokens(width, height) > max_tokens and max(width, height) > IMAGE_SMALL_SIZE:
+        width = max(1, int(width * 0.75))
+        height = int(round(monitor.height * width / monitor.width))
+    scale = width / monitor.width
+    return ScreenTransform(
+        scale=scale,
+        offset_x=monitor.x,
+        offset_y=monitor.y,
+        image_width=width,
+        image_height=height,
+    )
+
+def to_screen(x: float, y: float) -> Tuple[int, int]:
+    """Screen coordinates of a point given in agent-image pixels."""
+    return agent_transform().to_screen(x, y)
+
+if __name__ == "__main__":
+    # Checks on the virtual desktop:   GUI_BACKEND=virtual python -m app.utils.screentransform
+    import base64
+    from io import BytesIO
+
+    from langchain_core.messages import ToolMessage
+
+    from app.services.VirtualDesktop import VirtualDesktop
+    from app.services.GuiBackend import gui
+
+    for size in ((1920, 1080), (2560, 1440), (3840, 2160), (5120, 1440)):
+        previous = gui.use(VirtualDesktop(size=size))
+        display.invalidate()
+        try:
+            # Full resolution screenshots must still pass the agent budget without a rescale
+            transform = agent_transform(max_width=0)
+            image = transform.apply(gui.backend.screenshot())
+            buffer = BytesIO()
+            image.save(buffer, format="PNG")
+            url = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+            message = ToolMessage(content=[{"type": "image_url", "image_url": {"url": url}}], tool_call_id="check")
+            fitted = budget_for("agent").fit([message])[0]
+            assert fitted is message, f"{size}: the budget rescaled a {image.size} image"
+            print(f"{size[0]}x{size[1]} -> {transform.image_width}x{transform.image_height} "
+                  f"({estimate_image_tokens(transform.image_width, transform.image_height)} tokens)")
+        finally:
+            gui.use(previous)
+            display.invalidate()
+    print("screentransform: all checks passed")
@@ -0,0 +1,187 @@
+"""
+Set-of-marks annotation of agent screenshots.
+
+Edge and contour analysis proposes regions that look clickable (buttons, fields, icons,
+text lines); each gets a numbered box drawn on the screenshot. The model then answers
+with a mark id instead of estimating pixel coordinates from a compressed image, and
+ClickMark resolves the id to the exact center of the region.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.utils.screentransform import ScreenTransform
+
+# Regions smaller than this (pixels, either side) are noise; larger than this share of the screen are panels
+MIN_SIDE = 10
+MAX_AREA_FRACTION = 0.05
+# Boxes overlapping an already kept box by more than this IoU are duplicates
+MAX_OVERLAP = 0.5
+# More marks than this clutter the image more than they help
+MAX_MARKS = 120
+# Area bounds (pixels) of the icon, control and panel size buckets; each bucket gets an equal
+# share of MAX_MARKS first, so a screen full of small icons still leaves marks for buttons
+SIZE_BUCKETS = (32 * 32, 240 * 80)
+# Gap (pixels) bridged between glyphs and icon parts so that words and buttons form one region
+MERGE_WIDTH = 9
+MERGE_HEIGHT = 3
+
+LABEL_COLORS = ((230, 25, 75), (0, 130, 200), (60, 180, 75), (245, 130, 48), (145, 30, 180), (0, 128, 128))
+
+@dataclass(frozen=True)
+class Mark:
+    """A numbered region of the annotated screenshot, in screen pixels."""
+    mark_id: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+def _iou(a: tuple, b: tuple) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    return inter / (aw * ah + bw * bh - inter)
+
+def propose_marks(image: Image.Image, max_marks: int = MAX_MARKS) -> List[Mark]:
+    """
+    Proposes clickable regions of a screenshot.
+
+    Args:
+        image (Image.Image): Screenshot
+        max_marks (int): Upper bound on the number of marks
+
+    Returns:
+        List[Mark]: Regions in reading order (top to bottom, left to right), numbered from 1
+    """
+    gray = np.asarray(image.convert("L"))
+    edges = cv2.Canny(gray, 50, 150)
+    # Bridge the gaps between letters and icon strokes so each control becomes one blob
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (MERGE_WIDTH, MERGE_HEIGHT))
+    merged = cv2.dilate(edges, kernel)
+    contours, _ = cv2.findContours(merged, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    max_area = MAX_AREA_FRACTION * gray.shape[0] * gray.shape[1]
+    boxes = [cv2.boundingRect(contour) for contour in contours]
+    boxes = [b for b in boxes if b[2] >= MIN_SIDE and b[3] >= MIN_SIDE and b[2] * b[3] <= max_area]
+    # Prefer the smaller of overlapping boxes: the control rather than its surrounding frame
+    boxes.sort(key=lambda b: b[2] * b[3])
+    # First every size bucket up to its share of the cap, then the remaining slots smallest first
+    share = max(1, max_marks // (len(SIZE_BUCKETS) + 1))
+    taken = [0] * (len(SIZE_BUCKETS) + 1)
+    kept, skipped = [], []
+    for box in boxes:
+        bucket = bisect_right(SIZE_BUCKETS, box[2] * box[3])
+        if taken[bucket] >= share:
+            skipped.append(box)
+        elif all(_iou(box, other) <= MAX_OVERLAP for other in kept):
+            kept.append(box)
+            taken[bucket] += 1
+    for box in skipped:
+        if len(kept) >= max_marks:
+            break
+        if all(_iou(box, other) <= MAX_OVERLAP for other in kept):
+            kept.append(box)
+    # Reading order, with rows quantized so boxes on one line sort left to right
+    kept.sort(key=lambda b: (b[1] // 20, b[0]))
+    return [Mark(i + 1, x, y, w, h) for i, (x, y, w, h) in enumerate(kept)]
+
+def draw_marks(image: Image.Image, marks: List[Mark]) -> Image.Image:
+    """Returns a copy of the screenshot with a box and an id label drawn for every mark."""
+    annotated = image.convert("RGB")
+    draw = ImageDraw.Draw(annotated)
+    for mark in marks:
+        color = LABEL_COLORS[mark.mark_id % len(LABEL_COLORS)]
+        draw.rectangle([mark.x, mark.y, mark.x + mark.width, mark.y + mark.height], outline=color, width=2)
+        label = str(mark.mark_id)
+        left, top = mark.x, max(0, mark.y - 14)
+        draw.rectangle([left, top, left + 7 * len(label) + 4, top + 13], fill=color)
+        draw.text((left + 2, top + 1), label, fill=(255, 255, 255))
+    return annotated
+
+class MarkRegistry:
+    """The marks of the latest annotated screenshot, which ClickMark ids refer to."""
+
+    def __init__(self):
+        self._marks = {}
+        self._lock = Lock()
+        self.annotations = 0
+
+    def annotate(self, image: Image.Image, transform: Optional[ScreenTransform] = None) -> Tuple[Image.Image, List[Mark]]:
+        """
+        Proposes marks for a screenshot, remembers them and returns the annotated image.
+
+        Args:
+            image (Image.Image): Full-resolution screenshot; marks are proposed on it
+            transform (ScreenTransform, optional): Downscales the returned image, with the
+                boxes drawn at their mapped positions
+
+        Returns:
+            Tuple[Image.Image, List[Mark]]: Annotated image and the marks in screen pixels
+        """
+        marks = propose_marks(image)
+        with self._lock:
+            self._marks = {mark.mark_id: mark for mark in marks}
+            self.annotations += 1
+        if transform is None:
+            return draw_marks(image, marks), marks
+        shown = []
+        for mark in marks:
+            x, y = transform.to_image(mark.x, mark.y)
+            width = max(1, int(round(mark.width * transform.scale)))
+            height = max(1, int(round(mark.height * transform.scale)))
+            shown.append(Mark(mark.mark_id, x, y, width, height))
+        return draw_marks(transform.apply(image), shown), marks
+
+    def get(self, mark_id: int) -> Optional[Mark]:
+        with self._lock:
+            return self._marks.get(mark_id)
+
+    def at(self, x: int, y: int) -> Optional[Mark]:
+        """The smallest mark containing a screen point."""
+        with self._lock:
+            return min((m for m in self._marks.values() if m.contains(x, y)), key=lambda m: m.width * m.height, default=None)
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+marks = MarkRegistry()
+
+if __name__ == "__main__":
+    # Checks of the mark proposals:   python -m app.utils.setofmarks
+    import time
+
+    # A cluttered frame: 300 small icons and one large button
+    frame = Image.new("RGB", (1920, 1080), (240, 240, 240))
+    draw = ImageDraw.Draw(frame)
+    for i in range(300):
+        x, y = 40 + (i % 30) * 40, 40 + (i // 30) * 40
+        draw.rectangle([x, y, x + 16, y + 16], fill=(60, 60, 160))
+    button = (900, 700, 160, 50)
+    draw.rectangle([button[0], button[1], button[0] + button[2], button[1] + button[3]], fill=(30, 120, 215), outline=(0, 0, 0))
+    draw.text((button[0] + 55, button[1] + 18), "Submit", fill=(255, 255, 255))
+
+    start = time.perf_counter()
+    proposed = propose_marks(frame)
+    elapsed = time.perf_counter() - start
+    assert len(proposed) <= MAX_MARKS, len(proposed)
+    center = (button[0] + button[2] // 2, button[1] + button[3] // 2)
+    covering = [m for m in proposed if m.contains(*center) and m.width * m.height >= button[2] * button[3] // 2]
+    assert covering, "the large button got no mark"
+    print(f"setofmarks: {len(proposed)} marks in {elapsed * 1000:.0f} ms, button mark {covering[0]}")
@@ -0,0 +1,64 @@
+from app.services.GuiBackend import gui
+
+INPUT_STRATEGIES = ("auto", "type", "paste")
+# Texts longer than this are pasted when the strategy is "auto"
+PASTE_MIN_LENGTH = 40
+TYPE_INTERVAL = 0.05
+# Time for the focused app to read the clipboard before the previous contents come back
+PASTE_SETTLE_SECONDS = 0.15
+
+def choose_strategy(text: str, strategy: str = "auto") -> str:
+    """
+    Picks how to enter a text.
+
+    Args:
+        text (str): Text to enter
+        strategy (str): "type", "paste", or "auto" to paste long or non-ASCII text and
+            type everything else
+
+    Returns:
+        str: "type" or "paste"
+    """
+    if strategy not in INPUT_STRATEGIES:
+        raise ValueError(f"Unknown input strategy '{strategy}', expected one of {INPUT_STRATEGIES}")
+    if strategy != "auto":
+        return strategy
+    return "paste" if len(text) > PASTE_MIN_LENGTH or not text.isascii() else "type"
+
+def paste_text(text: str) -> None:
+    """Pastes text through the clipboard, then restores the previous clipboard contents."""
+    previous = gui.clipboard_get()
+    gui.clipboard_set(text)
+    try:
+        gui.hotkey('ctrl', 'v', pause=False)
+        gui.sleep(PASTE_SETTLE_SECONDS)
+    finally:
+        if previous is not None:
+            gui.clipboard_set(previous)
+
+def enter_text(text: str, strategy: str = "auto", interval: float = TYPE_INTERVAL, pause: bool = True) -> str:
+    """
+    Enters text at the focused field, typing it key by key or pasting it.
+
+    Args:
+        text (str): Text to enter
+        strategy (str): "auto", "type" or "paste"
+        interval (float): Delay between keystrokes when typing
+        pause (bool): Apply the backend's pause afterwards, like a single pyautogui call
+
+    Returns:
+        str: The strategy that was used
+    """
+    used = choose_strategy(text, strategy)
+    if used == "paste":
+        try:
+            paste_text(text)
+        except ImportError:
+            if not text.isascii():
+                raise
+            used = "type"
+    if used == "type":
+        gui.write(text, interval=interval, pause=False)
+    if pause:
+        gui.sleep(gui.get_pause())
+    return used
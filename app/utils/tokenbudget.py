@@ -0,0 +1,210 @@
+import base64
+import math
+from io import BytesIO
+from typing import List, Optional
+from PIL import Image
+from langchain_core.messages import BaseMessage, ToolMessage
+from app.utils.messagecompaction import split_turns
+from app.utils.tracing import traced
+
+# Gemini bills an image whose sides are both <= 384 px as one tile; larger images are
+# split into 768x768 tiles, 258 tokens each
+IMAGE_TILE_TOKENS = 258
+IMAGE_TILE_SIZE = 768
+IMAGE_SMALL_SIZE = 384
+CHARS_PER_TOKEN = 4
+
+def estimate_text_tokens(text: str) -> int:
+    """Rough token count of a text (~4 characters per token)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Token count of an image by resolution, following Gemini's tiling rule."""
+    if width <= IMAGE_SMALL_SIZE and height <= IMAGE_SMALL_SIZE:
+        return IMAGE_TILE_TOKENS
+    return math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE) * IMAGE_TILE_TOKENS
+
+def image_size(data_url: str) -> tuple:
+    """Returns (width, height) of a base64 data URL image, reading only its header."""
+    encoded = data_url.split(",", 1)[-1]
+    with Image.open(BytesIO(base64.b64decode(encoded))) as image:
+        return image.size
+
+def _image_url(part: dict) -> Optional[str]:
+    if part.get("type") != "image_url":
+        return None
+    image_url = part.get("image_url")
+    return image_url.get("url") if isinstance(image_url, dict) else image_url
+
+def estimate_part_tokens(part) -> int:
+    """Token count of one message content part (text or image)."""
+    if isinstance(part, str):
+        return estimate_text_tokens(part)
+    url = _image_url(part)
+    if url is not None:
+        try:
+            return estimate_image_tokens(*image_size(url))
+        except Exception:
+            return estimate_text_tokens(url)
+    return estimate_text_tokens(part.get("text", ""))
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    """Token count of a message, including its content parts and tool calls."""
+    content = message.content
+    parts = [content] if isinstance(content, str) else content
+    tokens = sum(estimate_part_tokens(part) for part in parts)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += estimate_text_tokens(str(tool_call.get("name"))) + estimate_text_tokens(str(tool_call.get("args")))
+    return tokens
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
+
+def downscale_image(data_url: str, max_tokens: int, quality: int = 50) -> tuple:
+    """
+    Downscale a data URL image until it fits a token budget.
+
+    Args:
+        data_url (str): base64 data URL of the image
+        max_tokens (int): Maximum tokens the image may cost
+        quality (int): JPEG quality of the re-encoded image
+
+    Returns:
+        tuple: (data_url, original_size, new_size)
+    """
+    encoded = data_url.split(",", 1)[-1]
+    with Image.open(BytesIO(base64.b64decode(encoded))) as image:
+        original_size = image.size
+        width, height = original_size
+        while estimate_image_tokens(width, height) > max_tokens and max(width, height) > IMAGE_SMALL_SIZE:
+            width, height = max(1, int(width * 0.75)), max(1, int(height * 0.75))
+        if (width, height) == original_size:
+            return data_url, original_size, original_size
+        compressed_io = BytesIO()
+        image.convert("RGB").resize((width, height), Image.LANCZOS).save(
+            compressed_io, format="JPEG", optimize=True, quality=quality
+        )
+    compressed_base64 = base64.b64encode(compressed_io.getvalue()).decode("utf-8")
+    return f"data:image/jpeg;base64,{compressed_base64}", original_size, (width, height)
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keeps the head and tail of a text so it fits max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    keep = max_chars // 2
+    return f"{text[:keep]}\n...[{len(text) - 2 * keep} characters truncated]...\n{text[-keep:]}"
+
+class OverBudget(ValueError):
+    """Raised for a text that is over budget but must not be truncated."""
+
+class TokenBudget:
+    """
+    Enforces a token budget on the messages of one route (question, board, agent).
+
+    Trimming is applied in order of least information lost: downscale images,
+    truncate long observations, then drop the oldest agent turns.
+    """
+
+    def __init__(self, route: str, max_tokens: int, max_image_tokens: int, max_observation_tokens: int):
+        self.route = route
+        self.max_tokens = max_tokens
+        self.max_image_tokens = max_image_tokens
+        self.max_observation_tokens = max_observation_tokens
+        self.last_tokens = 0
+
+    @traced("prompt.budget")
+    def fit(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Returns messages trimmed to fit the budget; the input list is left untouched.
+
+        Args:
+            messages (List[BaseMessage]): Messages about to be sent to the model
+
+        Returns:
+            List[BaseMessage]: Messages within budget (as far as trimming allows)
+        """
+        trimmed = []
+        messages = [self._fit_message(message, trimmed) for message in messages]
+        total = estimate_tokens(messages)
+        if total > self.max_tokens:
+            messages = self._drop_old_turns(messages, total, trimmed)
+            total = estimate_tokens(messages)
+        if trimmed:
+            self._log(f"{', '.join(trimmed)} -> {total} tokens (budget {self.max_tokens})")
+        self.last_tokens = total
+        return messages
+
+    def fit_prompt(self, prompt_value) -> List[BaseMessage]:
+        """Runnable-friendly variant of fit() taking a formatted prompt value."""
+        return self.fit(prompt_value.to_messages())
+
+    def fit_text(self, text: str) -> str:
+        """Truncates prose or a tool observation to the observation budget; never use it on code."""
+        fitted = truncate_text(text, self.max_observation_tokens)
+        if fitted is not text:
+            self._log(f"truncated text from {estimate_text_tokens(text)} to {self.max_observation_tokens} tokens")
+        return fitted
+
+    def require_fit(self, text: str, what: str = "code") -> str:
+        """
+        Checks a text that must be passed on whole (e.g. generated code, which is executed)
+        against the observation budget.
+
+        Raises:
+            OverBudget: The text is over budget; it is never truncated
+        """
+        tokens = estimate_text_tokens(text)
+        if tokens > self.max_observation_tokens:
+            self._log(f"rejected {what} of {tokens} tokens")
+            raise OverBudget(f"Generated {what} is {tokens} tokens, over the {self.route} budget of {self.max_observation_tokens}")
+        return text
+
+    def _fit_message(self, message: BaseMessage, trimmed: list) -> BaseMessage:
+        content = message.content
+        if isinstance(content, str):
+            if isinstance(message, ToolMessage) and estimate_text_tokens(content) > self.max_observation_tokens:
+                trimmed.append(f"truncated observation {estimate_text_tokens(content)}->{self.max_observation_tokens} tokens")
+                return message.model_copy(update={"content": truncate_text(content, self.max_observation_tokens)})
+            return message
+
+        parts = []
+        changed = False
+        for part in content:
+            url = _image_url(part) if isinstance(part, dict) else None
+            if url is not None and estimate_part_tokens(part) > self.max_image_tokens:
+                new_url, original_size, new_size = downscale_image(url, self.max_image_tokens)
+                trimmed.append(f"downscaled image {original_size}->{new_size}")
+                part = {**part, "image_url": {**part["image_url"], "url": new_url}} if isinstance(part["image_url"], dict) \
+                    else {**part, "image_url": new_url}
+                changed = True
+            parts.append(part)
+        return message.model_copy(update={"content": parts}) if changed else message
+
+    def _drop_old_turns(self, messages: List[BaseMessage], total: int, trimmed: list) -> List[BaseMessage]:
+        # The head (system prompt, task) is always kept, turns are dropped oldest first
+        head, turns = split_turns(messages)
+
+        dropped = 0
+        while len(turns) > 1 and total > self.max_tokens:
+            turn = turns.pop(0)
+            total -= estimate_tokens(turn)
+            dropped += 1
+        if dropped:
+            trimmed.append(f"dropped {dropped} old turn(s)")
+        return head + [message for turn in turns for message in turn]
+
+    def _log(self, text: str) -> None:
+        print(f"Token budget [{self.route}]: {text}")
+
+# Budgets that keep every route inside the fast-latency tier of the models it uses
+ROUTE_BUDGETS = {
+    "question": TokenBudget("question", max_tokens=4_000, max_image_tokens=1_032, max_observation_tokens=1_000),
+    "board": TokenBudget("board", max_tokens=12_000, max_image_tokens=1_548, max_observation_tokens=6_000),
+    "agent": TokenBudget("agent", max_tokens=24_000, max_image_tokens=1_548, max_observation_tokens=1_500),
+}
+
+def budget_for(route: str) -> TokenBudget:
+    return ROUTE_BUDGETS[route]
@@ -0,0 +1,39 @@
+from threading import Lock
+from typing import Sequence
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+_schemas = {}
+_lock = Lock()
+
+def _tool_name(tool) -> str:
+    name = getattr(tool, "name", None)
+    return name if name is not None else str(tool)
+
+def toolset_key(tools: Sequence) -> tuple:
+    """Identifies a toolset by the names of its tools, in order."""
+    return tuple(_tool_name(tool) for tool in tools)
+
+def tool_schemas(tools: Sequence) -> list:
+    """
+    Returns the OpenAI-format JSON schemas of a toolset, converting each tool only once.
+
+    Converting a tool walks its signature and parses its docstring, which is too slow to
+    repeat on every model call; chat models accept the converted dicts in bind_tools().
+
+    Args:
+        tools (Sequence): LangChain tools
+
+    Returns:
+        list: One schema dict per tool, in the order of the toolset
+    """
+    schemas = []
+    for tool in tools:
+        key = (_tool_name(tool), id(tool))
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = convert_to_openai_tool(tool)
+            with _lock:
+                _schemas[key] = schema
+        schemas.append(schema)
+    return schemas
@@ -0,0 +1,190 @@
+"""
+Lightweight span tracing for the request path (hotkey -> capture -> encode -> LLM -> tools -> notification).
+
+Spans are propagated through a context variable, so nested spans know their parent
+without passing anything around. Finished spans are appended to a JSONL file as
+Chrome trace events; export_chrome_trace() turns that file into a trace viewable in
+chrome://tracing or https://ui.perfetto.dev. When no trace file is configured,
+span() returns a shared no-op object and traced functions only pay one attribute check.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_current_span = contextvars.ContextVar("airis_current_span", default=None)
+_span_ids = itertools.count(1)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """A timed section of work; use as a context manager or start()/finish() manually."""
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_span_ids)
+        self.parent_id = None
+        self._token = None
+        self._start = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def start(self, activate: bool = True) -> "Span":
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        if activate:
+            self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self, error: Optional[BaseException] = None):
+        end = time.perf_counter()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        if error is not None:
+            self.attrs["error"] = repr(error)
+        self.tracer._write({
+            "name": self.name,
+            "cat": self.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": round((self._start - self.tracer.origin) * 1e6, 1),
+            "dur": round((end - self._start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"span_id": self.span_id, "parent_id": self.parent_id, **self.attrs},
+        })
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+class Tracer:
+    """Writes spans to a JSONL file of Chrome trace events; disabled without a path."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._file = None
+        self.path = None
+        self.enabled = False
+        self.origin = time.perf_counter()
+        if path:
+            self.configure(path)
+
+    def configure(self, path: Optional[str]):
+        """Starts writing to path, or disables tracing when path is empty."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self.path = path or None
+            self.enabled = bool(path)
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._file = open(path, "a", encoding="utf-8")
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a block of work as a child of the current span."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator wrapping every call of a function in a span."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def callbacks(self) -> list:
+        """LangChain callbacks recording each model call as a span (empty when disabled)."""
+        return [LLMTracingCallback(self)] if self.enabled else []
+
+    def _write(self, event: dict):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+class LLMTracingCallback(BaseCallbackHandler):
+    """Opens a span when a chat model starts and closes it when the model returns."""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name")
+        # Not activated: LangChain may end the run on another thread than it started
+        self._spans[run_id] = Span(self.tracer, "llm.call", {"model": model}).start(activate=False)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span:
+            message = getattr(response.generations[0][0], "message", None) if response.generations else None
+            usage = getattr(message, "usage_metadata", None) or {}
+            span.set(**{k: v for k, v in usage.items() if isinstance(v, int)})
+            span.finish()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._spans.pop(run_id, None)
+        if span:
+            span.finish(error)
+
+def export_chrome_trace(jsonl_path: str, output_path: str) -> int:
+    """
+    Converts a JSONL trace into a Chrome trace JSON file.
+
+    Args:
+        jsonl_path (str): Trace written by the tracer
+        output_path (str): Destination .json file
+
+    Returns:
+        int: Number of exported events
+    """
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+# Configured from settings.trace_file by the main controller
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+
+if __name__ == "__main__":
+    # python -m app.utils.tracing trace.jsonl trace.json
+    import sys
+    count = export_chrome_trace(sys.argv[1], sys.argv[2])
+    print(f"Exported {count} events to {sys.argv[2]}")
@@ -19,6 +19,38 @@ class Settings(BaseSettings):
     azure_endpoint_gpt4o_mini: str
     azure_api_version: str
 
+    # LLM record/replay: "off", "record" or "replay"
+    cassette_mode: str = "off"
+    cassette_dir: str = "cassettes"
+    cassette_latency: float = 0.0
+
+    # JSONL file receiving trace spans; empty disables tracing
+    trace_file: str = ""
+
+    # GUI action timing: "adaptive", "safe" (fixed original timings) or "turbo"
+    pacing_profile: str = "adaptive"
+
+    # Desktop the tools drive: "pyautogui" (real) or "virtual" (in-memory simulator)
+    gui_backend: str = "pyautogui"
+
+    # Number the clickable regions of agent screenshots (set-of-marks) for ClickMark
+    screen_marks: bool = True
+
+    # Time budget in seconds for one agent instruction (model calls and tools); 0 disables it
+    agent_time_budget: float = 120.0
+
+    # Width in pixels of the screenshots sent to the agent (coordinates are mapped back); 0 keeps screen resolution
+    agent_image_width: int = 1280
+
+    # Record agent runs as JSONL trajectories (default directory ~/.airis/trajectories); opt-in
+    record_trajectories: bool = False
+    trajectory_dir: str = ""
+    # Keep typed text and terminal commands (and their results) in trajectories; otherwise only their length
+    trajectory_full_text: bool = False
+    # Trajectory files older than this many days, or beyond this total size, are deleted
+    trajectory_keep_days: int = 14
+    trajectory_max_mb: int = 200
+
     model_config = SettingsConfigDict(env_file=".env")
 
 env = Settings()